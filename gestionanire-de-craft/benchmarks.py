@@ -0,0 +1,246 @@
+"""
+Benchmarks des chemins critiques sur des bases synthétiques.
+
+Mesure le chargement depuis la base, l'écriture et la lecture du cache, le
+calcul des ressources d'un plan, le filtrage de la liste des crafts, les
+bascules de favoris pour chaque profil de réglage SQLite et les recherches
+servies par chaque index du schéma (avec et sans l'index). Chaque
+exécution est ajoutée à benchmark_results.jsonl (une ligne JSON par run) et
+comparée au run précédent pour signaler les régressions.
+
+    python benchmarks.py                      # tailles 1k, 10k, 100k
+    python benchmarks.py --sizes 1k 10k 100k 1M --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import craft_engine
+from craft_engine import CraftCache, CraftEngine, load_craft_recipes_from_db
+from init_db import SCHEMA_INDEXES
+from storage import PROFILES, Storage
+from synthetic_data import SIZES, build_database, database_path
+
+DATA_DIR = "bench_data"
+RESULTS_FILE = "benchmark_results.jsonl"
+DEFAULT_SIZES = ["1k", "10k", "100k"]
+REGRESSION_THRESHOLD = 1.20  # +20 % par rapport au run précédent
+FAVORITE_TOGGLES = 100  # transactions par mesure de bench_profiles
+INDEX_LOOKUPS = 100  # requêtes par mesure de bench_indexes
+
+# Requête servie par chaque index de SCHEMA_INDEXES et colonne d'où tirer ses paramètres
+INDEX_QUERIES = {
+    'idx_craft_name': ("SELECT id FROM Craft WHERE name = ?", "SELECT name FROM Craft"),
+    'idx_craft_category': ("SELECT COUNT(*) FROM Craft WHERE category = ?", "SELECT DISTINCT category FROM Craft"),
+    'idx_craft_ingredient': ("SELECT ingredient_id, quantity FROM CraftIngredient WHERE craft_id = ? AND variant = 0",
+                             "SELECT id FROM Craft"),
+    'idx_ingredient_id': ("SELECT craft_id FROM CraftIngredient WHERE ingredient_id = ?", "SELECT id FROM Ingredient"),
+}
+
+def measure(fn, repeat):
+    """Exécute `fn` `repeat` fois et retourne {'min', 'median'} en secondes"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings)}
+
+def bench_load(context, repeat):
+    """load_craft_recipes_from_db : lecture complète de la base"""
+    return {'load_craft_recipes_from_db': measure(lambda: load_craft_recipes_from_db(context['db']), repeat)}
+
+def bench_cache(context, repeat):
+    """CraftCache.save_to_cache / load_from_cache"""
+    engine = context['engine']
+    cache = CraftCache(context['db'], os.path.join(context['work_dir'], "bench_cache.bin"))
+    save = measure(lambda: cache.save_to_cache(engine.craft_recipes, engine.table_data, engine.craft_variants,
+                                               engine.graph, engine.revision, engine.views), repeat)
+    load = measure(cache.load_from_cache, repeat)
+    cache.invalidate_cache()
+    return {'CraftCache.save_to_cache': save, 'CraftCache.load_from_cache': load}
+
+def bench_plan(context, repeat):
+    """calculate_resources_needed (plan courant, mémorisé ou non, creux ou dense) et mise à jour incrémentale d'une quantité"""
+    engine = context['engine']
+    rng = random.Random(0)
+    names = list(engine.craft_recipes)
+    engine.reset_quantities()
+    for craft in rng.sample(names, min(50, len(names))):
+        engine.set_quantity(craft, rng.randint(1, 20))
+    edited = rng.choice(names)
+    results = {
+        'calculate_resources_needed': measure(engine.calculate_resources_needed, repeat),
+        'calculate_resources_needed (sans mémo)': measure(
+            lambda: (engine.plan_memo.clear(), engine.calculate_resources_needed()), repeat),
+        'set_quantity (delta)': measure(lambda: engine.set_quantity(edited, rng.randint(1, 20)), repeat),
+    }
+    # Plan dense (un craft sur dix) : trop grand pour PlanMemo, résolu par le produit vectorisé
+    for craft in rng.sample(names, len(names) // 10):
+        engine.set_quantity(craft, rng.randint(1, 20))
+    results['calculate_resources_needed (plan dense)'] = measure(engine.calculate_resources_needed, repeat)
+    engine.reset_quantities()
+    return results
+
+def bench_filter(context, repeat):
+    """Filtrage de la liste des crafts (recherche, catégorie, favoris) et pagination"""
+    engine = context['engine']
+    return {
+        'filter_crafts (recherche)': measure(lambda: engine.filter_crafts("raft 12"), repeat),
+        'filter_crafts (catégorie + favoris)': measure(
+            lambda: engine.filter_crafts("", "Survie", favorites_only=True), repeat),
+        'filter_crafts (ingrédient)': measure(
+            lambda: engine.filter_crafts("tériau 7", search_mode="Ingrédient"), repeat),
+        'page_crafts (première page)': measure(engine.page_crafts, repeat),
+        'page_crafts (recherche)': measure(lambda: engine.page_crafts(search_term="raft 12"), repeat),
+    }
+
+def bench_profiles(context, repeat):
+    """Bascules de favoris (une transaction chacune) et lecture complète pour chaque profil SQLite"""
+    path = os.path.join(context['work_dir'], "bench_profile.db")
+    shutil.copyfile(context['db'], path)
+    craft_ids = [row[0] for row in context['engine'].storage.query_all("SELECT id FROM Craft LIMIT ?",
+                                                                     (FAVORITE_TOGGLES,))]
+
+    def toggle_favorites(storage):
+        for craft_id in craft_ids:
+            with storage.transaction() as cursor:
+                cursor.execute("UPDATE Craft SET favorite = 1 - favorite WHERE id = ?", (craft_id,))
+
+    def read_all(storage):
+        storage.query_all("""
+            SELECT c.name, i.name, ci.quantity
+            FROM CraftIngredient ci
+            JOIN Craft c ON c.id = ci.craft_id
+            JOIN Ingredient i ON i.id = ci.ingredient_id
+        """)
+
+    results = {}
+    try:
+        for profile in PROFILES:
+            storage = Storage(path, profile)
+            storage.apply_profile()
+            results[f'favoris x{FAVORITE_TOGGLES} [{profile}]'] = measure(lambda: toggle_favorites(storage), repeat)
+            results[f'lecture complète [{profile}]'] = measure(lambda: read_all(storage), repeat)
+            storage.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return results
+
+def bench_indexes(context, repeat):
+    """Recherches servies par chaque index du schéma, sans puis avec l'index"""
+    path = os.path.join(context['work_dir'], "bench_index.db")
+    shutil.copyfile(context['db'], path)
+    storage = Storage(path)
+    rng = random.Random(0)
+    results = {}
+    try:
+        for index, (query, source) in INDEX_QUERIES.items():
+            values = [row[0] for row in storage.query_all(source)]
+            params = [(rng.choice(values),) for _ in range(INDEX_LOOKUPS)]
+
+            def lookups():
+                for param in params:
+                    storage.query_all(query, param)
+
+            storage.execute(f"DROP INDEX IF EXISTS {index}")
+            results[f'{index} x{INDEX_LOOKUPS} [sans index]'] = measure(lookups, repeat)
+            storage.execute(SCHEMA_INDEXES[index])
+            results[f'{index} x{INDEX_LOOKUPS} [avec index]'] = measure(lookups, repeat)
+    finally:
+        storage.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return results
+
+# Benchmarks exécutés pour chaque taille, dans l'ordre
+BENCHMARKS = [bench_load, bench_cache, bench_plan, bench_filter, bench_profiles, bench_indexes]
+
+def current_label():
+    """Identifie la version mesurée (commit git courant si disponible)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+def load_previous_run(path):
+    """Retourne le dernier run enregistré, ou None"""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last) if last else None
+
+def report(results, previous):
+    """Affiche les résultats et signale les régressions par rapport au run précédent"""
+    regressions = []
+    previous_results = previous['results'] if previous else {}
+    for size, benches in results.items():
+        print(f"\n== {size} crafts ==")
+        for name, timing in benches.items():
+            line = f"  {name:<40} {timing['min'] * 1000:10.3f} ms (médiane {timing['median'] * 1000:.3f} ms)"
+            before = previous_results.get(size, {}).get(name)
+            if before and before['min'] > 0:
+                ratio = timing['min'] / before['min']
+                line += f"  x{ratio:.2f} vs {previous['label']}"
+                if ratio > REGRESSION_THRESHOLD:
+                    line += "  <-- RÉGRESSION"
+                    regressions.append((size, name, ratio))
+            print(line)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du gestionnaire de crafts")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, choices=list(SIZES),
+                        help="Tailles à mesurer (défaut : %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Répétitions par mesure (défaut : %(default)s)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Dossier des bases synthétiques")
+    parser.add_argument("--results", default=RESULTS_FILE, help="Fichier d'historique des résultats")
+    parser.add_argument("--label", default=None, help="Nom du run (défaut : commit git courant)")
+    parser.add_argument("--no-save", action="store_true", help="Ne pas enregistrer les résultats")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        db = database_path(args.data_dir, size)
+        if not os.path.exists(db):
+            print(f"Génération de {db}...")
+            build_database(db, SIZES[size])
+        engine = CraftEngine(db, use_cache=False)
+        engine.load()
+        context = {'db': db, 'engine': engine, 'work_dir': args.data_dir}
+        results[size] = {}
+        for bench in BENCHMARKS:
+            results[size].update(bench(context, args.repeat))
+
+    previous = load_previous_run(args.results)
+    regressions = report(results, previous)
+
+    if not args.no_save:
+        run = {
+            'label': args.label or current_label(),
+            'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': craft_engine.np is not None,
+            'results': results,
+        }
+        with open(args.results, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,236 @@
+"""
+Import et export en flux du catalogue de recettes (CSV et JSON Lines).
+
+Les fichiers sont lus et écrits ligne par ligne : hormis les clés (craft,
+variante) déjà importées, la mémoire utilisée ne dépend pas de la taille du
+catalogue. L'import regroupe les recettes par paquets de
+`chunk_size` et les écrit avec executemany, en mode « upsert » : un craft
+existant est mis à jour, une recette (craft, variante) présente dans le fichier
+remplace celle de la base, le reste de la base est conservé. Une même recette
+ne peut apparaître qu'une fois dans le fichier (en CSV : un seul groupe de
+lignes consécutives) ; sinon l'import échoue sans rien écrire.
+
+Formats :
+    JSON Lines : une recette par ligne
+        {"name": "Porte", "category": "Menuiserie", "favorite": false, "variant": 0,
+         "ingredients": {"Planche": 4, "Clou": 8}}
+    CSV : une ligne par ingrédient, les lignes d'une même recette se suivent
+        craft,category,favorite,variant,ingredient,quantity
+
+Les champs category, favorite et variant sont facultatifs à l'import : absents,
+la catégorie et le favori d'un craft existant sont conservés (« Général » et
+non favori pour un nouveau craft) et la variante vaut 0.
+
+    python catalogue_io.py export catalogue.jsonl
+    python catalogue_io.py import catalogue.csv --chunk-size 5000
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import time
+
+from init_db import bootstrap, refresh_search_keys
+from storage import DB_NAME, get_storage
+
+FORMATS = ("csv", "jsonl")
+CSV_FIELDS = ["craft", "category", "favorite", "variant", "ingredient", "quantity"]
+# Recettes écrites par executemany lors d'un import
+DEFAULT_CHUNK_SIZE = 10_000
+
+def detect_format(path, fmt=None):
+    """Format explicite, sinon déduit de l'extension du fichier (.csv, .jsonl, .ndjson)"""
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Format inconnu pour {path} : indiquer --format ({', '.join(FORMATS)})")
+
+def _parse_favorite(value):
+    """Favori lu d'un fichier : None si absent, sinon 0 ou 1"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return int(value.strip().lower() in ("1", "true", "oui", "yes"))
+    return int(bool(value))
+
+def read_jsonl(f):
+    """Produit les recettes (nom, catégorie, favori, variante, [(ingrédient, quantité)]) d'un flux JSON Lines"""
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            recipe = json.loads(line)
+            ingredients = recipe.get("ingredients", {})
+            if isinstance(ingredients, dict):
+                ingredients = ingredients.items()
+            yield (recipe["name"], recipe.get("category") or None, _parse_favorite(recipe.get("favorite")),
+                   int(recipe.get("variant") or 0),
+                   [(ingredient, int(quantity)) for ingredient, quantity in ingredients])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Ligne {line_number} invalide : {e}")
+
+def read_csv(f):
+    """Produit les recettes d'un flux CSV (lignes d'une même recette consécutives)"""
+    reader = csv.DictReader(f)
+    missing = {"craft", "ingredient", "quantity"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(sorted(missing))}")
+
+    def recipe_key(row):
+        return row["craft"], int(row.get("variant") or 0)
+
+    try:
+        for (name, variant), rows in itertools.groupby(reader, key=recipe_key):
+            first = next(rows)
+            ingredients = [(row["ingredient"], int(row["quantity"]))
+                           for row in itertools.chain([first], rows) if row["ingredient"]]
+            yield name, first.get("category") or None, _parse_favorite(first.get("favorite")), variant, ingredients
+    except ValueError as e:
+        raise ValueError(f"Ligne {reader.line_num} invalide : {e}")
+
+def iter_catalogue(db_name=DB_NAME):
+    """
+    Parcourt les recettes de la base une par une (ordre des crafts puis des variantes)
+    sans charger le catalogue en mémoire.
+    """
+    rows = get_storage(db_name).execute("""
+        SELECT Craft.id, Craft.name, Craft.category, Craft.favorite,
+               CraftIngredient.variant, Ingredient.name, CraftIngredient.quantity
+        FROM Craft
+        LEFT JOIN CraftIngredient ON CraftIngredient.craft_id = Craft.id
+        LEFT JOIN Ingredient ON Ingredient.id = CraftIngredient.ingredient_id
+        ORDER BY Craft.id, CraftIngredient.variant, CraftIngredient.ingredient_id
+    """)
+    for (_, name, category, favorite, variant), links in itertools.groupby(rows, key=lambda row: row[:5]):
+        ingredients = [(ingredient, quantity) for *_, ingredient, quantity in links if ingredient is not None]
+        yield name, category, bool(favorite), variant or 0, ingredients
+
+def write_jsonl(recipes, f):
+    """Écrit les recettes en JSON Lines et retourne leur nombre"""
+    count = 0
+    for name, category, favorite, variant, ingredients in recipes:
+        f.write(json.dumps({"name": name, "category": category, "favorite": favorite, "variant": variant,
+                            "ingredients": dict(ingredients)}, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+def write_csv(recipes, f):
+    """Écrit les recettes en CSV (une ligne par ingrédient) et retourne leur nombre"""
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for name, category, favorite, variant, ingredients in recipes:
+        for ingredient, quantity in ingredients or [("", "")]:
+            writer.writerow([name, category, int(favorite), variant, ingredient, quantity])
+        count += 1
+    return count
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+def export_catalogue(path, db_name=DB_NAME, fmt=None):
+    """
+    Exporte toutes les recettes de la base vers `path` et retourne leur nombre.
+    La base doit exister : une base absente n'est ni créée ni remplie d'exemples.
+    """
+    writer = WRITERS[detect_format(path, fmt)]
+    if not os.path.isfile(db_name):
+        raise FileNotFoundError(f"Base de données introuvable : {db_name}")
+    bootstrap(db_name, seed=False)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return writer(iter_catalogue(db_name), f)
+
+def _flush_recipes(cursor, recipes):
+    """Écrit un paquet de recettes (upsert) avec executemany"""
+    cursor.executemany("""
+        INSERT INTO Craft (name, category, favorite) VALUES (?, COALESCE(?, 'Général'), COALESCE(?, 0))
+        ON CONFLICT(name) DO UPDATE SET
+            category = COALESCE(?, category),
+            favorite = COALESCE(?, favorite)
+    """, [(name, category, favorite, category, favorite) for name, category, favorite, _, _ in recipes])
+    cursor.executemany("INSERT INTO Ingredient (name) VALUES (?) ON CONFLICT(name) DO NOTHING",
+                       [(ingredient,) for *_, ingredients in recipes for ingredient, _ in ingredients])
+    # Une recette importée remplace entièrement la variante correspondante
+    cursor.executemany("""
+        DELETE FROM CraftIngredient
+        WHERE craft_id = (SELECT id FROM Craft WHERE name = ?) AND variant = ?
+    """, [(name, variant) for name, _, _, variant, _ in recipes])
+    cursor.executemany("""
+        INSERT INTO CraftIngredient (craft_id, ingredient_id, quantity, variant)
+        SELECT Craft.id, Ingredient.id, ?, ? FROM Craft, Ingredient
+        WHERE Craft.name = ? AND Ingredient.name = ?
+        ON CONFLICT(craft_id, variant, ingredient_id) DO UPDATE SET quantity = excluded.quantity
+    """, [(quantity, variant, name, ingredient)
+          for name, _, _, variant, ingredients in recipes for ingredient, quantity in ingredients])
+
+def _unique_recipes(recipes):
+    """
+    Relaie les recettes en refusant une recette (craft, variante) déjà lue : selon
+    le découpage en paquets, ses lignes seraient sinon fusionnées ou remplacées.
+    """
+    seen = set()
+    for recipe in recipes:
+        key = recipe[0], recipe[3]
+        if key in seen:
+            raise ValueError(f"Recette « {key[0]} » (variante {key[1]}) présente plusieurs fois : "
+                             "ses lignes doivent se suivre")
+        seen.add(key)
+        yield recipe
+
+def import_catalogue(path, db_name=DB_NAME, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Importe les recettes de `path` dans la base, en une transaction (tout ou rien).
+    Retourne le nombre de recettes importées.
+    """
+    reader = READERS[detect_format(path, fmt)]
+    bootstrap(db_name, seed=False)
+    count = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        with get_storage(db_name).transaction() as cursor:
+            recipes = _unique_recipes(reader(f))
+            while True:
+                chunk = list(itertools.islice(recipes, chunk_size))
+                if not chunk:
+                    break
+                _flush_recipes(cursor, chunk)
+                count += len(chunk)
+            refresh_search_keys(cursor)
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import / export en flux du catalogue de recettes")
+    parser.add_argument("--db", default=DB_NAME, help="Base de données SQLite (défaut : %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Exporte le catalogue")
+    export_parser.add_argument("path", help="Fichier de sortie (.csv ou .jsonl)")
+    export_parser.add_argument("--format", choices=FORMATS, default=None, help="Format (défaut : selon l'extension)")
+
+    import_parser = subparsers.add_parser("import", help="Importe (ou met à jour) des recettes")
+    import_parser.add_argument("path", help="Fichier d'entrée (.csv ou .jsonl)")
+    import_parser.add_argument("--format", choices=FORMATS, default=None, help="Format (défaut : selon l'extension)")
+    import_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                               help="Recettes par executemany (défaut : %(default)s)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            count = export_catalogue(args.path, args.db, args.format)
+            action = "exportées vers"
+        else:
+            count = import_catalogue(args.path, args.db, args.format, args.chunk_size)
+            action = "importées depuis"
+    except (OSError, ValueError, sqlite3.Error) as e:
+        parser.error(str(e))
+    print(f"{count} recettes {action} {args.path} en {time.perf_counter() - start:.1f} s")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
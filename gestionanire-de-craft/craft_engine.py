@@ -0,0 +1,1955 @@
+"""
+Moteur de planification des crafts, sans interface graphique.
+
+Chargement des recettes (base de données ou cache), index et résolution des
+plans. Utilisable en script ou en ligne de commande :
+
+    python -m craft_engine plan "Porte=3,Bandage=10"
+    python -m craft_engine batch commandes.txt --workers 4
+    python -m craft_engine export-cache cache.json   # cache binaire lisible, pour déboguer
+"""
+import argparse
+import atexit
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import snapshot
+from init_db import bootstrap
+from storage import DB_NAME, PROFILES, close_thread, fold, get_storage
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : repli en Python pur
+    np = None
+
+CACHE_FILE = "craft_cache.bin"
+VALID_CATEGORIES = [
+    "Général", "Survie", "Menuiserie", "Électrique",
+    "Agriculture", "Pêche", "Trappeur", "Cuisine",
+    "Premiers Secours", "Travail du Métal", "Artisanat"
+]
+# Longueur minimale (en caractères) d'une recherche servie par l'index FTS5 à trigrammes
+FTS_MIN_TERM_LENGTH = 3
+# Nombre de crafts par page de page_crafts
+DEFAULT_PAGE_SIZE = 20
+# Au-delà de cette part du catalogue touchée par le journal, un rechargement complet est plus rapide
+SYNC_FULL_RELOAD_RATIO = 0.25
+# Nombre d'ids par requête IN de load_crafts_by_id (limite de paramètres de SQLite)
+ID_CHUNK_SIZE = 500
+# Le journal de correctifs du cache est compacté dans l'instantané au-delà de
+# cette taille, ou de cette part de la taille de l'instantané si elle est plus grande
+PATCH_COMPACT_MIN_BYTES = 64 * 1024
+PATCH_COMPACT_RATIO = 0.5
+
+# Nombre de plans dont les ressources sont mémorisées par PlanMemo
+PLAN_MEMO_SIZE = 128
+# Au-delà de ce nombre de crafts, un plan est recalculé sans être mémorisé
+PLAN_MEMO_MAX_CRAFTS = 64
+# Part des crafts au-delà de laquelle un plan est résolu par le produit vectorisé
+# (ResourceMatrix.multiply) plutôt que ligne par ligne
+DENSE_PLAN_RATIO = 0.02
+
+# --- Paramètres du traitement par lots ---
+BATCH_CHUNK_SIZE = 256
+BATCH_PARALLEL_THRESHOLD = 2000
+
+def apply_patch(patch, recipes, table_data, variants):
+    """
+    Applique un correctif du cache aux structures chargées. Retourne True si des
+    recettes ont changé (l'analyse du graphe est alors à refaire).
+        ['favorite', nom, favori]
+        ['craft', nom, entrée de table_data sans 'quantity', recette, variantes ou None]
+        ['delete', nom]
+    La quantité du plan n'est pas journalisée : celle déjà en mémoire est conservée.
+    """
+    operation, name = patch[0], patch[1]
+    if operation == 'favorite':
+        if name in table_data:
+            table_data[name]['favorite'] = patch[2]
+        return False
+    if operation == 'craft':
+        quantity = table_data.get(name, {}).get('quantity', 0)
+        table_data[name], recipes[name], craft_variants = dict(patch[2], quantity=quantity), patch[3], patch[4]
+        if craft_variants:
+            # La recette principale est la première variante (même objet, comme au chargement)
+            variants[name] = [recipes[name]] + craft_variants[1:]
+        else:
+            variants.pop(name, None)
+        return True
+    table_data.pop(name, None)
+    recipes.pop(name, None)
+    variants.pop(name, None)
+    return True
+
+class CacheWriter:
+    """
+    Thread d'écriture du cache : les tâches soumises s'exécutent hors du thread
+    appelant, une à la fois, dans un thread unique qui attend les demandes (et
+    garde donc une seule connexion SQLite). Une tâche encore en attente est
+    remplacée par la suivante, seul le dernier état du cache comptant. Les
+    écritures en attente sont terminées à la sortie du programme (voir
+    flush_cache_writers) ; close() arrête le thread.
+    """
+
+    def __init__(self, name="cache-writer"):
+        self.name = name
+        self._condition = threading.Condition()
+        self._pending = None
+        self._running = False
+        self._thread = None
+        # Demandes remplacées avant d'avoir été exécutées
+        self.coalesced = 0
+        _cache_writers.add(self)
+
+    def submit(self, task, *args):
+        """Programme task(*args), en remplacement de la tâche en attente s'il y en a une"""
+        with self._condition:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (task, args)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self):
+        """Attend et exécute les tâches jusqu'à close() ; ferme ensuite les connexions du thread"""
+        current = threading.current_thread()
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._pending is not None or self._thread is not current)
+                    if self._pending is None:
+                        return
+                    task, args = self._pending
+                    self._pending = None
+                    self._running = True
+                try:
+                    task(*args)
+                except Exception as e:
+                    print(f"Erreur lors de l'écriture du cache: {e}", file=sys.stderr)
+                finally:
+                    with self._condition:
+                        self._running = False
+                        self._condition.notify_all()
+        finally:
+            close_thread()
+
+    @property
+    def busy(self):
+        """Une tâche est en attente ou en cours"""
+        with self._condition:
+            return self._pending is not None or self._running
+
+    def flush(self, timeout=None):
+        """Attend que toutes les tâches soient exécutées ; retourne False si `timeout` expire"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._running, timeout)
+
+    def close(self, timeout=None):
+        """Termine les tâches en attente puis arrête le thread (relancé par le prochain submit)"""
+        with self._condition:
+            thread = self._thread
+            if thread is None:
+                return
+            self._thread = None
+            self._condition.notify_all()
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+
+_cache_writers = weakref.WeakSet()
+
+@atexit.register
+def flush_cache_writers():
+    """Termine les écritures de cache en attente (appelée à la sortie du programme)"""
+    for writer in list(_cache_writers):
+        writer.flush()
+
+class CraftCache:
+    """
+    Gestionnaire de cache pour optimiser les performances : un instantané binaire
+    (voir snapshot) et un journal de correctifs (JSON Lines, en ajout seul) pour
+    les petites modifications, compacté dans l'instantané quand il grossit.
+    """
+    
+    def __init__(self, db_name=DB_NAME, cache_file=CACHE_FILE):
+        self.db_name = db_name
+        self.cache_file = cache_file
+        self.patch_file = cache_file + ".patches"
+        self.cache_data = None
+        # Sérialise les ajouts au journal de correctifs et sa réécriture après compaction
+        self._patch_lock = threading.Lock()
+        # Écritures de l'instantané hors du thread de l'interface
+        self.writer = CacheWriter()
+
+    def db_state(self):
+        """
+        État de la base en une requête : (révision du journal, empreinte). L'empreinte
+        combine l'identifiant de la base (DatabaseInfo), la version et le texte du
+        schéma ; elle ne dépend ni des dates du fichier ni des checkpoints WAL.
+        """
+        revision, instance_id, version, schema = get_storage(self.db_name).query_one("""
+            SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'), 0),
+                   (SELECT value FROM DatabaseInfo WHERE key = 'instance_id'),
+                   (SELECT user_version FROM pragma_user_version),
+                   (SELECT group_concat(name || ':' || COALESCE(sql, ''), char(10))
+                    FROM (SELECT name, sql FROM sqlite_master ORDER BY name))
+        """)
+        digest = hashlib.blake2b(f"{instance_id}\n{version}\n{schema}".encode('utf-8'), digest_size=8).digest()
+        return revision, int.from_bytes(digest, 'little')
+
+    @staticmethod
+    def _accepts(revision, fingerprint, state):
+        """
+        Même base et même schéma, révision pas en avance sur la base (sinon le
+        fichier a été remplacé par une copie plus ancienne). Les changements
+        postérieurs à la révision sont rattrapés par CraftEngine.sync.
+        """
+        return fingerprint == state[1] and revision <= state[0]
+
+    def is_cache_valid(self, state=None):
+        """Vérifie si le cache est utilisable en ne lisant que son en-tête"""
+        try:
+            revision, fingerprint = snapshot.read_header(self.cache_file)
+            return self._accepts(revision, fingerprint, state or self.db_state())
+        except (snapshot.SnapshotError, sqlite3.Error):
+            return False
+    
+    def load_from_cache(self, state=None):
+        """
+        Charge les données depuis l'instantané binaire, ouvert une seule fois :
+        l'en-tête est contrôlé avant de décoder quoi que ce soit. Les correctifs
+        du journal sont ensuite appliqués.
+        Retourne (recettes, table_data, variantes, graphe, vues, révision), ou des
+        None si le cache est absent, illisible ou écrit pour une autre base ou un
+        autre schéma. Le graphe et les vues de l'interface ne sont pas décodés :
+        ce sont des fonctions sans argument qui les décodent au premier appel
+        (None si l'instantané ne les contient pas), ou None si le journal a
+        modifié des recettes.
+        """
+        try:
+            state = state or self.db_state()
+            with snapshot.Snapshot(self.cache_file) as cache:
+                if not self._accepts(cache.revision, cache.fingerprint, state):
+                    return None, None, None, None, None, None
+                recipes, variants = cache.recipes()
+                table_data = cache.table_data()
+                revision, structural = self._replay_patches(cache.revision, cache.fingerprint,
+                                                            recipes, table_data, variants)
+                detached = None if structural else cache.detach()
+            if revision > state[0]:
+                return None, None, None, None, None, None
+            if structural:
+                return recipes, table_data, variants, None, None, revision
+
+            def graph():
+                data = detached.graph()
+                return CraftGraph.from_dict(data) if data else None
+
+            def views():
+                data = detached.views()
+                if data is None:
+                    return None
+                # Favoris relus : modifiés par le journal ou depuis le chargement
+                views = CraftViews.from_dict(data)
+                views.refresh_favorites(table_data)
+                return views
+
+            return recipes, table_data, variants, graph, views, revision
+        except (snapshot.SnapshotError, sqlite3.Error, ValueError, KeyError, IndexError):
+            return None, None, None, None, None, None
+
+    def _patch_header(self, revision, fingerprint):
+        """Première ligne du journal de correctifs : l'instantané auquel il s'applique"""
+        return {'base': revision, 'fingerprint': fingerprint}
+
+    def _replay_patches(self, revision, fingerprint, recipes, table_data, variants):
+        """
+        Applique les correctifs écrits pour l'instantané (revision, fingerprint).
+        Retourne (révision atteinte, recettes modifiées). Une ligne tronquée par un
+        arrêt brutal termine la lecture : les changements suivants seront rejoués
+        depuis la base.
+        """
+        structural = False
+        try:
+            with open(self.patch_file, encoding='utf-8') as f:
+                try:
+                    header = json.loads(f.readline())
+                except json.JSONDecodeError:
+                    return revision, False
+                if header != self._patch_header(revision, fingerprint):
+                    return revision, False
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    for patch in record['patches']:
+                        structural |= apply_patch(patch, recipes, table_data, variants)
+                    revision = record['revision']
+        except FileNotFoundError:
+            pass
+        return revision, structural
+
+    def append_patches(self, revision, patches):
+        """
+        Ajoute au journal les correctifs qui amènent le cache à `revision`.
+        Retourne la taille du journal, ou None s'il n'y a pas d'instantané à corriger.
+        """
+        line = json.dumps({'revision': revision, 'patches': patches}, ensure_ascii=False)
+        with self._patch_lock:
+            # En-tête lu sous verrou : l'instantané ne peut pas être remplacé entre-temps
+            try:
+                header = self._patch_header(*snapshot.read_header(self.cache_file))
+            except snapshot.SnapshotError:
+                return None
+            try:
+                with open(self.patch_file, 'r+b') as f:
+                    current = json.loads(f.readline())
+                    content_end = f.seek(0, os.SEEK_END)
+                    f.seek(content_end - 1)
+                    if f.read(1) != b"\n":
+                        # Dernière ligne tronquée par un arrêt brutal : retirée avant d'ajouter
+                        f.seek(0)
+                        f.truncate(f.read().rfind(b"\n") + 1)
+            except (OSError, ValueError):
+                current = None
+            # Journal d'un autre instantané (réécrit entre-temps) : il repart de zéro
+            mode = 'a' if current == header else 'w'
+            with open(self.patch_file, mode, encoding='utf-8') as f:
+                if mode == 'w':
+                    f.write(json.dumps(header) + "\n")
+                f.write(line + "\n")
+                return f.tell()
+
+    def needs_compaction(self, patch_size):
+        """Le journal de correctifs est assez gros pour être intégré à l'instantané"""
+        try:
+            snapshot_size = os.path.getsize(self.cache_file)
+        except OSError:
+            return False
+        return patch_size > max(PATCH_COMPACT_MIN_BYTES, snapshot_size * PATCH_COMPACT_RATIO)
+
+    def _rebase_patches(self, revision, fingerprint):
+        """
+        Après la mise en place d'un instantané à `revision`, ne garde du journal que
+        les correctifs postérieurs (ajoutés pendant son écriture en arrière-plan).
+        Appelée sous self._patch_lock.
+        """
+        kept = []
+        try:
+            with open(self.patch_file, encoding='utf-8') as f:
+                f.readline()
+                for line in f:
+                    try:
+                        if json.loads(line)['revision'] > revision:
+                            kept.append(line)
+                    except (json.JSONDecodeError, KeyError):
+                        break
+        except OSError:
+            pass
+        temporary = self.patch_file + ".tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self._patch_header(revision, fingerprint)) + "\n")
+            f.writelines(kept)
+        os.replace(temporary, self.patch_file)
+    
+    def save_to_cache(self, recipes, table_data, variants=None, graph=None, revision=None, views=None):
+        """
+        Sauvegarde les données dans le cache, avec la révision du journal qu'elles
+        reflètent et les vues de l'interface (CraftViews) si elles sont fournies
+        """
+        meta = {
+            'db': os.path.abspath(self.db_name),
+            'created_at': datetime.now().isoformat()
+        }
+        try:
+            db_revision, fingerprint = self.db_state()
+            revision = db_revision if revision is None else revision
+            # Encodage et écriture hors verrou ; seule la mise en place est sérialisée
+            # avec les ajouts au journal de correctifs
+            temporary = snapshot.write_temporary(self.cache_file, recipes, table_data, variants,
+                                                 graph.to_dict() if graph is not None else None,
+                                                 revision, fingerprint, meta,
+                                                 views.to_dict() if views is not None else None)
+            try:
+                with self._patch_lock:
+                    os.replace(temporary, self.cache_file)
+                    self._rebase_patches(revision, fingerprint)
+            finally:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde du cache: {e}", file=sys.stderr)
+
+    def flush(self, timeout=None):
+        """Attend la fin des écritures demandées au thread d'écriture ; False si `timeout` expire"""
+        return self.writer.flush(timeout)
+    
+    def export_json(self, path):
+        """Exporte le contenu du cache en JSON indenté (débogage). Retourne False si le cache est illisible"""
+        try:
+            with snapshot.Snapshot(self.cache_file) as cache:
+                recipes, variants = cache.recipes()
+                table_data = cache.table_data()
+                revision, structural = self._replay_patches(cache.revision, cache.fingerprint,
+                                                            recipes, table_data, variants)
+                views = cache.views()
+                if views is not None:
+                    views = dict(views, favorites=list(views['favorites']))
+                cache_data = dict(cache.meta, revision=revision, fingerprint=cache.fingerprint,
+                                  recipes=recipes, table_data=table_data, variants=variants,
+                                  graph=None if structural else cache.graph(),
+                                  views=None if structural else views)
+        except snapshot.SnapshotError as e:
+            print(f"Cache illisible : {e}", file=sys.stderr)
+            return False
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        return True
+    
+    def invalidate_cache(self):
+        """Invalide le cache (le supprime, avec son journal de correctifs)"""
+        # Une écriture encore en attente recréerait le fichier supprimé
+        self.flush()
+        try:
+            for path in (self.cache_file, self.patch_file):
+                if os.path.exists(path):
+                    os.remove(path)
+        except OSError as e:
+            print(f"Erreur lors de la suppression du cache: {e}", file=sys.stderr)
+
+class CraftGraph:
+    """
+    Analyse du graphe des recettes (arêtes craft -> ingrédient qui est lui-même un craft) :
+    composantes fortement connexes, ordre topologique, profondeur de recette et
+    diagnostics de cycles. Calculée une fois au chargement et mise en cache avec les recettes.
+    """
+
+    def __init__(self, order=None, component=None, depth=None, cycles=None):
+        # Crafts ordonnés de façon à ce que chacun suive les crafts dont il dépend
+        self.order = order or []
+        # Numéro de composante fortement connexe de chaque craft
+        self.component = component or {}
+        # Profondeur de recette : 1 pour un craft fait uniquement de matériaux de base
+        self.depth = depth or {}
+        # Un diagnostic par cycle : {'crafts': [...], 'edges': [[craft, ingrédient], ...], 'depth': n}
+        self.cycles = cycles or []
+
+    @classmethod
+    def analyze(cls, recipes):
+        """
+        Algorithme de Tarjan (itératif, sans limite de récursion). Les composantes
+        sortent dans l'ordre « dépendances d'abord », ce qui donne directement
+        l'ordre topologique du graphe condensé.
+        """
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        for root in recipes:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(recipes[root]))]
+            while work:
+                craft, ingredients = work[-1]
+                for ingredient in ingredients:
+                    if ingredient not in recipes:
+                        continue
+                    if ingredient not in index:
+                        index[ingredient] = lowlink[ingredient] = len(index)
+                        stack.append(ingredient)
+                        on_stack.add(ingredient)
+                        work.append((ingredient, iter(recipes[ingredient])))
+                        break
+                    if ingredient in on_stack:
+                        lowlink[craft] = min(lowlink[craft], index[ingredient])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[craft])
+                    if lowlink[craft] == index[craft]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            members.append(member)
+                            if member == craft:
+                                break
+                        components.append(members)
+
+        order = []
+        component = {}
+        depth = {}
+        cycles = []
+        for component_id, members in enumerate(components):
+            for member in members:
+                component[member] = component_id
+            member_depth = 1
+            for member in members:
+                for ingredient in recipes[member]:
+                    if ingredient in recipes and component[ingredient] != component_id:
+                        member_depth = max(member_depth, depth[ingredient] + 1)
+            for member in members:
+                depth[member] = member_depth
+            order.extend(members)
+
+            member_set = set(members)
+            edges = sorted([member, ingredient] for member in members
+                           for ingredient in recipes[member] if ingredient in member_set)
+            if edges:
+                cycles.append({'crafts': sorted(members, key=str.lower), 'edges': edges, 'depth': member_depth})
+        return cls(order, component, depth, cycles)
+
+    def max_depth(self):
+        """Profondeur maximale des recettes"""
+        return max(self.depth.values(), default=0)
+
+    def to_dict(self):
+        """Forme sérialisable pour le cache"""
+        return {'order': self.order, 'component': self.component, 'depth': self.depth, 'cycles': self.cycles}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstruit l'analyse depuis le cache"""
+        return cls(data.get('order'), data.get('component'), data.get('depth'), data.get('cycles'))
+
+class RecipeResolver:
+    """Résout les crafts intermédiaires jusqu'aux matériaux de base"""
+
+    def __init__(self, recipes, graph=None):
+        self.recipes = recipes
+        self.graph = graph if graph is not None else CraftGraph.analyze(recipes)
+        self.base_vectors = {}
+        self.build()
+
+    def build(self):
+        """
+        Calcule et mémorise le vecteur aplati {matériau_de_base: quantité} de chaque craft,
+        dans l'ordre topologique de l'analyse du graphe. Un ingrédient appartenant au
+        même cycle que le craft (ex: 'Pile' <-> 'Lampe de poche') n'est pas développé :
+        il est traité comme un matériau de base.
+        """
+        component = self.graph.component
+        self.base_vectors = {}
+        for craft in self.graph.order:
+            craft_component = component[craft]
+            vector = {}
+            for ingredient, qty in self.recipes[craft].items():
+                if ingredient in self.base_vectors and component[ingredient] != craft_component:
+                    for base, base_qty in self.base_vectors[ingredient].items():
+                        vector[base] = vector.get(base, 0) + base_qty * qty
+                else:
+                    vector[ingredient] = vector.get(ingredient, 0) + qty
+            self.base_vectors[craft] = vector
+
+    def resolve(self, plan):
+        """
+        Calcule les matériaux de base pour un plan {nom_craft: quantité}.
+        Une seule passe sur les crafts sélectionnés grâce aux vecteurs mémorisés.
+        """
+        resources = {}
+        for craft, qty in plan.items():
+            vector = self.base_vectors.get(craft)
+            if qty <= 0 or vector is None:
+                continue
+            for base, base_qty in vector.items():
+                resources[base] = resources.get(base, 0) + base_qty * qty
+        return resources
+
+class ResourceMatrix:
+    """
+    Matrice creuse crafts x matériaux de base au format CSR (identifiants entiers).
+    Un plan devient un vecteur de quantités indexé par craft, et le total des
+    ressources est le produit de ce vecteur par la matrice.
+    """
+
+    def __init__(self, base_vectors):
+        self.craft_ids = {}
+        self.ingredient_names = []
+        ingredient_ids = {}
+        indptr = [0]
+        indices = []
+        data = []
+        for craft, vector in base_vectors.items():
+            self.craft_ids[craft] = len(self.craft_ids)
+            for ingredient, qty in vector.items():
+                ingredient_id = ingredient_ids.get(ingredient)
+                if ingredient_id is None:
+                    ingredient_id = ingredient_ids[ingredient] = len(self.ingredient_names)
+                    self.ingredient_names.append(ingredient)
+                indices.append(ingredient_id)
+                data.append(qty)
+            indptr.append(len(indices))
+
+        if np is not None:
+            self.indptr = np.array(indptr, dtype=np.int64)
+            self.indices = np.array(indices, dtype=np.int64)
+            self.data = np.array(data, dtype=np.int64)
+        else:
+            self.indptr = array('q', indptr)
+            self.indices = array('q', indices)
+            self.data = array('q', data)
+
+    def plan_vector(self):
+        """Retourne un vecteur de quantités nul (une entrée par craft)"""
+        if np is not None:
+            return np.zeros(len(self.craft_ids), dtype=np.int64)
+        return array('q', bytes(8 * len(self.craft_ids)))
+
+    def multiply(self, quantities):
+        """
+        Produit vecteur x matrice : retourne {nom_ressource: quantité_totale}.
+        """
+        if np is not None:
+            weights = self.data * np.repeat(quantities, np.diff(self.indptr))
+            totals = np.bincount(self.indices, weights=weights, minlength=len(self.ingredient_names))
+            return {self.ingredient_names[i]: int(totals[i]) for i in np.flatnonzero(totals)}
+
+        totals = {}
+        indptr, indices, data = self.indptr, self.indices, self.data
+        for craft_id, qty in enumerate(quantities):
+            if qty <= 0:
+                continue
+            for k in range(indptr[craft_id], indptr[craft_id + 1]):
+                ingredient_id = indices[k]
+                totals[ingredient_id] = totals.get(ingredient_id, 0) + data[k] * qty
+        return {self.ingredient_names[i]: total for i, total in totals.items() if total}
+
+    def row(self, craft_id):
+        """Retourne les couples (nom_ressource, quantité) de la ligne d'un craft"""
+        start, end = int(self.indptr[craft_id]), int(self.indptr[craft_id + 1])
+        names = self.ingredient_names
+        return [(names[i], qty) for i, qty in zip(self.indices[start:end].tolist(), self.data[start:end].tolist())]
+
+    def total(self, plan, quantities=None):
+        """
+        Retourne {nom_ressource: quantité_totale} pour un plan {nom_craft: quantité}.
+        Avec NumPy, un plan qui couvre au moins DENSE_PLAN_RATIO des crafts passe par
+        multiply sur le vecteur `quantities` du même plan (construit s'il n'est pas
+        fourni) ; un plan plus creux par resolve, qui ne lit que ses lignes.
+        """
+        if np is None or len(plan) < len(self.craft_ids) * DENSE_PLAN_RATIO:
+            return self.resolve(plan)
+        if quantities is None:
+            quantities = self.plan_vector()
+            for craft, qty in plan.items():
+                craft_id = self.craft_ids.get(craft)
+                if craft_id is not None and qty > 0:
+                    quantities[craft_id] = qty
+        return self.multiply(quantities)
+
+    def resolve(self, plan):
+        """
+        Retourne {nom_ressource: quantité_totale} pour un plan creux {nom_craft: quantité}.
+        Seules les lignes des crafts du plan sont parcourues.
+        """
+        totals = {}
+        for craft, qty in plan.items():
+            craft_id = self.craft_ids.get(craft)
+            if craft_id is None or qty <= 0:
+                continue
+            for resource, resource_qty in self.row(craft_id):
+                totals[resource] = totals.get(resource, 0) + resource_qty * qty
+        return totals
+
+class RunningTotals:
+    """
+    Totaux de ressources maintenus de façon incrémentale : modifier la quantité
+    d'un craft n'applique que le delta de sa ligne dans la matrice.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.quantities = matrix.plan_vector()
+        self.totals = {}
+        # Plan courant {nom_craft: quantité} (quantités non nulles), clé de PlanMemo
+        self.plan = {}
+
+    def set_quantity(self, craft, qty):
+        """
+        Met à jour la quantité d'un craft en temps proportionnel à son nombre d'ingrédients.
+        Retourne l'ensemble des ressources dont le total a changé.
+        """
+        craft_id = self.matrix.craft_ids.get(craft)
+        if craft_id is None:
+            return set()
+        qty = max(qty, 0)
+        delta = qty - int(self.quantities[craft_id])
+        if not delta:
+            return set()
+        self.quantities[craft_id] = qty
+        if qty:
+            self.plan[craft] = qty
+        else:
+            self.plan.pop(craft, None)
+
+        changed = set()
+        for resource, resource_qty in self.matrix.row(craft_id):
+            total = self.totals.get(resource, 0) + resource_qty * delta
+            if total:
+                self.totals[resource] = total
+            else:
+                self.totals.pop(resource, None)
+            changed.add(resource)
+        return changed
+
+    def reset(self):
+        """Remet toutes les quantités et tous les totaux à zéro"""
+        self.quantities = self.matrix.plan_vector()
+        self.totals = {}
+        self.plan = {}
+
+class VariantOptimizer:
+    """
+    Choisit les variantes de recette (ex: les trois 'Attelle') qui minimisent le coût
+    total en matériaux de base, ou qui s'ajustent au mieux à un stock donné.
+    Les classements sont mémorisés par (craft, signature du stock), avec en plus
+    le chemin d'appel pour ceux qu'un cycle a coupés.
+    """
+
+    def __init__(self, recipes, variants, costs=None):
+        self.recipes = recipes
+        self.variants = variants
+        self.costs = costs or {}
+        self._ranked = {}
+
+    def invalidate(self):
+        """Vide la mémoïsation (à appeler quand une recette change)"""
+        self._ranked = {}
+
+    @staticmethod
+    def stock_signature(stock):
+        """Signature hashable d'un stock {ingrédient: quantité possédée}"""
+        if not stock:
+            return None
+        return frozenset((name, qty) for name, qty in stock.items() if qty > 0)
+
+    def recipe_variants(self, craft):
+        """Retourne la liste des variantes d'un craft (la recette principale en premier)"""
+        return self.variants.get(craft) or [self.recipes[craft]]
+
+    def score(self, vector, stock):
+        """Coût d'un vecteur de base ; avec un stock, le manque est pénalisé en priorité"""
+        cost = sum(qty * self.costs.get(material, 1) for material, qty in vector.items())
+        if not stock:
+            return (cost,)
+        missing = sum(max(qty - stock.get(material, 0), 0) * self.costs.get(material, 1)
+                      for material, qty in vector.items())
+        return (missing, cost)
+
+    def ranked_variants(self, craft, stock=None):
+        """
+        Retourne les variantes d'un craft triées de la meilleure à la moins bonne,
+        sous forme de tuples (score, index_variante, vecteur_de_base).
+        Les crafts intermédiaires sont développés avec leur meilleure variante ;
+        un ingrédient qui referme un cycle est traité comme un matériau de base.
+        """
+        return self._rank(craft, self.stock_signature(stock), stock, frozenset())[0]
+
+    def _rank(self, craft, signature, stock, visiting):
+        """
+        Classement des variantes de `craft`, les crafts de `visiting` (chemin depuis
+        l'appel initial) étant traités comme des matériaux de base.
+        Retourne (classement, coupé) : un classement coupé a rencontré un craft du
+        chemin, il dépend donc de ce chemin et n'est mémorisé qu'avec lui.
+        """
+        ranked = self._ranked.get((craft, signature))
+        if ranked is not None:
+            return ranked, False
+        path_key = (craft, signature, visiting)
+        ranked = self._ranked.get(path_key)
+        if ranked is not None:
+            return ranked, True
+
+        visiting = visiting | {craft}
+        cut = False
+        ranked = []
+        for index, recipe in enumerate(self.recipe_variants(craft)):
+            vector = {}
+            for ingredient, qty in recipe.items():
+                if ingredient in self.recipes and ingredient not in visiting:
+                    sub_ranked, sub_cut = self._rank(ingredient, signature, stock, visiting)
+                    cut = cut or sub_cut
+                    for base, base_qty in sub_ranked[0][2].items():
+                        vector[base] = vector.get(base, 0) + base_qty * qty
+                else:
+                    cut = cut or ingredient in visiting
+                    vector[ingredient] = vector.get(ingredient, 0) + qty
+            ranked.append((self.score(vector, stock), index, vector))
+        ranked.sort(key=lambda entry: (entry[0], entry[1]))
+        self._ranked[path_key if cut else (craft, signature)] = ranked
+        return ranked, cut
+
+    def solve(self, plan, stock=None):
+        """
+        Choisit le mélange de variantes pour un plan {nom_craft: quantité}.
+        Sans stock, chaque craft utilise sa variante la moins coûteuse. Avec un stock,
+        les unités sont réparties sur les variantes dans l'ordre du classement tant que
+        le stock restant suffit ; le reliquat utilise la meilleure variante.
+        Retourne (choix, ressources) avec choix = {nom_craft: {index_variante: unités}}.
+        """
+        remaining = dict(stock) if stock else None
+        choices = {}
+        resources = {}
+        for craft, qty in plan.items():
+            if qty <= 0 or craft not in self.recipes:
+                continue
+            ranked = self.ranked_variants(craft, stock)
+            allocation = {}
+            left = qty
+            if remaining is not None:
+                for _, index, vector in ranked:
+                    fit = min((remaining.get(material, 0) // need for material, need in vector.items() if need > 0),
+                              default=left)
+                    units = min(fit, left)
+                    if units > 0:
+                        allocation[index] = allocation.get(index, 0) + units
+                        for material, need in vector.items():
+                            remaining[material] = remaining.get(material, 0) - need * units
+                        left -= units
+                    if not left:
+                        break
+            if left:
+                allocation[ranked[0][1]] = allocation.get(ranked[0][1], 0) + left
+            choices[craft] = allocation
+
+            vectors = {index: vector for _, index, vector in ranked}
+            for index, units in allocation.items():
+                for material, need in vectors[index].items():
+                    resources[material] = resources.get(material, 0) + need * units
+        return choices, resources
+
+class PlanMemo:
+    """
+    Mémoïsation LRU des ressources de base d'un plan, indexée par le vecteur
+    canonique du plan (couples (craft, quantité) triés, quantités positives).
+    Chaque entrée reçoit un numéro et est rattachée, par ce numéro, à la
+    fermeture de dépendances du plan (crafts et ingrédients atteints par les
+    recettes) : quand une recette change, seules les entrées qui l'atteignent
+    sont retirées. Les plans de plus de `max_plan_crafts` crafts ne sont pas
+    mémorisés : construire leur clé et leur fermeture coûterait plus que le calcul.
+    """
+
+    def __init__(self, maxsize=PLAN_MEMO_SIZE, max_plan_crafts=PLAN_MEMO_MAX_CRAFTS):
+        self.maxsize = maxsize
+        self.max_plan_crafts = max_plan_crafts
+        self.hits = 0
+        self.misses = 0
+        # Clé du plan -> numéro d'entrée, numéro -> (clé, ressources, dépendances) dans l'ordre LRU
+        self._ids = {}
+        self._entries = OrderedDict()
+        self._next_id = 0
+        # Nom de craft ou d'ingrédient -> numéros des entrées qui en dépendent
+        self._dependents = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, plan):
+        return self.plan_key(plan) in self._ids
+
+    @staticmethod
+    def plan_key(plan):
+        """Vecteur canonique d'un plan {nom_craft: quantité}"""
+        return tuple(sorted((craft, qty) for craft, qty in plan.items() if qty > 0))
+
+    @staticmethod
+    def closure(key, recipes):
+        """Crafts et ingrédients atteints depuis les crafts d'un plan"""
+        reached = set()
+        stack = [craft for craft, _ in key]
+        while stack:
+            name = stack.pop()
+            if name in reached:
+                continue
+            reached.add(name)
+            stack.extend(ingredient for ingredient in recipes.get(name, ()) if ingredient not in reached)
+        return reached
+
+    def get(self, plan, recipes, compute):
+        """
+        Ressources du plan : mémorisées, sinon compute(plan) (puis mémorisées si
+        le plan n'est pas trop grand). Retourne une copie, que l'appelant peut modifier.
+        """
+        if self.maxsize <= 0 or len(plan) > self.max_plan_crafts:
+            self.misses += 1
+            return dict(compute(plan))
+        key = self.plan_key(plan)
+        entry_id = self._ids.get(key)
+        if entry_id is not None:
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return dict(self._entries[entry_id][1])
+        self.misses += 1
+        resources = compute(plan)
+        dependencies = self.closure(key, recipes)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._ids[key] = entry_id
+        self._entries[entry_id] = (key, resources, dependencies)
+        for name in dependencies:
+            self._dependents.setdefault(name, set()).add(entry_id)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+        return dict(resources)
+
+    def _discard(self, entry_id):
+        """Retire une entrée et ses liens de dépendance"""
+        key, _, dependencies = self._entries.pop(entry_id)
+        del self._ids[key]
+        for name in dependencies:
+            entry_ids = self._dependents.get(name)
+            if entry_ids is not None:
+                entry_ids.discard(entry_id)
+                if not entry_ids:
+                    del self._dependents[name]
+
+    def invalidate(self, names):
+        """Retire les plans qui dépendent d'un des crafts `names` ; retourne leur nombre"""
+        entry_ids = set()
+        for name in names:
+            entry_ids.update(self._dependents.get(name, ()))
+        for entry_id in entry_ids:
+            self._discard(entry_id)
+        return len(entry_ids)
+
+    def clear(self):
+        """Vide la mémoïsation (les compteurs sont conservés)"""
+        self._ids.clear()
+        self._entries.clear()
+        self._dependents.clear()
+
+    def stats(self):
+        """{'hits', 'misses', 'size', 'maxsize'}"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+class IngredientIndex:
+    """
+    Index inversé ingrédient -> crafts qui l'utilisent (miroir en mémoire de
+    CraftIngredient.ingredient_id), pour répondre à « utilisé dans » sans
+    parcourir toutes les recettes.
+    """
+
+    def __init__(self, recipes):
+        self.crafts = {}
+        for craft, recipe in recipes.items():
+            self.add_craft(craft, recipe)
+
+    def add_craft(self, craft, recipe):
+        """Indexe les ingrédients d'un craft"""
+        for ingredient in recipe:
+            self.crafts.setdefault(ingredient, set()).add(craft)
+
+    def remove_craft(self, craft, recipe):
+        """Retire un craft de l'index"""
+        for ingredient in recipe:
+            crafts = self.crafts.get(ingredient)
+            if crafts is not None:
+                crafts.discard(craft)
+                if not crafts:
+                    del self.crafts[ingredient]
+
+    def used_in(self, ingredient):
+        """Retourne la liste triée des crafts qui consomment un ingrédient"""
+        return sorted(self.crafts.get(ingredient, ()), key=str.lower)
+
+    def search(self, term):
+        """Retourne l'ensemble des crafts utilisant un ingrédient dont le nom contient `term`"""
+        term = fold(term)
+        found = set()
+        for ingredient, crafts in self.crafts.items():
+            if term in fold(ingredient):
+                found.update(crafts)
+        return found
+
+class CraftViews:
+    """
+    Vues dérivées de table_data pour l'interface, enregistrées dans le cache avec
+    les recettes : clé de recherche normalisée (fold) de chaque craft, ordre
+    d'affichage par (clé, id) comme Craft.sort_key, positions par catégorie et
+    favoris (un octet par position). Une page de la liste se lit ainsi sans
+    trier ni normaliser les noms.
+    """
+
+    def __init__(self, order=None, keys=None, ids=None, categories=None, buckets=None, favorites=None):
+        # Noms des crafts dans l'ordre d'affichage ; les autres listes sont alignées dessus
+        self.order = order or []
+        self.keys = keys or []
+        self.ids = ids or []
+        self.categories = categories or []
+        # Catégorie -> positions croissantes dans self.order
+        self.buckets = buckets or {}
+        self.favorites = bytearray(favorites or len(self.order))
+        self.rank = {name: position for position, name in enumerate(self.order)}
+
+    @classmethod
+    def build(cls, table_data, previous=None):
+        """Construit les vues de table_data ; les clés de `previous` sont reprises sans renormaliser"""
+        known = dict(zip(previous.order, previous.keys)) if previous is not None else {}
+        keys = {name: known.get(name) or fold(name) for name in table_data}
+        order = sorted(table_data, key=lambda name: (keys[name], table_data[name].get('id', 0)))
+        categories = [table_data[name].get('category') or "Général" for name in order]
+        buckets = {}
+        for position, category in enumerate(categories):
+            buckets.setdefault(category, []).append(position)
+        return cls(order, [keys[name] for name in order], [table_data[name].get('id', 0) for name in order],
+                   categories, buckets, bytearray(1 if table_data[name].get('favorite') else 0 for name in order))
+
+    def to_dict(self):
+        """Forme sérialisable pour le cache (favoris copiés : ils changent en place)"""
+        return {'order': self.order, 'keys': self.keys, 'ids': self.ids, 'categories': self.categories,
+                'buckets': self.buckets, 'favorites': bytes(self.favorites)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstruit les vues depuis le cache"""
+        return cls(data.get('order'), data.get('keys'), data.get('ids'), data.get('categories'),
+                   data.get('buckets'), data.get('favorites'))
+
+    def set_favorite(self, name, favorite):
+        """Met à jour le favori d'un craft"""
+        position = self.rank.get(name)
+        if position is not None:
+            self.favorites[position] = 1 if favorite else 0
+
+    def refresh_favorites(self, table_data):
+        """Relit tous les favoris depuis table_data (un craft absent n'est pas favori)"""
+        self.favorites = bytearray(1 if table_data.get(name, {}).get('favorite') else 0 for name in self.order)
+
+    def sort(self, names):
+        """Trie des noms dans l'ordre d'affichage (les noms inconnus sont ignorés)"""
+        return sorted((name for name in names if name in self.rank), key=self.rank.__getitem__)
+
+    def _start(self, after):
+        """Première position strictement après le curseur (clé, id)"""
+        key, craft_id = after
+        position = bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position] == key and self.ids[position] <= craft_id:
+            position += 1
+        return position
+
+    def _positions(self, start, category, favorites_only):
+        """Positions à partir de `start` de la catégorie, éventuellement limitées aux favoris"""
+        if category != "Tous":
+            positions = self.buckets.get(category, [])
+            for index in range(bisect_left(positions, start), len(positions)):
+                if not favorites_only or self.favorites[positions[index]]:
+                    yield positions[index]
+        elif favorites_only:
+            position = self.favorites.find(1, start)
+            while position != -1:
+                yield position
+                position = self.favorites.find(1, position + 1)
+        else:
+            yield from range(start, len(self.order))
+
+    def page(self, after=None, limit=DEFAULT_PAGE_SIZE, category="Tous", favorites_only=False, matches=None):
+        """
+        Page de noms après le curseur `after`, avec les mêmes résultats que la
+        requête de CraftEngine.page_crafts. `matches` restreint aux crafts trouvés
+        par une recherche. Retourne (noms, curseur suivant ou None à la fin).
+        """
+        start = 0 if after is None else self._start(after)
+        if matches is None:
+            positions = self._positions(start, category, favorites_only)
+        else:
+            # Recherche : seuls les crafts trouvés sont examinés, dans l'ordre d'affichage
+            positions = (position for position in sorted(self.rank[name] for name in matches if name in self.rank)
+                         if position >= start
+                         and (category == "Tous" or self.categories[position] == category)
+                         and (not favorites_only or self.favorites[position]))
+        selected = list(itertools.islice(positions, limit))
+        names = [self.order[position] for position in selected]
+        if len(selected) < limit or not selected:
+            return names, None
+        return names, (self.keys[selected[-1]], self.ids[selected[-1]])
+
+class Inventory:
+    """
+    Stock possédé {ingrédient: quantité} et nombre maximal de crafts réalisables
+    immédiatement. L'index inversé ingrédient -> crafts permet de ne réévaluer
+    que les crafts touchés par une modification du stock.
+    """
+
+    def __init__(self, recipes, ingredient_index, stock=None):
+        self.recipes = recipes
+        self.stock = {}
+        self.crafts_by_ingredient = ingredient_index.crafts
+        self.craftable = {craft: 0 for craft in recipes}
+        if stock:
+            self.update_stock(stock)
+
+    def max_craftable(self, craft):
+        """Nombre maximal d'exemplaires d'un craft réalisables avec le stock actuel"""
+        recipe = self.recipes.get(craft, {})
+        return min((self.stock.get(ingredient, 0) // qty for ingredient, qty in recipe.items() if qty > 0),
+                   default=0)
+
+    def update_stock(self, changes):
+        """
+        Applique des quantités possédées {ingrédient: nouvelle_quantité}.
+        Retourne {nom_craft: nombre_réalisable} pour les seuls crafts réévalués.
+        """
+        touched = set()
+        for ingredient, qty in changes.items():
+            if qty > 0:
+                self.stock[ingredient] = qty
+            else:
+                self.stock.pop(ingredient, None)
+            touched.update(self.crafts_by_ingredient.get(ingredient, ()))
+
+        updated = {}
+        for craft in touched:
+            self.craftable[craft] = updated[craft] = self.max_craftable(craft)
+        return updated
+
+    def set_stock(self, ingredient, qty):
+        """Modifie la quantité possédée d'un seul ingrédient"""
+        return self.update_stock({ingredient: qty})
+
+    def craftable_now(self):
+        """Retourne {nom_craft: nombre_réalisable} pour les crafts réalisables au moins une fois"""
+        return {craft: count for craft, count in self.craftable.items() if count > 0}
+
+    def shortfall(self, requirements):
+        """Retourne les quantités manquantes {ingrédient: manque} pour des besoins donnés"""
+        missing = {}
+        for ingredient, needed in requirements.items():
+            owned = self.stock.get(ingredient, 0)
+            if needed > owned:
+                missing[ingredient] = needed - owned
+        return missing
+
+    def plan_shortfall(self, plan, graph):
+        """
+        Matériaux manquants {ingrédient: manque} pour réaliser un plan {nom_craft: quantité},
+        avec la même vue du stock que max_craftable : un craft intermédiaire possédé
+        est utilisé tel quel, seule la part manquante est développée. Les besoins
+        descendent des produits vers les matériaux (ordre topologique inversé) ; un
+        ingrédient du même cycle n'est pas développé, comme dans RecipeResolver.
+        """
+        component = graph.component
+        needed = {}
+        # Stock restant : un exemplaire utilisé pour un craft ne sert pas une seconde fois
+        available = dict(self.stock)
+
+        def expand(craft, qty):
+            for ingredient, ingredient_qty in self.recipes[craft].items():
+                if ingredient in self.recipes and component.get(ingredient) == component.get(craft):
+                    # Même cycle : traité comme un matériau de base (hors du parcours ci-dessous)
+                    ingredient = (ingredient,)
+                needed[ingredient] = needed.get(ingredient, 0) + ingredient_qty * qty
+
+        for craft, qty in plan.items():
+            if qty > 0 and craft in self.recipes:
+                expand(craft, qty)
+        for craft in reversed(graph.order):
+            qty = needed.pop(craft, 0)
+            used = min(qty, available.get(craft, 0))
+            if used:
+                available[craft] -= used
+            if qty > used:
+                expand(craft, qty - used)
+        missing = {}
+        for ingredient, qty in needed.items():
+            name = ingredient[0] if isinstance(ingredient, tuple) else ingredient
+            missing[name] = missing.get(name, 0) + qty
+        for name, qty in list(missing.items()):
+            qty -= available.get(name, 0)
+            if qty > 0:
+                missing[name] = qty
+            else:
+                del missing[name]
+        return missing
+
+
+def load_craft_recipes_from_db(db_name=DB_NAME):
+    """
+    Charge les recettes depuis la base de données.
+
+    Retourne :
+        tuple: (recettes, table_data, variantes) où recettes = {nom_craft: {ingrédient: quantité}}
+        (recette principale), table_data = {nom_craft: {'quantity', 'favorite', 'category'}}
+        et variantes = {nom_craft: [recette, ...]} pour les crafts ayant plusieurs recettes.
+    """
+    recipes = {}
+    table_data = {}
+    variants = {}
+    try:
+        with get_storage(db_name).transaction() as cursor:
+            # Récupérer toutes les données de crafts en une seule requête
+            cursor.execute("SELECT id, name, category, favorite FROM Craft")
+            crafts = cursor.fetchall()
+            # Récupérer tous les ingrédients en une seule requête (sans liste IN,
+            # limitée à 32766 paramètres par SQLite)
+            links = cursor.execute("""
+                SELECT CraftIngredient.craft_id, CraftIngredient.variant, Ingredient.name, CraftIngredient.quantity
+                FROM CraftIngredient
+                JOIN Ingredient ON Ingredient.id = CraftIngredient.ingredient_id
+            """)
+            _collect_crafts(crafts, links, recipes, table_data, variants)
+    except sqlite3.Error as e:
+        print(f"Une erreur s'est produite : {e}", file=sys.stderr)
+        return {}, {}, {}
+
+    return recipes, table_data, variants
+
+def load_crafts_by_id(craft_ids, db_name=DB_NAME):
+    """
+    Charge uniquement les crafts dont l'id figure dans `craft_ids`, au même format que
+    load_craft_recipes_from_db. Les ids absents de la base (crafts supprimés) sont ignorés.
+    Les erreurs SQLite sont propagées à l'appelant.
+    """
+    recipes = {}
+    table_data = {}
+    variants = {}
+    ids = list(craft_ids)
+    with get_storage(db_name).transaction() as cursor:
+        for start in range(0, len(ids), ID_CHUNK_SIZE):
+            chunk = ids[start:start + ID_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            crafts = cursor.execute(f"SELECT id, name, category, favorite FROM Craft WHERE id IN ({placeholders})",
+                                    chunk).fetchall()
+            links = cursor.execute(f"""
+                SELECT CraftIngredient.craft_id, CraftIngredient.variant, Ingredient.name, CraftIngredient.quantity
+                FROM CraftIngredient
+                JOIN Ingredient ON Ingredient.id = CraftIngredient.ingredient_id
+                WHERE CraftIngredient.craft_id IN ({placeholders})
+            """, chunk)
+            _collect_crafts(crafts, links, recipes, table_data, variants)
+    return recipes, table_data, variants
+
+def _collect_crafts(crafts, links, recipes, table_data, variants):
+    """Remplit recettes, table_data et variantes à partir des lignes Craft et CraftIngredient"""
+    # Créer une correspondance entre craft_id et craft_name
+    craft_map = {}
+    for craft_id, craft_name, craft_category, is_favorite in crafts:
+        recipes[craft_name] = {}
+        table_data[craft_name] = {
+            'id': craft_id,
+            'quantity': 0,
+            'favorite': bool(is_favorite),
+            'category': craft_category if craft_category and craft_category in VALID_CATEGORIES else "Général"
+        }
+        craft_map[craft_id] = craft_name
+
+    variant_rows = {}
+    for craft_id, variant, ingredient_name, quantity in links:
+        craft_name = craft_map.get(craft_id)
+        if craft_name is None:
+            continue
+        variant_rows.setdefault(craft_name, {}).setdefault(variant, {})[ingredient_name] = quantity or 1
+    # La variante de plus petit numéro est la recette principale
+    for craft_name, by_variant in variant_rows.items():
+        ordered = [by_variant[variant] for variant in sorted(by_variant)]
+        recipes[craft_name] = ordered[0]
+        if len(ordered) > 1:
+            variants[craft_name] = ordered
+
+def get_revision(db_name=DB_NAME):
+    """Révision courante du journal des modifications (0 si aucune écriture journalisée)"""
+    return get_storage(db_name).query_one(
+        "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'), 0)")[0]
+
+def get_crafts_using_ingredient(ingredient_name, db_name=DB_NAME):
+    """Retourne les crafts qui consomment un ingrédient (requête sur idx_ingredient_id)"""
+    rows = get_storage(db_name).query_all("""
+        SELECT DISTINCT Craft.name
+        FROM Ingredient
+        JOIN CraftIngredient ON CraftIngredient.ingredient_id = Ingredient.id
+        JOIN Craft ON Craft.id = CraftIngredient.craft_id
+        WHERE Ingredient.name = ? AND CraftIngredient.variant = 0
+        ORDER BY Craft.name
+    """, (ingredient_name,))
+    return [row[0] for row in rows]
+
+# Instantané de la matrice en lecture seule, installé une fois par processus de travail
+_batch_matrix = None
+
+def _init_batch_worker(matrix):
+    """Installe l'instantané partagé dans le processus de travail"""
+    global _batch_matrix
+    _batch_matrix = matrix
+
+def _evaluate_chunk(plans):
+    """Évalue un paquet de plans avec l'instantané du processus de travail"""
+    return [_batch_matrix.total(plan) if plan is not None else None for plan in plans]
+
+def evaluate_plans(matrix, plans, workers=None, chunk_size=BATCH_CHUNK_SIZE,
+                   parallel_threshold=BATCH_PARALLEL_THRESHOLD):
+    """
+    Évalue un itérable de plans {nom_craft: quantité} et produit, dans le même ordre,
+    les totaux de ressources au fil de l'eau. Un plan None (ligne invalide) produit None.
+
+    Les `parallel_threshold` premiers plans sont évalués dans le processus courant,
+    chacun dès sa lecture. Les suivants sont répartis par paquets de `chunk_size`
+    sur un ProcessPoolExecutor : la matrice n'est transmise qu'une fois par
+    processus (initializer), jamais avec chaque tâche. Le nombre de paquets en vol
+    est borné pour garder une mémoire constante sur un flux de plans.
+    """
+    plans = iter(plans)
+    for plan in itertools.islice(plans, None if workers == 1 else parallel_threshold):
+        yield matrix.total(plan) if plan is not None else None
+    following = list(itertools.islice(plans, 1))
+    if not following:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    remaining = itertools.chain(following, plans)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(matrix,)) as executor:
+        pending = deque()
+        while True:
+            chunk = list(itertools.islice(remaining, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(_evaluate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+class CraftEngine:
+    """
+    Point d'entrée du moteur : charge les recettes, construit les index et
+    résout les plans. L'interface graphique n'en est qu'un client.
+    """
+
+    def __init__(self, db_name=DB_NAME, cache_file=CACHE_FILE, use_cache=True, profile=None,
+                 plan_memo_size=PLAN_MEMO_SIZE):
+        self.db_name = db_name
+        self.profile = profile
+        self.storage = get_storage(db_name, profile)
+        self.use_cache = use_cache
+        self.cache_manager = CraftCache(db_name, cache_file)
+        self.table_data = {}
+        self.craft_recipes = {}
+        self.craft_variants = {}
+        self.ingredient_index = None
+        self.inventory = None
+        # Graphe et vues : décodés de l'instantané au premier accès (voir les propriétés)
+        self._graph_loader = None
+        self._views_loader = None
+        self.graph = None
+        self.views = None
+        # (résolveur, matrice, totaux) construits au premier calcul de plan
+        self._resources = None
+        # Ressources des plans déjà calculés, conservées tant que leurs recettes ne changent pas
+        self.plan_memo = PlanMemo(plan_memo_size)
+        # Dernière révision du journal des modifications reflétée en mémoire
+        self.revision = 0
+        self.craft_names = {}
+        # Storage.change_counter() au dernier sync : inchangé, le journal n'est pas relu
+        self.change_counter = None
+
+    def load(self):
+        """
+        Charge les données de manière optimisée avec cache : le cache est repris tel
+        quel puis complété par les changements du journal postérieurs à sa révision.
+        """
+        # Prépare la base au premier chargement du processus (sans effet ensuite)
+        bootstrap(self.db_name, self.profile)
+
+        if self.use_cache:
+            recipes, table_data, variants, graph, views, revision = self.cache_manager.load_from_cache()
+            if recipes is not None and table_data is not None:
+                self.craft_recipes = recipes
+                self.table_data = table_data
+                self.craft_variants = variants
+                self.graph = self.views = None
+                self._graph_loader, self._views_loader = graph, views
+                self.revision = revision
+                self._index_craft_ids()
+                self.ingredient_index = IngredientIndex(self.craft_recipes)
+                changes = self._apply_changes()
+                if changes is None:
+                    # Journal incomplet : les données ont été rechargées depuis la base
+                    return "db"
+                touched, structural, patches = changes
+                if structural or graph is None:
+                    self.graph = CraftGraph.analyze(recipes)
+                if views is None and not structural:
+                    self.views = CraftViews.build(self.table_data)
+                self.build_resource_engine()
+                self._record_patches(patches)
+                return "cache"
+
+        self._load_from_db()
+        return "db"
+
+    def _load_from_db(self):
+        """Recharge toutes les données depuis la base en conservant les quantités du plan"""
+        quantities = {name: data['quantity'] for name, data in self.table_data.items() if data.get('quantity')}
+        # Révision lue avant les données : une écriture concurrente sera rejouée au prochain sync
+        self.change_counter = self.storage.change_counter()
+        self.revision = get_revision(self.db_name)
+        self.craft_recipes, self.table_data, self.craft_variants = load_craft_recipes_from_db(self.db_name)
+        # Changements inconnus : aucune entrée mémorisée n'est sûre
+        self.plan_memo.clear()
+        for name, qty in quantities.items():
+            if name in self.table_data:
+                self.table_data[name]['quantity'] = qty
+        self._index_craft_ids()
+        self.graph = CraftGraph.analyze(self.craft_recipes)
+        self.views = CraftViews.build(self.table_data, self.views)
+        self.ingredient_index = IngredientIndex(self.craft_recipes)
+        if self.use_cache:
+            self.save_cache()
+        self.build_resource_engine()
+
+    @property
+    def graph(self):
+        """Analyse du graphe des recettes (CraftGraph), décodée du cache au premier accès"""
+        if self._graph_loader is not None:
+            loader, self._graph_loader = self._graph_loader, None
+            self._graph = loader() or CraftGraph.analyze(self.craft_recipes)
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph_loader = None
+        self._graph = graph
+
+    @property
+    def views(self):
+        """Vues de l'interface (CraftViews), décodées du cache au premier accès ; None avant load()"""
+        if self._views_loader is not None:
+            loader, self._views_loader = self._views_loader, None
+            self._views = loader() or CraftViews.build(self.table_data)
+        return self._views
+
+    @views.setter
+    def views(self, views):
+        self._views_loader = None
+        self._views = views
+
+    def _index_craft_ids(self):
+        """Correspondance id -> nom, pour appliquer les lignes du journal"""
+        self.craft_names = {data['id']: name for name, data in self.table_data.items()}
+
+    def save_cache(self, wait=False):
+        """
+        Demande au thread d'écriture du cache un instantané de la révision courante,
+        qui purge ensuite ChangeLog jusqu'à cette révision (un autre processus en
+        retard rechargera tout au lieu de rejouer). Les données sont copiées : le
+        thread de l'interface peut continuer à les modifier. Des demandes
+        rapprochées sont regroupées en une seule écriture.
+        """
+        data = ({name: recipe for name, recipe in self.craft_recipes.items()},
+                {name: dict(entry) for name, entry in self.table_data.items()},
+                dict(self.craft_variants), self.graph, self.revision, self.views)
+        self.cache_manager.writer.submit(self._write_cache, *data)
+        if wait:
+            self.cache_manager.flush()
+
+    def close(self):
+        """Termine les écritures de cache en attente et arrête le thread d'écriture (à appeler avant de quitter)"""
+        self.cache_manager.writer.close()
+
+    def _write_cache(self, recipes, table_data, variants, graph, revision, views):
+        """Écrit l'instantané (remet à zéro le journal de correctifs) et purge ChangeLog"""
+        self.cache_manager.save_to_cache(recipes, table_data, variants, graph, revision, views)
+        with self.storage.transaction() as cursor:
+            cursor.execute("DELETE FROM ChangeLog WHERE revision <= ?", (revision,))
+
+    def _record_patches(self, patches):
+        """Ajoute les correctifs au cache disque (ou le réécrit s'il n'existe pas encore)"""
+        if not patches or not self.use_cache:
+            return
+        size = self.cache_manager.append_patches(self.revision, patches)
+        if self.cache_manager.writer.busy:
+            # Un instantané est déjà en cours d'écriture : les correctifs postérieurs sont conservés
+            return
+        if size is None or self.cache_manager.needs_compaction(size):
+            # Pas encore d'instantané, ou compaction : le journal est intégré à un nouvel instantané
+            self.save_cache()
+
+    def reload(self):
+        """Invalide le cache et recharge les données"""
+        self.cache_manager.invalidate_cache()
+        return self.load()
+
+    def sync(self):
+        """
+        Applique les changements du journal postérieurs à la révision chargée, sans
+        relire toute la base, et les ajoute au journal de correctifs du cache. À
+        appeler après chaque écriture (favori, ajout, modification, suppression).
+        Retourne le nombre de crafts rechargés, ou None si un rechargement complet
+        a été nécessaire.
+        """
+        changes = self._apply_changes()
+        if changes is None:
+            return None
+        touched, structural, patches = changes
+        if structural:
+            self.graph = CraftGraph.analyze(self.craft_recipes)
+            self.build_resource_engine()
+        self._record_patches(patches)
+        return touched
+
+    def _apply_changes(self):
+        """
+        Rejoue le journal sur les structures en mémoire (recettes, table, variantes,
+        index inversé). Retourne (crafts rechargés, recettes modifiées, correctifs du
+        cache), ou None après un rechargement complet : journal purgé au-delà de notre
+        révision, ou trop de crafts touchés pour qu'un rechargement partiel soit rentable.
+        """
+        counter = self.storage.change_counter()
+        if counter == self.change_counter:
+            return 0, False, []
+        # Résumé d'abord : un journal volumineux (import en masse) ne doit pas être lu ligne à ligne
+        first, last, count, structural = self.storage.query_one("""
+            SELECT MIN(revision), MAX(revision), COUNT(DISTINCT craft_id), SUM(operation != 'favorite')
+            FROM ChangeLog WHERE revision > ?
+        """, (self.revision,))
+        if first is None:
+            if get_revision(self.db_name) > self.revision:
+                self._load_from_db()
+                return None
+            self.change_counter = counter
+            return 0, False, []
+        if first != self.revision + 1 or count > len(self.table_data) * SYNC_FULL_RELOAD_RATIO:
+            self._load_from_db()
+            return None
+        touched = [row[0] for row in self.storage.query_all(
+            "SELECT DISTINCT craft_id FROM ChangeLog WHERE revision BETWEEN ? AND ?", (first, last))]
+
+        try:
+            recipes, table_data, variants = load_crafts_by_id(touched, self.db_name)
+        except sqlite3.Error as e:
+            print(f"Une erreur s'est produite : {e}", file=sys.stderr)
+            self._load_from_db()
+            return None
+
+        structural = bool(structural)
+        patches = []
+        if structural:
+            quantities = {}
+            # Anciens et nouveaux noms : un craft ajouté peut remplacer un ingrédient de base
+            self.plan_memo.invalidate(table_data)
+            for craft_id in touched:
+                name = self.craft_names.pop(craft_id, None)
+                if name is None:
+                    continue
+                self.plan_memo.invalidate([name])
+                quantities[craft_id] = self.table_data.pop(name, {}).get('quantity', 0)
+                self.ingredient_index.remove_craft(name, self.craft_recipes.pop(name, {}))
+                self.craft_variants.pop(name, None)
+                if name not in table_data:
+                    patches.append(['delete', name])
+            for name, data in table_data.items():
+                data['quantity'] = quantities.get(data['id'], 0)
+                self.table_data[name] = data
+                self.craft_recipes[name] = recipes[name]
+                if name in variants:
+                    self.craft_variants[name] = variants[name]
+                self.craft_names[data['id']] = name
+                self.ingredient_index.add_craft(name, recipes[name])
+                entry = {key: value for key, value in data.items() if key != 'quantity'}
+                patches.append(['craft', name, entry, recipes[name], variants.get(name)])
+            self.views = CraftViews.build(self.table_data, self.views)
+        else:
+            for name, data in table_data.items():
+                if name in self.table_data:
+                    self.table_data[name]['favorite'] = data['favorite']
+                    # Vues pas encore décodées : elles reliront les favoris de table_data
+                    if self._views_loader is None and self._views is not None:
+                        self._views.set_favorite(name, data['favorite'])
+                    patches.append(['favorite', name, data['favorite']])
+        self.revision = last
+        self.change_counter = counter
+        return len(touched), structural, patches
+
+    def build_resource_engine(self):
+        """
+        Prépare le moteur de ressources après un chargement ou un changement de
+        recettes : le résolveur et la matrice creuse sont construits une seule fois,
+        au premier calcul de plan (voir _resource_engine)
+        """
+        self._resources = None
+        self.variant_optimizer = VariantOptimizer(self.craft_recipes, self.craft_variants)
+        # Le stock saisi est conservé lors d'un rechargement des recettes
+        stock = self.inventory.stock if self.inventory is not None else None
+        self.inventory = Inventory(self.craft_recipes, self.ingredient_index, stock)
+
+    def _resource_engine(self):
+        """(résolveur, matrice, totaux courants), construits au premier appel après build_resource_engine"""
+        if self._resources is None:
+            resolver = RecipeResolver(self.craft_recipes, self.graph)
+            matrix = ResourceMatrix(resolver.base_vectors)
+            totals = RunningTotals(matrix)
+            for craft, data in self.table_data.items():
+                if data.get('quantity'):
+                    totals.set_quantity(craft, data['quantity'])
+            self._resources = resolver, matrix, totals
+        return self._resources
+
+    @property
+    def resolver(self):
+        """Résolveur des crafts jusqu'aux matériaux de base (RecipeResolver)"""
+        return self._resource_engine()[0]
+
+    @property
+    def resource_matrix(self):
+        """Matrice creuse crafts x matériaux de base (ResourceMatrix)"""
+        return self._resource_engine()[1]
+
+    @property
+    def running_totals(self):
+        """Totaux du plan courant (RunningTotals)"""
+        return self._resource_engine()[2]
+
+    def set_quantity(self, craft, qty):
+        """Modifie la quantité d'un craft du plan et retourne les ressources modifiées"""
+        # Totaux construits avant la mise à jour : le delta part de l'ancienne quantité
+        totals = self.running_totals
+        if craft in self.table_data:
+            self.table_data[craft]['quantity'] = qty
+        return totals.set_quantity(craft, qty)
+
+    def reset_quantities(self):
+        """Remet toutes les quantités du plan à zéro"""
+        for data in self.table_data.values():
+            data['quantity'] = 0
+        self.running_totals.reset()
+
+    def calculate_resources_needed(self):
+        """
+        Calcule les ressources nécessaires en fonction des quantités de chaque craft.
+        Les crafts intermédiaires sont développés jusqu'aux matériaux de base.
+        Retourne un dictionnaire {nom_ressource: quantité_totale}.
+        """
+        totals = self.running_totals
+        # Vecteur du plan déjà tenu à jour : un plan dense est calculé par multiply sans le reconstruire
+        return self.plan_memo.get(totals.plan, self.craft_recipes,
+                                  lambda plan: self.resource_matrix.total(plan, totals.quantities))
+
+    def resolve_plan(self, plan):
+        """
+        Retourne les matériaux de base d'un plan {nom_craft: quantité} sans toucher
+        au plan courant (mémorisés dans self.plan_memo)
+        """
+        return self.plan_memo.get(plan, self.craft_recipes, self.resource_matrix.total)
+
+    def evaluate_plans(self, plans, workers=None, chunk_size=BATCH_CHUNK_SIZE,
+                       parallel_threshold=BATCH_PARALLEL_THRESHOLD):
+        """Évalue un flux de plans, voir evaluate_plans"""
+        return evaluate_plans(self.resource_matrix, plans, workers, chunk_size, parallel_threshold)
+
+    def current_plan(self):
+        """Retourne le plan courant {nom_craft: quantité} (quantités strictement positives)"""
+        return {craft: data['quantity'] for craft, data in self.table_data.items() if data.get('quantity', 0) > 0}
+
+    def optimize_plan(self, plan=None, stock=None):
+        """
+        Choisit les variantes de recette pour un plan (le plan courant par défaut).
+        Retourne (choix, ressources), voir VariantOptimizer.solve.
+        """
+        return self.variant_optimizer.solve(self.current_plan() if plan is None else plan, stock)
+
+    def set_stock(self, ingredient, qty):
+        """Modifie le stock possédé d'un ingrédient et retourne les crafts réévalués"""
+        return self.inventory.set_stock(ingredient, qty)
+
+    def get_craftable_counts(self):
+        """Retourne {nom_craft: nombre_réalisable} avec le stock actuel"""
+        return self.inventory.craftable_now()
+
+    def get_plan_shortfall(self):
+        """
+        Retourne les ingrédients manquants pour le plan courant, les crafts
+        intermédiaires possédés étant utilisés avant d'être fabriqués
+        """
+        return self.inventory.plan_shortfall(self.running_totals.plan, self.graph)
+
+    def filter_crafts(self, search_term="", category="Tous", favorites_only=False, search_mode="Nom"):
+        """
+        Retourne l'ensemble des crafts visibles selon les filtres de la barre latérale :
+        recherche (par nom ou par ingrédient utilisé), catégorie et favoris.
+        Avec une recherche, seuls les crafts trouvés par l'index sont examinés.
+        """
+        if not search_term:
+            candidates = self.table_data.items()
+        else:
+            found = self._search_matches(search_term, search_mode)
+            candidates = ((item, self.table_data[item]) for item in found if item in self.table_data)
+        visible = set()
+        for item, data in candidates:
+            if ((category == "Tous" or data['category'] == category)
+                    and (not favorites_only or data.get('favorite', False))):
+                visible.add(item)
+        return visible
+
+    def _search_matches(self, search_term, search_mode):
+        """Crafts trouvés par une recherche par nom ou par ingrédient utilisé"""
+        if search_mode == "Ingrédient":
+            found = set()
+            for ingredient in self.search_ingredients(search_term):
+                found.update(self.ingredient_index.crafts.get(ingredient, ()))
+            return found
+        return self.search_crafts(search_term)
+
+    def sort_crafts(self, names=None):
+        """Noms triés dans l'ordre d'affichage (tous les crafts si `names` vaut None)"""
+        if self.views is None:
+            return sorted(self.table_data if names is None else names, key=fold)
+        return list(self.views.order) if names is None else self.views.sort(names)
+
+    def _full_text_search(self, search_table, source, term):
+        """
+        Noms de `source` contenant `term` (sans accents ni casse) via l'index FTS5.
+        Retourne None si le terme est trop court pour les trigrammes ou si l'index
+        n'existe pas (FTS5 indisponible) : l'appelant cherche alors en Python.
+        """
+        folded = fold(term)
+        if len(folded) < FTS_MIN_TERM_LENGTH:
+            return None
+        try:
+            rows = self.storage.query_all(f"""
+                SELECT {source}.name FROM {search_table}
+                JOIN {source} ON {source}.id = {search_table}.rowid
+                WHERE {search_table} MATCH ?
+            """, ('"' + folded.replace('"', '""') + '"',))
+        except sqlite3.OperationalError:
+            return None
+        return {name for (name,) in rows}
+
+    def search_crafts(self, term):
+        """Crafts dont le nom contient `term`, sans tenir compte des accents ni de la casse"""
+        found = self._full_text_search("CraftSearch", "Craft", term)
+        if found is None:
+            folded = fold(term)
+            if self.views is not None:
+                return {name for name, key in zip(self.views.order, self.views.keys) if folded in key}
+            return {name for name in self.table_data if folded in fold(name)}
+        return found & self.table_data.keys()
+
+    def search_ingredients(self, term):
+        """Ingrédients dont le nom contient `term`, sans tenir compte des accents ni de la casse"""
+        found = self._full_text_search("IngredientSearch", "Ingredient", term)
+        if found is None:
+            folded = fold(term)
+            return {name for name in self.ingredient_index.crafts if folded in fold(name)}
+        return found & self.ingredient_index.crafts.keys()
+
+    def page_crafts(self, after=None, limit=DEFAULT_PAGE_SIZE, category="Tous", favorites_only=False,
+                    search_term="", search_mode="Nom"):
+        """
+        Page de crafts triés par nom normalisé (Craft.sort_key), avec les mêmes
+        filtres que filter_crafts. Pagination par clé : `after` est le curseur
+        renvoyé par l'appel précédent (None pour la première page), la requête
+        reprend donc directement dans l'index sans OFFSET. Les pages sont lues
+        dans les vues en mémoire (CraftViews) une fois les données chargées.
+
+        Avant load(), la page est lue dans la base (Craft.sort_key et PAGE_INDEXES)
+        sans charger le catalogue : un script ou un outil qui n'affiche que les
+        premières pages d'une grande base évite ainsi le chargement complet. Les
+        deux chemins donnent les mêmes pages et des curseurs interchangeables.
+
+        Retourne :
+            tuple: (liste des noms, curseur de la page suivante ou None à la fin).
+        """
+        if self.views is not None:
+            matches = self._search_matches(search_term, search_mode) if search_term else None
+            return self.views.page(after, limit, category, favorites_only, matches)
+        try:
+            return self._query_page(after, limit, category, favorites_only, search_term, search_mode, True)
+        except sqlite3.OperationalError:
+            # Index plein texte absent (FTS5 indisponible) : LIKE sur les noms normalisés
+            return self._query_page(after, limit, category, favorites_only, search_term, search_mode, False)
+
+    def _query_page(self, after, limit, category, favorites_only, search_term, search_mode, use_fts):
+        """Construit et exécute la requête de page_crafts"""
+        conditions, params = [], []
+        if category != "Tous":
+            conditions.append("category = ?")
+            params.append(category)
+        if favorites_only:
+            conditions.append("favorite = 1")
+        if search_term:
+            folded = fold(search_term)
+            by_ingredient = search_mode == "Ingrédient"
+            if use_fts and len(folded) >= FTS_MIN_TERM_LENGTH:
+                table = "IngredientSearch" if by_ingredient else "CraftSearch"
+                matched = f"SELECT rowid FROM {table} WHERE {table} MATCH ?"
+                params.append('"' + folded.replace('"', '""') + '"')
+            else:
+                source, column = ("Ingredient", "fold(name)") if by_ingredient else ("Craft", "sort_key")
+                matched = f"SELECT id FROM {source} WHERE {column} LIKE ? ESCAPE '\\'"
+                params.append('%' + folded.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+            if by_ingredient:
+                # Ingrédients de la recette principale (variante la plus basse), comme IngredientIndex
+                conditions.append(f"""id IN (
+                    SELECT craft_id FROM CraftIngredient ci
+                    WHERE ingredient_id IN ({matched})
+                      AND variant = (SELECT MIN(variant) FROM CraftIngredient WHERE craft_id = ci.craft_id)
+                )""")
+            else:
+                conditions.append(f"id IN ({matched})")
+        if after is not None:
+            conditions.append("(sort_key, id) > (?, ?)")
+            params.extend(after)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        rows = self.storage.query_all(f"""
+            SELECT id, name, sort_key FROM Craft {where}
+            ORDER BY sort_key, id LIMIT ?
+        """, (*params, limit))
+        next_cursor = (rows[-1][2], rows[-1][0]) if len(rows) == limit else None
+        return [name for _, name, _ in rows], next_cursor
+
+    def get_crafts_using(self, ingredient):
+        """Retourne les crafts qui consomment un ingrédient (index en mémoire, sinon SQL)"""
+        if self.ingredient_index is not None:
+            return self.ingredient_index.used_in(ingredient)
+        return get_crafts_using_ingredient(ingredient, self.db_name)
+
+def parse_plan(text):
+    """
+    Convertit un plan texte « Porte=3,Bandage=10 » en dictionnaire {nom_craft: quantité}.
+    Une quantité absente vaut 1.
+    """
+    plan = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, qty = part.partition("=")
+        name = name.strip()
+        try:
+            quantity = int(qty) if qty.strip() else 1
+        except ValueError:
+            raise ValueError(f"Quantité invalide pour '{name}' : {qty.strip()}")
+        plan[name] = plan.get(name, 0) + quantity
+    return plan
+
+def read_plans(lines, errors=None):
+    """
+    Produit les plans d'un flux texte (un par ligne, lignes vides ignorées), dans
+    l'ordre et sans les mettre en attente. Une ligne invalide produit None : son
+    numéro et l'erreur sont signalés sur stderr (et le numéro ajouté à `errors`),
+    puis la lecture continue.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield parse_plan(line)
+        except ValueError as e:
+            print(f"Ligne {number} : {e}", file=sys.stderr)
+            if errors is not None:
+                errors.append(number)
+            yield None
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(prog="craft_engine", description="Moteur de planification des crafts")
+    parser.add_argument("--db", default=DB_NAME, help="Base de données SQLite (défaut : %(default)s)")
+    parser.add_argument("--cache", default=CACHE_FILE, help="Fichier de cache (défaut : %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignorer le cache et lire la base")
+    parser.add_argument("--profile", choices=list(PROFILES), default=None,
+                        help="Profil de réglage SQLite (défaut : $CRAFTS_DB_PROFILE ou balanced)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = subparsers.add_parser("plan", help="Calcule les matériaux de base d'un plan")
+    plan_parser.add_argument("plan", help='Plan sous la forme "Porte=3,Bandage=10"')
+    plan_parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    plan_parser.add_argument("--timing", action="store_true", help="Affiche les durées sur stderr")
+
+    subparsers.add_parser("check", help="Analyse le graphe des recettes et signale les cycles")
+
+    export_parser = subparsers.add_parser("export-cache", help="Exporte le cache binaire en JSON (débogage)")
+    export_parser.add_argument("output", help="Fichier JSON de sortie")
+
+    batch_parser = subparsers.add_parser("batch", help="Évalue un fichier de plans (un par ligne)",
+                                         description="Écrit une ligne JSON par plan, dans l'ordre ; une ligne "
+                                                     "invalide donne null et son numéro est signalé sur stderr")
+    batch_parser.add_argument("input", help="Fichier de plans, ou - pour l'entrée standard")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nb de CPU)")
+    batch_parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="Plans par tâche")
+    batch_parser.add_argument("--timing", action="store_true", help="Affiche les durées sur stderr")
+
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    engine = CraftEngine(args.db, args.cache, use_cache=not args.no_cache, profile=args.profile)
+    source = engine.load()
+    loaded = time.perf_counter()
+
+    if args.command == "plan":
+        try:
+            plan = parse_plan(args.plan)
+        except ValueError as e:
+            parser.error(str(e))
+        unknown = [craft for craft in plan if craft not in engine.craft_recipes]
+        for craft in unknown:
+            print(f"Craft inconnu : {craft}", file=sys.stderr)
+        totals = engine.resolve_plan(plan)
+        resolved = time.perf_counter()
+
+        if args.json:
+            print(json.dumps(totals, ensure_ascii=False, sort_keys=True))
+        else:
+            for resource in sorted(totals, key=str.lower):
+                print(f"{resource}\t{totals[resource]}")
+        if args.timing:
+            print(f"chargement ({source}) : {(loaded - start) * 1000:.1f} ms, "
+                  f"résolution : {(resolved - loaded) * 1000:.2f} ms", file=sys.stderr)
+        return 1 if unknown else 0
+
+    if args.command == "check":
+        graph = engine.graph
+        print(f"{len(graph.order)} crafts, profondeur maximale {graph.max_depth()}, {len(graph.cycles)} cycle(s)")
+        for cycle in graph.cycles:
+            edges = ", ".join(f"{craft} -> {ingredient}" for craft, ingredient in cycle['edges'])
+            print(f"  cycle ({len(cycle['crafts'])} crafts, profondeur {cycle['depth']}) : {edges}")
+        return 1 if graph.cycles else 0
+
+    if args.command == "export-cache":
+        if not engine.use_cache:
+            parser.error("export-cache est incompatible avec --no-cache")
+        engine.close()
+        return 0 if engine.cache_manager.export_json(args.output) else 1
+
+    if args.command == "batch":
+        try:
+            source_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        except OSError as e:
+            parser.error(str(e))
+        errors = []
+        try:
+            count = 0
+            for totals in engine.evaluate_plans(read_plans(source_file, errors), args.workers, args.chunk_size):
+                print(json.dumps(totals, ensure_ascii=False, sort_keys=True))
+                count += 1
+        finally:
+            if source_file is not sys.stdin:
+                source_file.close()
+        if args.timing:
+            elapsed = time.perf_counter() - loaded
+            print(f"chargement ({source}) : {(loaded - start) * 1000:.1f} ms, "
+                  f"{count} plans en {elapsed * 1000:.1f} ms", file=sys.stderr)
+        if errors:
+            print(f"{len(errors)} ligne(s) invalide(s) sur {count}", file=sys.stderr)
+            return 1
+        return 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
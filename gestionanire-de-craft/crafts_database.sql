@@ -1,8 +1,15 @@
+-- Schéma de référence des tables (celui de la version 6 du schéma). Ce script n'enregistre pas
+-- PRAGMA user_version : au premier lancement, init_db.App.migrate complète la base en partant
+-- de la version 0 (déclencheurs de ChangeLog et de SearchQueue, tables de recherche FTS5,
+-- identifiant de la base) et bootstrap la remplit si elle est vide.
+
 -- Création de la table Craft
 CREATE TABLE IF NOT EXISTS Craft (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL UNIQUE,  -- Empêche les doublons dans les crafts
-    favorite INTEGER DEFAULT 0 -- Indique si un craft est favori (0 par défaut)
+    name TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT 'Général', -- Catégorie affichée dans la barre latérale
+    favorite INTEGER DEFAULT 0, -- Indique si un craft est favori (0 par défaut)
+    sort_key TEXT -- fold(name) : nom sans accents ni majuscules, clé de tri de la liste
 );
 
 -- Création de la table Ingredient
@@ -16,12 +23,37 @@ CREATE TABLE IF NOT EXISTS CraftIngredient (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     craft_id INTEGER NOT NULL, -- Référence à la table Craft
     ingredient_id INTEGER NOT NULL, -- Référence à la table Ingredient
-    quantity INTEGER DEFAULT 1, -- Quantité d'ingrédient requise pour le craft
+    quantity INTEGER NOT NULL DEFAULT 1, -- Quantité d'ingrédient requise pour le craft
+    variant INTEGER NOT NULL DEFAULT 0, -- Numéro de la recette (0 = recette principale)
     FOREIGN KEY (craft_id) REFERENCES Craft(id),
-    FOREIGN KEY (ingredient_id) REFERENCES Ingredient(id),
-    UNIQUE(craft_id, ingredient_id) -- Empêche les doublons dans les associations
+    FOREIGN KEY (ingredient_id) REFERENCES Ingredient(id)
+);
+
+-- Journal des modifications : une ligne par écriture sur Craft ou CraftIngredient,
+-- rejouée par le moteur pour mettre à jour son cache sans tout recharger
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    revision INTEGER PRIMARY KEY AUTOINCREMENT,
+    craft_id INTEGER NOT NULL, -- Craft concerné
+    operation TEXT NOT NULL, -- insert, update, favorite, delete ou recipe
+    name TEXT -- Nom du craft avant l'opération
 );
 
+-- Informations sur la base : 'instance_id' (identifiant aléatoire tiré par la migration 6),
+-- qui entre avec le schéma dans l'empreinte contrôlée par le cache du moteur
+CREATE TABLE IF NOT EXISTS DatabaseInfo (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO DatabaseInfo (key, value) VALUES ('instance_id', lower(hex(randomblob(16))));
+
 -- Ajout d'index pour optimiser les recherches
-CREATE INDEX IF NOT EXISTS idx_craft_id ON CraftIngredient(craft_id);
-CREATE INDEX IF NOT EXISTS idx_ingredient_id ON CraftIngredient(ingredient_id);
\ No newline at end of file
+CREATE UNIQUE INDEX IF NOT EXISTS idx_craft_name ON Craft(name); -- Empêche les doublons dans les crafts
+CREATE INDEX IF NOT EXISTS idx_craft_category ON Craft(category);
+-- Empêche les doublons dans les associations ; sert aussi les recherches par craft_id
+CREATE UNIQUE INDEX IF NOT EXISTS idx_craft_ingredient ON CraftIngredient(craft_id, variant, ingredient_id);
+CREATE INDEX IF NOT EXISTS idx_ingredient_id ON CraftIngredient(ingredient_id);
+
+-- Pagination par clé de la liste des crafts (ordre sort_key, id)
+CREATE INDEX IF NOT EXISTS idx_craft_sort ON Craft(sort_key, id);
+CREATE INDEX IF NOT EXISTS idx_craft_category_sort ON Craft(category, sort_key, id);
+CREATE INDEX IF NOT EXISTS idx_craft_favorite_sort ON Craft(sort_key, id) WHERE favorite = 1;
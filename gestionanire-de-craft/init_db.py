@@ -1,63 +1,314 @@
 import sqlite3
+import sys
+import threading
 from sqlite3 import Error
 
+from storage import DB_NAME, fold, get_storage
+
+# Nombre de liaisons CraftIngredient insérées par executemany dans add_crafts_bulk
+BULK_CHUNK_SIZE = 50_000
+# Version du schéma atteinte par App.migrate (enregistrée dans PRAGMA user_version)
+SCHEMA_VERSION = 6
+
+# Index ajoutés par la migration 2 (nom -> requête de création)
+SCHEMA_INDEXES = {
+    'idx_craft_name': "CREATE UNIQUE INDEX IF NOT EXISTS idx_craft_name ON Craft(name)",
+    'idx_craft_category': "CREATE INDEX IF NOT EXISTS idx_craft_category ON Craft(category)",
+    'idx_craft_ingredient': """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_craft_ingredient
+        ON CraftIngredient(craft_id, variant, ingredient_id)
+    """,
+    'idx_ingredient_id': "CREATE INDEX IF NOT EXISTS idx_ingredient_id ON CraftIngredient(ingredient_id)",
+}
+
+# Tables de recherche plein texte (migration 3) : table FTS5 -> table indexée.
+# Chaque table FTS contient fold(name) avec rowid = id de la ligne source, écrit
+# par refresh_search_keys pour les lignes en attente dans SearchQueue (migration 3).
+SEARCH_TABLES = {'CraftSearch': 'Craft', 'IngredientSearch': 'Ingredient'}
+
+# Index de la pagination par clé (migration 4) : ordre fold(name), id
+PAGE_INDEXES = {
+    'idx_craft_sort': "CREATE INDEX IF NOT EXISTS idx_craft_sort ON Craft(sort_key, id)",
+    'idx_craft_category_sort': "CREATE INDEX IF NOT EXISTS idx_craft_category_sort ON Craft(category, sort_key, id)",
+    'idx_craft_favorite_sort': """
+        CREATE INDEX IF NOT EXISTS idx_craft_favorite_sort ON Craft(sort_key, id) WHERE favorite = 1
+    """,
+}
+
+# Bases déjà préparées par bootstrap dans ce processus
+_bootstrapped = set()
+_bootstrap_lock = threading.Lock()
+
 
 class App:
+    def __init__(self, db_name=DB_NAME, profile=None):
+        self.storage = get_storage(db_name, profile)
+
     def fn_init_db(self):
-        """Initialise la base de données et crée les tables si elles n'existent pas."""
+        """
+        Initialise la base de données : applique le profil de réglage SQLite
+        (voir storage.PROFILES) puis les migrations de schéma en attente.
+        """
         try:
-            sqliteConnection = sqlite3.connect('Crafts.db')
-            cursor = sqliteConnection.cursor()
+            self.storage.apply_profile()
+            self.migrate()
+            print("Base de données initialisée avec succès", file=sys.stderr)
 
-            # Création de la table Craft avec la colonne category
+        except Error as e:
+            print(f"Erreur lors de l'initialisation de la base de données: {e}", file=sys.stderr)
+
+    def _migrations(self):
+        """Liste ordonnée des migrations : (version atteinte, fonction(cursor))."""
+        return [
+            (1, self._create_schema),
+            (2, self._add_indexes),
+            (3, self._add_search_index),
+            (4, self._add_sort_key),
+            (5, self._add_change_log),
+            (6, self._add_database_info),
+        ]
+
+    def migrate(self):
+        """
+        Amène la base à SCHEMA_VERSION. Chaque migration s'exécute dans sa
+        propre transaction avec la mise à jour de PRAGMA user_version : une
+        migration qui échoue est annulée entièrement et la version reste inchangée.
+
+        Retourne :
+            int: Version du schéma après migration.
+        """
+        version = self.storage.query_one("PRAGMA user_version")[0]
+        for target, migration in self._migrations():
+            if target <= version:
+                continue
+            with self.storage.transaction() as cursor:
+                # BEGIN explicite : sqlite3 n'ouvre pas de transaction pour le DDL
+                cursor.execute("BEGIN IMMEDIATE")
+                # Relu sous verrou au cas où un autre processus aurait migré entre-temps
+                if cursor.execute("PRAGMA user_version").fetchone()[0] < target:
+                    migration(cursor)
+                    cursor.execute(f"PRAGMA user_version = {target}")
+            version = target
+            print(f"Migration du schéma vers la version {target} effectuée", file=sys.stderr)
+        return version
+
+    def _create_schema(self, cursor):
+        """Migration 1 : crée les tables et colonnes manquantes avec le curseur fourni."""
+        # Création de la table Craft avec la colonne category
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Craft (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                category TEXT NOT NULL DEFAULT 'Général',
+                favorite INTEGER DEFAULT 0
+            )
+        """)
+
+        # Vérification pour ajouter la colonne `category` si elle manque
+        cursor.execute("PRAGMA table_info(Craft)")
+        columns = [info[1] for info in cursor.fetchall()]
+        if 'category' not in columns:
+            cursor.execute("ALTER TABLE Craft ADD COLUMN category TEXT DEFAULT 'Général'")
+
+        # Création de la table Ingredient
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Ingredient (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+
+        # Création de la table CraftIngredient avec la colonne quantité
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS CraftIngredient (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                craft_id INTEGER NOT NULL,
+                ingredient_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 1,
+                variant INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (craft_id) REFERENCES Craft(id),
+                FOREIGN KEY (ingredient_id) REFERENCES Ingredient(id)
+            )
+        """)
+
+        # Vérification pour ajouter la colonne `variant` si elle manque
+        cursor.execute("PRAGMA table_info(CraftIngredient)")
+        columns = [info[1] for info in cursor.fetchall()]
+        if 'variant' not in columns:
+            cursor.execute("ALTER TABLE CraftIngredient ADD COLUMN variant INTEGER NOT NULL DEFAULT 0")
+
+        # Index pour la recherche inverse « utilisé dans »
+        cursor.execute(SCHEMA_INDEXES['idx_ingredient_id'])
+
+    def _add_indexes(self, cursor):
+        """
+        Migration 2 : supprime les doublons puis crée les index de SCHEMA_INDEXES
+        (noms de crafts uniques, liaisons uniques par variante, catégorie).
+        """
+        # Crafts de même nom : fusion dans le plus ancien, leurs recettes deviennent des variantes
+        duplicates = cursor.execute("""
+            SELECT name, GROUP_CONCAT(id) FROM Craft GROUP BY name HAVING COUNT(*) > 1
+        """).fetchall()
+        for craft_name, ids in duplicates:
+            keeper, *others = sorted(int(craft_id) for craft_id in ids.split(','))
+            next_variant = cursor.execute("""
+                SELECT COALESCE(MAX(variant), -1) + 1 FROM CraftIngredient WHERE craft_id = ?
+            """, (keeper,)).fetchone()[0]
+            for craft_id in others:
+                variants = cursor.execute("""
+                    SELECT DISTINCT variant FROM CraftIngredient WHERE craft_id = ? ORDER BY variant
+                """, (craft_id,)).fetchall()
+                for (variant,) in variants:
+                    cursor.execute("""
+                        UPDATE CraftIngredient SET craft_id = ?, variant = ?
+                        WHERE craft_id = ? AND variant = ?
+                    """, (keeper, next_variant, craft_id, variant))
+                    next_variant += 1
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS Craft (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    category TEXT NOT NULL DEFAULT 'Général',
-                    favorite INTEGER DEFAULT 0
-                )
-            """)
+                UPDATE Craft SET favorite = (SELECT MAX(favorite) FROM Craft WHERE name = ?) WHERE id = ?
+            """, (craft_name, keeper))
+            cursor.executemany("DELETE FROM Craft WHERE id = ?", [(craft_id,) for craft_id in others])
 
-            # Vérification pour ajouter la colonne `category` si elle manque
-            cursor.execute("PRAGMA table_info(Craft)")
-            columns = [info[1] for info in cursor.fetchall()]
-            if 'category' not in columns:
-                cursor.execute("ALTER TABLE Craft ADD COLUMN category TEXT DEFAULT 'Général'")
+        # Ingrédient répété dans une même recette : la dernière ligne l'emporte, comme au chargement
+        cursor.execute("""
+            DELETE FROM CraftIngredient WHERE id NOT IN (
+                SELECT MAX(id) FROM CraftIngredient GROUP BY craft_id, variant, ingredient_id
+            )
+        """)
 
-            # Création de la table Ingredient
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS Ingredient (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE
-                )
-            """)
+        for statement in SCHEMA_INDEXES.values():
+            cursor.execute(statement)
 
-            # Création de la table CraftIngredient avec la colonne quantité
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS CraftIngredient (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    craft_id INTEGER NOT NULL,
-                    ingredient_id INTEGER NOT NULL,
-                    quantity INTEGER NOT NULL DEFAULT 1,
-                    FOREIGN KEY (craft_id) REFERENCES Craft(id),
-                    FOREIGN KEY (ingredient_id) REFERENCES Ingredient(id)
-                )
+    def _add_search_index(self, cursor):
+        """
+        Migration 3 : index plein texte FTS5 (trigrammes) sur les noms de crafts
+        et d'ingrédients, sans accents ni majuscules. Les ajouts et renommages sont
+        placés par déclencheur dans la file SearchQueue, puis normalisés en Python
+        par refresh_search_keys : les déclencheurs n'appellent aucune fonction SQL
+        propre à l'application, et une autre connexion (sqlite3, outils externes)
+        peut donc écrire dans Craft et Ingredient. Les suppressions sont retirées
+        de l'index par déclencheur. Sans FTS5 seule la file est créée et la
+        recherche reste en Python.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS SearchQueue (
+                source TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                PRIMARY KEY (source, id)
+            ) WITHOUT ROWID
+        """)
+        for source in SEARCH_TABLES.values():
+            prefix = source.lower()
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS searchqueue_{prefix}_insert AFTER INSERT ON {source} BEGIN
+                    INSERT OR IGNORE INTO SearchQueue (source, id) VALUES ('{source}', new.id);
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS searchqueue_{prefix}_rename AFTER UPDATE OF name ON {source}
+                WHEN old.name IS NOT new.name BEGIN
+                    INSERT OR IGNORE INTO SearchQueue (source, id) VALUES ('{source}', new.id);
+                END
             """)
 
-            sqliteConnection.commit()
-            print("Base de données initialisée avec succès")
-
-        except Error as e:
-            print(f"Erreur lors de l'initialisation de la base de données: {e}")
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(name, tokenize='trigram')")
+            cursor.execute("DROP TABLE temp.fts_probe")
+        except Error:
+            print("FTS5 (trigram) indisponible : recherche plein texte désactivée", file=sys.stderr)
+            return
+
+        for search_table, source in SEARCH_TABLES.items():
+            prefix = search_table.lower()
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(name, tokenize='trigram')")
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {prefix}_delete AFTER DELETE ON {source} BEGIN
+                    DELETE FROM {search_table} WHERE rowid = old.id;
+                END
+            """)
+            cursor.execute(f"DELETE FROM {search_table}")
+            cursor.execute(f"INSERT INTO {search_table} (rowid, name) SELECT id, fold(name) FROM {source}")
 
-        finally:
-            if sqliteConnection:
-                sqliteConnection.close()
+    def _add_sort_key(self, cursor):
+        """
+        Migration 4 : colonne Craft.sort_key = fold(name) et index de PAGE_INDEXES
+        pour la pagination par clé. Les crafts ajoutés ou renommés ensuite passent
+        par SearchQueue (migration 3) : refresh_search_keys écrit leur clé.
+        """
+        cursor.execute("PRAGMA table_info(Craft)")
+        if 'sort_key' not in [info[1] for info in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE Craft ADD COLUMN sort_key TEXT")
+        cursor.execute("UPDATE Craft SET sort_key = fold(name)")
+        for statement in PAGE_INDEXES.values():
+            cursor.execute(statement)
+
+    def _add_change_log(self, cursor):
+        """
+        Migration 5 : journal des modifications (ChangeLog) alimenté par déclencheurs.
+        Chaque écriture sur Craft ou CraftIngredient ajoute une ligne (révision,
+        craft, opération) ; le moteur ne recharge ensuite que les crafts touchés
+        depuis la révision de son cache. Opérations :
+            insert / delete / update (nom ou catégorie) : name = nom avant l'opération
+            favorite : seul le favori a changé
+            recipe : une liaison CraftIngredient du craft a changé
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ChangeLog (
+                revision INTEGER PRIMARY KEY AUTOINCREMENT,
+                craft_id INTEGER NOT NULL,
+                operation TEXT NOT NULL,
+                name TEXT
+            )
+        """)
+        triggers = {
+            'changelog_craft_insert': """AFTER INSERT ON Craft BEGIN
+                INSERT INTO ChangeLog (craft_id, operation, name) VALUES (new.id, 'insert', new.name);
+            END""",
+            'changelog_craft_update': """AFTER UPDATE OF name, category ON Craft BEGIN
+                INSERT INTO ChangeLog (craft_id, operation, name) VALUES (new.id, 'update', old.name);
+            END""",
+            'changelog_craft_favorite': """AFTER UPDATE OF favorite ON Craft
+                WHEN old.favorite IS NOT new.favorite BEGIN
+                INSERT INTO ChangeLog (craft_id, operation, name) VALUES (new.id, 'favorite', old.name);
+            END""",
+            'changelog_craft_delete': """AFTER DELETE ON Craft BEGIN
+                INSERT INTO ChangeLog (craft_id, operation, name) VALUES (old.id, 'delete', old.name);
+            END""",
+            'changelog_recipe_insert': """AFTER INSERT ON CraftIngredient BEGIN
+                INSERT INTO ChangeLog (craft_id, operation) VALUES (new.craft_id, 'recipe');
+            END""",
+            'changelog_recipe_update': """AFTER UPDATE ON CraftIngredient BEGIN
+                INSERT INTO ChangeLog (craft_id, operation) VALUES (new.craft_id, 'recipe');
+                INSERT INTO ChangeLog (craft_id, operation)
+                    SELECT old.craft_id, 'recipe' WHERE old.craft_id <> new.craft_id;
+            END""",
+            'changelog_recipe_delete': """AFTER DELETE ON CraftIngredient BEGIN
+                INSERT INTO ChangeLog (craft_id, operation) VALUES (old.craft_id, 'recipe');
+            END""",
+        }
+        for name, body in triggers.items():
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    def _add_database_info(self, cursor):
+        """
+        Migration 6 : table DatabaseInfo (clé, valeur) avec un identifiant aléatoire
+        de la base, tiré une fois. Une copie du fichier garde l'identifiant ; deux
+        bases distinctes ne partagent donc jamais un même cache.
+        """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS DatabaseInfo (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO DatabaseInfo (key, value) VALUES ('instance_id', lower(hex(randomblob(16))))
+        """)
 
     def add_craft(self, craft_name, ingredients, category="Général"):
         """
         Ajoute un craft avec ses ingrédients, quantités et sa catégorie.
+        Si le craft existe déjà, la recette est enregistrée comme une nouvelle variante.
         
         Paramètres :
             - craft_name (str) : Nom du craft.
@@ -65,47 +316,134 @@ class App:
             - category (str) : Catégorie du craft.
         """
         try:
-            sqliteConnection = sqlite3.connect('Crafts.db')
-            cursor = sqliteConnection.cursor()
-
-            # Vérification pour éviter les doublons de crafts
-            cursor.execute("SELECT id FROM Craft WHERE name = ?", (craft_name,))
-            craft = cursor.fetchone()
-            if craft:
-                print(f"Le craft '{craft_name}' existe déjà.")
-                return
+            with self.storage.transaction() as cursor:
+                variant = self._insert_craft(cursor, craft_name, ingredients, category)
+                refresh_search_keys(cursor)
+            if variant:
+                print(f"Variante {variant} du craft '{craft_name}' ajoutée avec succès.", file=sys.stderr)
+            else:
+                print(f"Craft '{craft_name}' ajouté avec succès avec ses ingrédients et quantités.", file=sys.stderr)
 
+        except Error as e:
+            print(f"Erreur lors de l'ajout du craft: {e}", file=sys.stderr)
+
+    def _insert_craft(self, cursor, craft_name, ingredients, category):
+        """Insère un craft (ou une nouvelle variante) et retourne le numéro de variante."""
+        # Un craft existant reçoit une nouvelle variante de recette
+        cursor.execute("SELECT id FROM Craft WHERE name = ?", (craft_name,))
+        craft = cursor.fetchone()
+        if craft:
+            craft_id = craft[0]
+            cursor.execute("SELECT COALESCE(MAX(variant), -1) + 1 FROM CraftIngredient WHERE craft_id = ?",
+                           (craft_id,))
+            variant = cursor.fetchone()[0]
+        else:
             # Insertion du craft avec la catégorie
             cursor.execute("INSERT INTO Craft (name, category) VALUES (?, ?)", (craft_name, category))
             craft_id = cursor.lastrowid
+            variant = 0
+
+        # Traitement des ingrédients
+        for ingredient_name, quantity in ingredients:
+            if ingredient_name:
+                # Vérification pour éviter les doublons d'ingrédients
+                cursor.execute("SELECT id FROM Ingredient WHERE name = ?", (ingredient_name,))
+                ingredient = cursor.fetchone()
+                if ingredient:
+                    ingredient_id = ingredient[0]
+                else:
+                    cursor.execute("INSERT INTO Ingredient (name) VALUES (?)", (ingredient_name,))
+                    ingredient_id = cursor.lastrowid
+
+                # Insertion dans CraftIngredient avec la quantité
+                cursor.execute("""
+                    INSERT INTO CraftIngredient (craft_id, ingredient_id, quantity, variant)
+                    VALUES (?, ?, ?, ?)
+                """, (craft_id, ingredient_id, quantity, variant))
+        return variant
 
-            # Traitement des ingrédients
-            for ingredient_name, quantity in ingredients:
-                if ingredient_name:
-                    # Vérification pour éviter les doublons d'ingrédients
-                    cursor.execute("SELECT id FROM Ingredient WHERE name = ?", (ingredient_name,))
-                    ingredient = cursor.fetchone()
-                    if ingredient:
-                        ingredient_id = ingredient[0]
-                    else:
-                        cursor.execute("INSERT INTO Ingredient (name) VALUES (?)", (ingredient_name,))
-                        ingredient_id = cursor.lastrowid
-
-                    # Insertion dans CraftIngredient avec la quantité
-                    cursor.execute("""
-                        INSERT INTO CraftIngredient (craft_id, ingredient_id, quantity)
-                        VALUES (?, ?, ?)
-                    """, (craft_id, ingredient_id, quantity))
+    def add_crafts_bulk(self, crafts, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Ajoute un lot de crafts en une seule transaction.
+
+        Les identifiants des crafts et des ingrédients sont résolus en mémoire
+        (dictionnaires nom -> id chargés une fois) et les lignes sont insérées
+        par executemany, par paquets de `chunk_size` liaisons. Comme pour
+        add_craft, un nom déjà présent (en base ou plus tôt dans le lot) reçoit
+        une nouvelle variante de recette.
+
+        Paramètres :
+            - crafts (iterable) : Tuples (nom, catégorie, [(nom_ingredient, quantité), ...]).
+            - chunk_size (int) : Nombre de liaisons CraftIngredient par executemany.
 
-            sqliteConnection.commit()
-            print(f"Craft '{craft_name}' ajouté avec succès avec ses ingrédients et quantités.")
+        Retourne :
+            int: Nombre de recettes ajoutées (0 en cas d'erreur, la transaction est annulée).
+        """
+        added = 0
+        try:
+            with self.storage.transaction() as cursor:
+                craft_ids = dict(cursor.execute("SELECT name, id FROM Craft"))
+                ingredient_ids = dict(cursor.execute("SELECT name, id FROM Ingredient"))
+                next_variant = dict(cursor.execute(
+                    "SELECT craft_id, MAX(variant) + 1 FROM CraftIngredient GROUP BY craft_id"))
+                next_craft_id = self._next_id(cursor, "Craft")
+                next_ingredient_id = self._next_id(cursor, "Ingredient")
+
+                craft_rows, ingredient_rows, link_rows = [], [], []
+                for craft_name, category, ingredients in crafts:
+                    craft_id = craft_ids.get(craft_name)
+                    if craft_id is None:
+                        craft_id = craft_ids[craft_name] = next_craft_id
+                        next_craft_id += 1
+                        craft_rows.append((craft_id, craft_name, category))
+                    variant = next_variant.get(craft_id, 0)
+                    next_variant[craft_id] = variant + 1
+
+                    for ingredient_name, quantity in ingredients:
+                        if not ingredient_name:
+                            continue
+                        ingredient_id = ingredient_ids.get(ingredient_name)
+                        if ingredient_id is None:
+                            ingredient_id = ingredient_ids[ingredient_name] = next_ingredient_id
+                            next_ingredient_id += 1
+                            ingredient_rows.append((ingredient_id, ingredient_name))
+                        link_rows.append((craft_id, ingredient_id, quantity, variant))
+                    added += 1
+
+                    if len(link_rows) >= chunk_size:
+                        self._flush_bulk(cursor, craft_rows, ingredient_rows, link_rows)
+                self._flush_bulk(cursor, craft_rows, ingredient_rows, link_rows)
+                refresh_search_keys(cursor)
+            print(f"{added} recettes ajoutées en une transaction.", file=sys.stderr)
 
         except Error as e:
-            print(f"Erreur lors de l'ajout du craft: {e}")
+            print(f"Erreur lors de l'ajout des crafts: {e}", file=sys.stderr)
+            added = 0
+        return added
 
-        finally:
-            if sqliteConnection:
-                sqliteConnection.close()
+    def _next_id(self, cursor, table):
+        """
+        Premier id libre d'une table AUTOINCREMENT pour add_crafts_bulk : au-delà du
+        plus grand id présent et de sqlite_sequence, pour ne jamais réutiliser l'id
+        d'une ligne supprimée (ChangeLog et les caches l'associent encore à l'ancien
+        craft). Les insertions avec id explicite font ensuite avancer sqlite_sequence.
+        """
+        return cursor.execute(f"""
+            SELECT MAX(COALESCE((SELECT MAX(id) FROM {table}), 0),
+                       COALESCE((SELECT seq FROM sqlite_sequence WHERE name = ?), 0)) + 1
+        """, (table,)).fetchone()[0]
+
+    def _flush_bulk(self, cursor, craft_rows, ingredient_rows, link_rows):
+        """Insère les lignes accumulées par add_crafts_bulk puis vide les listes."""
+        cursor.executemany("INSERT INTO Craft (id, name, category) VALUES (?, ?, ?)", craft_rows)
+        cursor.executemany("INSERT INTO Ingredient (id, name) VALUES (?, ?)", ingredient_rows)
+        cursor.executemany("""
+            INSERT INTO CraftIngredient (craft_id, ingredient_id, quantity, variant)
+            VALUES (?, ?, ?, ?)
+        """, link_rows)
+        craft_rows.clear()
+        ingredient_rows.clear()
+        link_rows.clear()
 
     def load_craft_recipes(self):
         """
@@ -114,721 +452,408 @@ class App:
         Retourne :
             dict: Dictionnaire des recettes classées par catégorie.
         """
-        db_name = "Crafts.db"
         recipes = {}
         try:
-            with sqlite3.connect(db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT Craft.name, Craft.category, Ingredient.name, CraftIngredient.quantity
-                    FROM Craft
-                    JOIN CraftIngredient ON Craft.id = CraftIngredient.craft_id
-                    JOIN Ingredient ON Ingredient.id = CraftIngredient.ingredient_id
-                """)
-                crafts = cursor.fetchall()
-
-                for craft_name, category, ingredient_name, quantity in crafts:
-                    if category not in recipes:
-                        recipes[category] = {}
-                    if craft_name not in recipes[category]:
-                        recipes[category][craft_name] = {}
-                    recipes[category][craft_name][ingredient_name] = quantity
+            crafts = self.storage.query_all("""
+                SELECT Craft.name, Craft.category, Ingredient.name, CraftIngredient.quantity
+                FROM Craft
+                JOIN CraftIngredient ON Craft.id = CraftIngredient.craft_id
+                JOIN Ingredient ON Ingredient.id = CraftIngredient.ingredient_id
+                WHERE CraftIngredient.variant = 0
+            """)
+
+            for craft_name, category, ingredient_name, quantity in crafts:
+                if category not in recipes:
+                    recipes[category] = {}
+                if craft_name not in recipes[category]:
+                    recipes[category][craft_name] = {}
+                recipes[category][craft_name][ingredient_name] = quantity
 
         except sqlite3.Error as error:
-            print(f"Erreur lors du chargement des recettes: {error}")
+            print(f"Erreur lors du chargement des recettes: {error}", file=sys.stderr)
 
         return recipes
 
 
-def is_db_empty():
+def refresh_search_keys(cursor):
+    """
+    Écrit fold(name) dans Craft.sort_key et dans l'index plein texte pour les
+    crafts et ingrédients en attente dans SearchQueue (ajoutés ou renommés),
+    puis vide la file. À appeler
+    dans la transaction de chaque écriture de noms ; bootstrap rattrape au
+    lancement suivant les écritures faites par une autre connexion.
+
+    Retourne :
+        int: Nombre de lignes traitées.
+    """
+    pending = cursor.execute("SELECT COUNT(*) FROM SearchQueue").fetchone()[0]
+    if not pending:
+        return 0
+    tables = {name for (name,) in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for search_table, source in SEARCH_TABLES.items():
+        rows = [(row_id, fold(name)) for row_id, name in cursor.execute(f"""
+            SELECT {source}.id, {source}.name FROM SearchQueue
+            JOIN {source} ON {source}.id = SearchQueue.id
+            WHERE SearchQueue.source = ?
+        """, (source,)).fetchall()]
+        if source == 'Craft':
+            cursor.executemany("UPDATE Craft SET sort_key = ? WHERE id = ?", [(key, row_id) for row_id, key in rows])
+        if search_table in tables:
+            cursor.executemany(f"DELETE FROM {search_table} WHERE rowid = ?", [(row_id,) for row_id, _ in rows])
+            cursor.executemany(f"INSERT INTO {search_table} (rowid, name) VALUES (?, ?)", rows)
+    cursor.execute("DELETE FROM SearchQueue")
+    return pending
+
+def is_db_empty(db_name=DB_NAME):
     """Retourne True si la table Craft est vide (donc base jamais remplie)."""
     try:
-        conn = sqlite3.connect('Crafts.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM Craft")
-        count = cursor.fetchone()[0]
-        return count == 0
+        return get_storage(db_name).query_one("SELECT EXISTS (SELECT 1 FROM Craft)")[0] == 0
     except Exception:
         return True
-    finally:
-        conn.close()
-
-
-# Initialisation de l'application et de la base de données
-app = App()
-app.fn_init_db()
-
-# Ajout de crafts et de leurs ingrédients UNIQUEMENT si la base est vide
-if is_db_empty():
-    app.add_craft("Bandage",
-                  [("Tissu déchiré", 1), ("Eau", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Tissu déchiré",
-                  [("Chiffon sale", 1), ("Eau", 1)],
-                  category="Premiers Secours")
 
-    app.add_craft("Lanières de cuir",
-                  [("Lanières de cuir sales", 1), ("Eau", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Lanières de jean",
-                  [("Lanières de jean sales", 1), ("Eau", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Bandage stérilisé",
-                  [("Bouteille de désinfectant", 3), ("Casserole d'eau", 1), ("Bandage", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Chiffon stérilisé",
-                  [("Bouteille de désinfectant", 3), ("Casserole d'eau", 1), ("Tissu déchiré", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Attelle",
-                  [("Planche", 1), ("Tissu déchiré", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Attelle",
-                  [("Branche d'arbre", 1), ("Tissu déchiré", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Attelle",
-                  [("Bâton robuste", 1), ("Tissu déchiré", 1)],
-                  category="Premiers Secours")
-
-    app.add_craft("Cotons imbibés d'alcool",
-                  [("Bouteille de désinfectant", 1), ("Cotons", 1)],
-                  category="Premiers Secours")
 
+# Recettes insérées dans une base vide : (nom, catégorie, [(ingrédient, quantité), ...]).
+# Un même nom répété ajoute une variante de recette.
+SEED_CRAFTS = [
+    ("Bandage", "Premiers Secours", [("Tissu déchiré", 1), ("Eau", 1)]),
+    ("Tissu déchiré", "Premiers Secours", [("Chiffon sale", 1), ("Eau", 1)]),
+    ("Lanières de cuir", "Premiers Secours", [("Lanières de cuir sales", 1), ("Eau", 1)]),
+    ("Lanières de jean", "Premiers Secours", [("Lanières de jean sales", 1), ("Eau", 1)]),
+    ("Bandage stérilisé", "Premiers Secours",
+     [("Bouteille de désinfectant", 3), ("Casserole d'eau", 1), ("Bandage", 1)]),
+    ("Chiffon stérilisé", "Premiers Secours",
+     [("Bouteille de désinfectant", 3), ("Casserole d'eau", 1), ("Tissu déchiré", 1)]),
+    ("Attelle", "Premiers Secours", [("Planche", 1), ("Tissu déchiré", 1)]),
+    ("Attelle", "Premiers Secours", [("Branche d'arbre", 1), ("Tissu déchiré", 1)]),
+    ("Attelle", "Premiers Secours", [("Bâton robuste", 1), ("Tissu déchiré", 1)]),
+    ("Cotons imbibés d'alcool", "Premiers Secours", [("Bouteille de désinfectant", 1), ("Cotons", 1)]),
 
     # Catégorie Travail du Métal
-    app.add_craft("Tuyau en métal",
-                  [("Chalumeau", 2)],
-                  category="Travail du Métal")
-
-
-    #categorie agriculture 
-
-    app.add_craft("Paquet de graines de brocoli",
-                  [("Graines de brocoli", 50)],
-                  category="Agriculture")
-
-    app.add_craft("Graines de brocoli",
-                  [("Paquet de graines de brocoli", 1)],
-                  category="Agriculture")
-
-    app.add_craft("Paquet de graines de chou",
-                  [("Graines de chou", 50)],
-                  category="Agriculture")
-
-    app.add_craft("Graines de chou",
-                  [("Paquet de graines de chou", 1)],
-                  category="Agriculture")
-
-    app.add_craft("Paquet de graines de carotte",
-                  [("Graines de carotte", 50)],
-                  category="Agriculture")
-
-    app.add_craft("Graines de carotte",
-                  [("Paquet de graines de carotte", 1)],
-                  category="Agriculture")
-
-    app.add_craft("Paquet de graines de pomme de terre",
-                  [("Graines de pomme de terre", 50)],
-                  category="Agriculture")
+    ("Tuyau en métal", "Travail du Métal", [("Chalumeau", 2)]),
+
+    #categorie agriculture
+    ("Paquet de graines de brocoli", "Agriculture", [("Graines de brocoli", 50)]),
+    ("Graines de brocoli", "Agriculture", [("Paquet de graines de brocoli", 1)]),
+    ("Paquet de graines de chou", "Agriculture", [("Graines de chou", 50)]),
+    ("Graines de chou", "Agriculture", [("Paquet de graines de chou", 1)]),
+    ("Paquet de graines de carotte", "Agriculture", [("Graines de carotte", 50)]),
+    ("Graines de carotte", "Agriculture", [("Paquet de graines de carotte", 1)]),
+    ("Paquet de graines de pomme de terre", "Agriculture", [("Graines de pomme de terre", 50)]),
+    ("Graines de pomme de terre", "Agriculture", [("Paquet de graines de pomme de terre", 1)]),
+    ("Paquet de graines de radis", "Agriculture", [("Graines de radis", 50)]),
+    ("Graines de radis", "Agriculture", [("Paquet de graines de radis", 1)]),
+    ("Paquet de graines de fraise", "Agriculture", [("Graines de fraise", 50)]),
+    ("Graines de fraise", "Agriculture", [("Paquet de graines de fraise", 1)]),
+    ("Paquet de graines de tomate", "Agriculture", [("Graines de tomate", 50)]),
+    ("Graines de tomate", "Agriculture", [("Paquet de graines de tomate", 1)]),
 
-    app.add_craft("Graines de pomme de terre",
-                  [("Paquet de graines de pomme de terre", 1)],
-                  category="Agriculture")
-
-    app.add_craft("Paquet de graines de radis",
-                  [("Graines de radis", 50)],
-                  category="Agriculture")
-
-    app.add_craft("Graines de radis",
-                  [("Paquet de graines de radis", 1)],
-                  category="Agriculture")
-
-    app.add_craft("Paquet de graines de fraise",
-                  [("Graines de fraise", 50)],
-                  category="Agriculture")
-
-    app.add_craft("Graines de fraise",
-                  [("Paquet de graines de fraise", 1)],
-                  category="Agriculture")
-
-    app.add_craft("Paquet de graines de tomate",
-                  [("Graines de tomate", 50)],
-                  category="Agriculture")
-
-    app.add_craft("Graines de tomate",
-                  [("Paquet de graines de tomate", 1)],
-                  category="Agriculture")
     # Catégorie Trappeur
-    app.add_craft("Piège-cage",
-                  [("Fil de fer", 5)],
-                  category="Trappeur")
-
-    app.add_craft("Piège à lacet",
-                  [("Planche", 1), ("Corde", 2)],
-                  category="Trappeur")
-
-    app.add_craft("Piège à bâtons",
-                  [("Bâton robuste", 4), ("Corde", 2)],
-                  category="Trappeur")
-
-    app.add_craft("Piège boîte",
-                  [("Planche", 4), ("Clous", 7)],
-                  category="Trappeur")
-
-    app.add_craft("Piège caisse",
-                  [("Planche", 3), ("Clous", 5)],
-                  category="Trappeur")
-
+    ("Piège-cage", "Trappeur", [("Fil de fer", 5)]),
+    ("Piège à lacet", "Trappeur", [("Planche", 1), ("Corde", 2)]),
+    ("Piège à bâtons", "Trappeur", [("Bâton robuste", 4), ("Corde", 2)]),
+    ("Piège boîte", "Trappeur", [("Planche", 4), ("Clous", 7)]),
+    ("Piège caisse", "Trappeur", [("Planche", 3), ("Clous", 5)]),
 
     # Catégorie peche
-    app.add_craft("Canne à pêche",
-                  [("Bâton robuste", 1)],
-                  category="Pêche")
-
-    app.add_craft("Canne à pêche",
-                  [("Bâton robuste", 1), ("Fil de pêche", 1), ("Clou", 1)],
-                  category="Pêche")
-
-    app.add_craft("Filet de pêche",
-                  [("Ficelle", 10), ("Fil de fer", 5)],
-                  category="Pêche")
-
-    app.add_craft("Fil de fer",
-                  [("Filet de pêche cassé", 1)],
-                  category="Pêche")
-
+    ("Canne à pêche", "Pêche", [("Bâton robuste", 1)]),
+    ("Canne à pêche", "Pêche", [("Bâton robuste", 1), ("Fil de pêche", 1), ("Clou", 1)]),
+    ("Filet de pêche", "Pêche", [("Ficelle", 10), ("Fil de fer", 5)]),
+    ("Fil de fer", "Pêche", [("Filet de pêche cassé", 1)]),
 
     # Catégorie artisanat
-
-
-    app.add_craft(".223 Cartouche",
-                  [("Boîte de cartouches .223", 1)],
-                  category="Artisanat")
-
-    app.add_craft(".38 Cartouche Special",
-                  [("Boîte de cartouches .38 Special", 1)],
-                  category="Artisanat")
-
-    app.add_craft(".44 Cartouche Magnum",
-                  [("Boîte de cartouches .44 Magnum", 1)],
-                  category="Artisanat")
-
-    app.add_craft(".45 Cartouche Auto",
-                  [("Boîte de cartouches .45 Auto", 1)],
-                  category="Artisanat")
-
-    app.add_craft("5.56mm Cartouche",
-                  [("Boîte de cartouches 5.56mm", 1)],
-                  category="Artisanat")
+    (".223 Cartouche", "Artisanat", [("Boîte de cartouches .223", 1)]),
+    (".38 Cartouche Special", "Artisanat", [("Boîte de cartouches .38 Special", 1)]),
+    (".44 Cartouche Magnum", "Artisanat", [("Boîte de cartouches .44 Magnum", 1)]),
+    (".45 Cartouche Auto", "Artisanat", [("Boîte de cartouches .45 Auto", 1)]),
+    ("5.56mm Cartouche", "Artisanat", [("Boîte de cartouches 5.56mm", 1)]),
 
     # Outil requis : Scie ou Scie à métaux
-    app.add_craft("Bâton robuste",
-                  [("Planche", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches .223",
-                  [(".223 Cartouche", 40)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches .38 Special",
-                  [(".38 Cartouche Special", 30)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches .44 Magnum",
-                  [(".44 Cartouche Magnum", 12)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches .45 Auto",
-                  [(".45 Cartouche Auto", 30)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches 5.56mm",
-                  [("5.56mm Cartouche", 60)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches 9 mm",
-                  [("Munitions de 9 mm", 30)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de bocaux",
-                  [("Pot vide", 6)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de clous",
-                  [("Clous", 100)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de trombones",
-                  [("Trombone", 40)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de vis",
-                  [("Vis", 100)],
-                  category="Artisanat")
-
-    app.add_craft("Boîte de cartouches de fusil",
-                  [("Cartouches calibre 12", 24)],
-                  category="Artisanat")
+    ("Bâton robuste", "Artisanat", [("Planche", 1)]),
+    ("Boîte de cartouches .223", "Artisanat", [(".223 Cartouche", 40)]),
+    ("Boîte de cartouches .38 Special", "Artisanat", [(".38 Cartouche Special", 30)]),
+    ("Boîte de cartouches .44 Magnum", "Artisanat", [(".44 Cartouche Magnum", 12)]),
+    ("Boîte de cartouches .45 Auto", "Artisanat", [(".45 Cartouche Auto", 30)]),
+    ("Boîte de cartouches 5.56mm", "Artisanat", [("5.56mm Cartouche", 60)]),
+    ("Boîte de cartouches 9 mm", "Artisanat", [("Munitions de 9 mm", 30)]),
+    ("Boîte de bocaux", "Artisanat", [("Pot vide", 6)]),
+    ("Boîte de clous", "Artisanat", [("Clous", 100)]),
+    ("Boîte de trombones", "Artisanat", [("Trombone", 40)]),
+    ("Boîte de vis", "Artisanat", [("Vis", 100)]),
+    ("Boîte de cartouches de fusil", "Artisanat", [("Cartouches calibre 12", 24)]),
 
     # Deux recettes possibles
-    app.add_craft("Bougie",
-                  [("Briquet", 1), ("Bougie", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Bougie",
-                  [("Allumettes", 1), ("Bougie", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Cartouches calibre 12",
-                  [("Boîte de cartouches de fusil", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Vêtements propres",
-                  [("Vêtements", 1), ("Eau", 3), ("Savon", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Vêtements propres",
-                  [("Vêtements", 1), ("Eau", 3), ("Liquide nettoyant", 1)],
-                  category="Artisanat")
+    ("Bougie", "Artisanat", [("Briquet", 1), ("Bougie", 1)]),
+    ("Bougie", "Artisanat", [("Allumettes", 1), ("Bougie", 1)]),
+    ("Cartouches calibre 12", "Artisanat", [("Boîte de cartouches de fusil", 1)]),
+    ("Vêtements propres", "Artisanat", [("Vêtements", 1), ("Eau", 3), ("Savon", 1)]),
+    ("Vêtements propres", "Artisanat", [("Vêtements", 1), ("Eau", 3), ("Liquide nettoyant", 1)]),
 
     # Cocktail Molotov - option 1
-    app.add_craft("Cocktail Molotov",
-                  [("Tissu déchiré", 1), ("Bouteille de Bourbon", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Cocktail Molotov",
-                  [("Chiffon sale", 1), ("Bouteille de Bourbon", 1)],
-                  category="Artisanat")
+    ("Cocktail Molotov", "Artisanat", [("Tissu déchiré", 1), ("Bouteille de Bourbon", 1)]),
+    ("Cocktail Molotov", "Artisanat", [("Chiffon sale", 1), ("Bouteille de Bourbon", 1)]),
 
     # Cocktail Molotov - option 2
-    app.add_craft("Cocktail Molotov",
-                  [("Bouteille vide", 3), ("Tissu déchiré", 1), ("Bidon d’essence", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Cocktail Molotov",
-                  [("Bouteille vide", 3), ("Chiffon sale", 1), ("Bidon d’essence", 1)],
-                  category="Artisanat")
+    ("Cocktail Molotov", "Artisanat", [("Bouteille vide", 3), ("Tissu déchiré", 1), ("Bidon d’essence", 1)]),
+    ("Cocktail Molotov", "Artisanat", [("Bouteille vide", 3), ("Chiffon sale", 1), ("Bidon d’essence", 1)]),
 
     # Ingrédient alternatif Drap ou Vêtement (coton)
-    app.add_craft("Corde de draps",
-                  [("Drap", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Corde de draps",
-                  [("Vêtement (coton)", 1)],
-                  category="Artisanat")
+    ("Corde de draps", "Artisanat", [("Drap", 1)]),
+    ("Corde de draps", "Artisanat", [("Vêtement (coton)", 1)]),
 
     # Outil requis : Ciseaux
-    app.add_craft("Bande de jean",
-                  [("Vêtement (denim)", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Pot vide",
-                  [("Boîte de bocaux", 1)],
-                  category="Artisanat")
+    ("Bande de jean", "Artisanat", [("Vêtement (denim)", 1)]),
+    ("Pot vide", "Artisanat", [("Boîte de bocaux", 1)]),
 
     # Outil requis : Scie ou Scie à métaux
-    app.add_craft("Fusil à canon scié (JS-2000)",
-                  [("Fusil à pompe", 1)],
-                  category="Artisanat")
+    ("Fusil à canon scié (JS-2000)", "Artisanat", [("Fusil à pompe", 1)]),
 
     # Multi-ingrédients alternatifs
-    app.add_craft("Poudre à canon",
-                  [(".38 Cartouche Special", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [(".44 Cartouche Magnum", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [(".45 Cartouche Auto", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [("Munitions de 9 mm", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [("5.56mm Cartouche", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [(".308 Cartouche", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [(".223 Cartouche", 1)],
-                  category="Artisanat")
-    app.add_craft("Poudre à canon",
-                  [("Cartouches calibre 12", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Lampe torche manuelle",
-                  [("Lampe torche", 1), ("Pile", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Lampe de poche",
-                  [("Lampe de poche", 1), ("Pile", 1)],
-                  category="Artisanat")
+    ("Poudre à canon", "Artisanat", [(".38 Cartouche Special", 1)]),
+    ("Poudre à canon", "Artisanat", [(".44 Cartouche Magnum", 1)]),
+    ("Poudre à canon", "Artisanat", [(".45 Cartouche Auto", 1)]),
+    ("Poudre à canon", "Artisanat", [("Munitions de 9 mm", 1)]),
+    ("Poudre à canon", "Artisanat", [("5.56mm Cartouche", 1)]),
+    ("Poudre à canon", "Artisanat", [(".308 Cartouche", 1)]),
+    ("Poudre à canon", "Artisanat", [(".223 Cartouche", 1)]),
+    ("Poudre à canon", "Artisanat", [("Cartouches calibre 12", 1)]),
+    ("Lampe torche manuelle", "Artisanat", [("Lampe torche", 1), ("Pile", 1)]),
+    ("Lampe de poche", "Artisanat", [("Lampe de poche", 1), ("Pile", 1)]),
 
     # Outil requis : Ciseaux
-    app.add_craft("Bande de cuir",
-                  [("Vêtement (cuir)", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Munitions de 9 mm",
-                  [("Boîte de cartouches 9 mm", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Chapeau en journal",
-                  [("Journal", 1)],
-                  category="Artisanat")
+    ("Bande de cuir", "Artisanat", [("Vêtement (cuir)", 1)]),
+    ("Munitions de 9 mm", "Artisanat", [("Boîte de cartouches 9 mm", 1)]),
+    ("Chapeau en journal", "Artisanat", [("Journal", 1)]),
 
     # Outil requis : Tournevis ou Couteau
-    app.add_craft("Planche rainurée",
-                  [("Planche", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Planche rainurée",
-                  [("Bûche", 1)],
-                  category="Artisanat")
+    ("Planche rainurée", "Artisanat", [("Planche", 1)]),
+    ("Planche rainurée", "Artisanat", [("Bûche", 1)]),
 
     # Multi-ingrédients
-    app.add_craft("Pile",
-                  [("Lampe de poche", 1)],
-                  category="Artisanat")
-    app.add_craft("Pile",
-                  [("Lampe torche", 1)],
-                  category="Artisanat")
-    app.add_craft("Pile",
-                  [("Canard en plastique", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Canard en plastique",
-                  [("Canard en plastique", 1), ("Pile", 1)],
-                  category="Artisanat")
+    ("Pile", "Artisanat", [("Lampe de poche", 1)]),
+    ("Pile", "Artisanat", [("Lampe torche", 1)]),
+    ("Pile", "Artisanat", [("Canard en plastique", 1)]),
+    ("Canard en plastique", "Artisanat", [("Canard en plastique", 1), ("Pile", 1)]),
 
     # Outil requis : Scie ou Scie à métaux
-    app.add_craft("Fusil à double canon scié",
-                  [("Fusil à double canon", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Vis",
-                  [("Boîte de vis", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Bouteille brisée",
-                  [("Bouteille vide", 4)],
-                  category="Artisanat")
-
-    app.add_craft("Chapeau en aluminium",
-                  [("Papier aluminium", 1)],
-                  category="Artisanat")
+    ("Fusil à double canon scié", "Artisanat", [("Fusil à double canon", 1)]),
+    ("Vis", "Artisanat", [("Boîte de vis", 1)]),
+    ("Bouteille brisée", "Artisanat", [("Bouteille vide", 4)]),
+    ("Chapeau en aluminium", "Artisanat", [("Papier aluminium", 1)]),
 
     # XP : 0.25 en Couture
-    app.add_craft("Tissu déchiré",
-                  [("Drap", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Tissu déchiré",
-                  [("Vêtement (coton)", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Parapluie",
-                  [("Parapluie fermé", 1)],
-                  category="Artisanat")
-
-    app.add_craft("Parapluie fermé",
-                  [("Parapluie", 1)],
-                  category="Artisanat")
+    ("Tissu déchiré", "Artisanat", [("Drap", 1)]),
+    ("Tissu déchiré", "Artisanat", [("Vêtement (coton)", 1)]),
+    ("Parapluie", "Artisanat", [("Parapluie fermé", 1)]),
+    ("Parapluie fermé", "Artisanat", [("Parapluie", 1)]),
 
     # Catégorie Cuisine
-
-    app.add_craft("Bouteille vide (Bourbon)",
-                  [("Bouteille de Bourbon", 1)],
-                  category="Cuisine")
-
-    app.add_craft("Poêle à frire",
-                  [("Sauté", 1)],
-                  category="Cuisine")
-
-    app.add_craft("Gril",
-                  [("Sauté", 1)],
-                  category="Cuisine")
-
-    app.add_craft("Plat à rôtir",
-                  [("Légumes rôtis", 1)],
-                  category="Cuisine")
-
-    app.add_craft("Sucette",
-                  [("Paquet de bonbons", 1)],
-                  category="Cuisine")
-
-    app.add_craft("Œuf",
-                  [("Carton d'œufs", 1)],
-                  category="Cuisine")
-
-    app.add_craft("Carton d'œufs",
-                  [("Œuf", 12)],
-                  category="Cuisine")
-
-
-
-
-
-
+    ("Bouteille vide (Bourbon)", "Cuisine", [("Bouteille de Bourbon", 1)]),
+    ("Poêle à frire", "Cuisine", [("Sauté", 1)]),
+    ("Gril", "Cuisine", [("Sauté", 1)]),
+    ("Plat à rôtir", "Cuisine", [("Légumes rôtis", 1)]),
+    ("Sucette", "Cuisine", [("Paquet de bonbons", 1)]),
+    ("Œuf", "Cuisine", [("Carton d'œufs", 1)]),
+    ("Carton d'œufs", "Cuisine", [("Œuf", 12)]),
 
     # Catégorie Général
-    app.add_craft("Poudre à canon",
-                  [("Boîte de munitions 40 cal", 1), ("Munitions Rifle .308 loose", 1), ("Cartouches de fusil", 1)],
-                  category="Général")
-    app.add_craft("Lampe de poche", [("Lampe de poche", 1), ("Pile", 1)], category="Général")
-    app.add_craft("Pile", [("Lampe de poche", 1), ("Torche à main", 1), ("Canard en caoutchouc", 1)], category="Général")
-    app.add_craft("Bougie", [("Briquet", 1), ("Allumettes", 1), ("Bougie", 1)], category="Général")
-    app.add_craft("Tissu déchiré", [("Vêtements (coton)", 1), ("Drap", 1)], category="Général")
-    app.add_craft("Corde de draps", [("Drap", 1), ("Vêtements (coton)", 1)], category="Général")
-    app.add_craft("Cocktail Molotov", [("Tissu déchiré", 1), ("Tissu sale", 1), ("Bouteille de Bourbon", 1)],
-                  category="Général")
-    app.add_craft("Cocktail Molotov", [("Bouteille vide de whisky", 1), ("Bouteille vide de vin", 1),
-                                        ("Bouteille vide de vin 2", 1), ("Tissu déchiré", 1), ("Pétrole", 1)],
-                  category="Général")
-    app.add_craft("Munitions de fusil", [("Boîte de cartouches de fusil", 1)], category="Général")
-    app.add_craft("Clous", [("Boîte de clous", 1)], category="Général")
-    app.add_craft("Vis", [("Boîte de vis", 1)], category="Général")
-    app.add_craft("Trombones", [("Boîte de trombones", 1)], category="Général")
-    app.add_craft("Bocal", [("Boîte de bocaux", 1)], category="Général")
-    app.add_craft("Vêtements propres",
-                  [("Savon", 1), ("Liquide de nettoyage", 1), ("Gouttes d'eau", 3)],
-                  category="Général")
-    app.add_craft("Parapluie", [("Parapluie fermé", 1)], category="Général")
-    app.add_craft("Planches de bois", [("Planche", 1), ("Bûche", 1)], category="Général")
-    app.add_craft("Canard en caoutchouc", [("Canard en caoutchouc", 1), ("Pile", 1)], category="Général")
-    app.add_craft("Torche à main", [("Torche à main", 1), ("Pile", 1)], category="Général")
-    app.add_craft("Chapeau de journal", [("Journal", 1)], category="Général")
-    app.add_craft("Chapeau en aluminium", [("Aluminium", 1)], category="Général")
-    app.add_craft("Bâton robuste", [("Planche", 1)], category="Général")
-    app.add_craft("Fusil", [("Fusil à pompe", 1), ("Scie de jardin", 1)], category="Général")
-    app.add_craft("Fusil à canon scié", [("Fusil à canon scié", 1), ("Scie de jardin", 1)], category="Général")
-    app.add_craft("Bouteille brisée", [("Bouteille vide de vin", 1), ("Bouteille vide de whisky", 1),
-                                       ("Bouteille de bière", 1)], category="Général")
+    ("Poudre à canon", "Général",
+     [("Boîte de munitions 40 cal", 1), ("Munitions Rifle .308 loose", 1), ("Cartouches de fusil", 1)]),
+    ("Lampe de poche", "Général", [("Lampe de poche", 1), ("Pile", 1)]),
+    ("Pile", "Général", [("Lampe de poche", 1), ("Torche à main", 1), ("Canard en caoutchouc", 1)]),
+    ("Bougie", "Général", [("Briquet", 1), ("Allumettes", 1), ("Bougie", 1)]),
+    ("Tissu déchiré", "Général", [("Vêtements (coton)", 1), ("Drap", 1)]),
+    ("Corde de draps", "Général", [("Drap", 1), ("Vêtements (coton)", 1)]),
+    ("Cocktail Molotov", "Général", [("Tissu déchiré", 1), ("Tissu sale", 1), ("Bouteille de Bourbon", 1)]),
+    ("Cocktail Molotov", "Général",
+     [("Bouteille vide de whisky", 1), ("Bouteille vide de vin", 1), ("Bouteille vide de vin 2", 1),
+      ("Tissu déchiré", 1), ("Pétrole", 1)]),
+    ("Munitions de fusil", "Général", [("Boîte de cartouches de fusil", 1)]),
+    ("Clous", "Général", [("Boîte de clous", 1)]),
+    ("Vis", "Général", [("Boîte de vis", 1)]),
+    ("Trombones", "Général", [("Boîte de trombones", 1)]),
+    ("Bocal", "Général", [("Boîte de bocaux", 1)]),
+    ("Vêtements propres", "Général", [("Savon", 1), ("Liquide de nettoyage", 1), ("Gouttes d'eau", 3)]),
+    ("Parapluie", "Général", [("Parapluie fermé", 1)]),
+    ("Planches de bois", "Général", [("Planche", 1), ("Bûche", 1)]),
+    ("Canard en caoutchouc", "Général", [("Canard en caoutchouc", 1), ("Pile", 1)]),
+    ("Torche à main", "Général", [("Torche à main", 1), ("Pile", 1)]),
+    ("Chapeau de journal", "Général", [("Journal", 1)]),
+    ("Chapeau en aluminium", "Général", [("Aluminium", 1)]),
+    ("Bâton robuste", "Général", [("Planche", 1)]),
+    ("Fusil", "Général", [("Fusil à pompe", 1), ("Scie de jardin", 1)]),
+    ("Fusil à canon scié", "Général", [("Fusil à canon scié", 1), ("Scie de jardin", 1)]),
+    ("Bouteille brisée", "Général",
+     [("Bouteille vide de vin", 1), ("Bouteille vide de whisky", 1), ("Bouteille de bière", 1)]),
 
     # Catégorie Survie
-    app.add_craft("Feu de camp",
-                  [("Brindilles", 1), ("Drap", 1), ("Tissu déchiré", 1), ("Tissu sale", 1),
-                   ("Livre", 1), ("Magazine", 1), ("Journal", 1), ("Bûche", 2)],
-                  category="Survie")
-    app.add_craft("Feu de camp",
-                  [("Brindilles", 1), ("Drap", 1), ("Tissu déchiré", 1), ("Tissu sale", 1),
-                   ("Livre", 1), ("Magazine", 1), ("Journal", 1), ("Planche", 3)],
-                  category="Survie")
-    app.add_craft("Kit de tente",
-                  [("Toile", 1), ("Piquet de tente", 4), ("Bâton robuste", 2)],
-                  category="Survie")
-    app.add_craft("Kit de tente",
-                  [("Toile", 1), ("Piquet", 4), ("Bâton robuste", 2)],
-                  category="Survie")
-    app.add_craft("Piquet",
-                  [("Couteau en pierre", 1), ("Couteau de chasse", 1), ("Couteau de cuisine", 1),
-                   ("Couteau à viande", 1), ("Machette", 1), ("Branche", 1)],
-                  category="Survie")
-    app.add_craft("Couteau en pierre",
-                  [("Tissu déchiré", 1), ("Tissu sale", 1), ("Fil", 1), ("Branche", 1), ("Pierre aiguisée", 1)],
-                  category="Survie")
-    app.add_craft("Hache en pierre",
-                  [("Tissu déchiré", 1), ("Tissu sale", 1), ("Fil", 1), ("Branche", 1), ("Pierre aiguisée", 1)],
-                  category="Survie")
-    app.add_craft("Marteau en pierre",
-                  [("Tissu déchiré", 1), ("Tissu sale", 1), ("Fil", 1), ("Branche", 1), ("Pierre", 1)],
-                  category="Survie")
-    app.add_craft("Lance",
-                  [("Branche", 1), ("Planche", 1), ("Couteau de cuisine", 1),
-                   ("Machette", 1), ("Couteau à viande", 1), ("Couteau en pierre", 1)],
-                  category="Survie")
-    app.add_craft("Lance avec couteau à pain",
-                  [("Lance", 1), ("Couteau à pain", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec couteau à beurre",
-                  [("Lance", 1), ("Couteau à beurre", 1), ("Ruban adhésif", 1)],
-                  category="Survie")
-    app.add_craft("Lance avec fourchette",
-                  [("Lance", 1), ("Fourchette", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec ouvre-lettres",
-                  [("Lance", 1), ("Ouvre-lettres", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec scalpel",
-                  [("Lance", 1), ("Scalpel", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec cuillère",
-                  [("Lance", 1), ("Cuillère", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec ciseaux",
-                  [("Lance", 1), ("Ciseaux", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec fourche à main",
-                  [("Lance", 1), ("Fourche à main", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
-    app.add_craft("Lance avec tournevis",
-                  [("Lance", 1), ("Tournevis", 1), ("Ruban adhésif", 2)],
-                  category="Survie")
+    ("Feu de camp", "Survie",
+     [("Brindilles", 1), ("Drap", 1), ("Tissu déchiré", 1), ("Tissu sale", 1), ("Livre", 1), ("Magazine", 1),
+      ("Journal", 1), ("Bûche", 2)]),
+    ("Feu de camp", "Survie",
+     [("Brindilles", 1), ("Drap", 1), ("Tissu déchiré", 1), ("Tissu sale", 1), ("Livre", 1), ("Magazine", 1),
+      ("Journal", 1), ("Planche", 3)]),
+    ("Kit de tente", "Survie", [("Toile", 1), ("Piquet de tente", 4), ("Bâton robuste", 2)]),
+    ("Kit de tente", "Survie", [("Toile", 1), ("Piquet", 4), ("Bâton robuste", 2)]),
+    ("Piquet", "Survie",
+     [("Couteau en pierre", 1), ("Couteau de chasse", 1), ("Couteau de cuisine", 1), ("Couteau à viande", 1),
+      ("Machette", 1), ("Branche", 1)]),
+    ("Couteau en pierre", "Survie",
+     [("Tissu déchiré", 1), ("Tissu sale", 1), ("Fil", 1), ("Branche", 1), ("Pierre aiguisée", 1)]),
+    ("Hache en pierre", "Survie",
+     [("Tissu déchiré", 1), ("Tissu sale", 1), ("Fil", 1), ("Branche", 1), ("Pierre aiguisée", 1)]),
+    ("Marteau en pierre", "Survie",
+     [("Tissu déchiré", 1), ("Tissu sale", 1), ("Fil", 1), ("Branche", 1), ("Pierre", 1)]),
+    ("Lance", "Survie",
+     [("Branche", 1), ("Planche", 1), ("Couteau de cuisine", 1), ("Machette", 1), ("Couteau à viande", 1),
+      ("Couteau en pierre", 1)]),
+    ("Lance avec couteau à pain", "Survie", [("Lance", 1), ("Couteau à pain", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec couteau à beurre", "Survie", [("Lance", 1), ("Couteau à beurre", 1), ("Ruban adhésif", 1)]),
+    ("Lance avec fourchette", "Survie", [("Lance", 1), ("Fourchette", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec ouvre-lettres", "Survie", [("Lance", 1), ("Ouvre-lettres", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec scalpel", "Survie", [("Lance", 1), ("Scalpel", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec cuillère", "Survie", [("Lance", 1), ("Cuillère", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec ciseaux", "Survie", [("Lance", 1), ("Ciseaux", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec fourche à main", "Survie", [("Lance", 1), ("Fourche à main", 1), ("Ruban adhésif", 2)]),
+    ("Lance avec tournevis", "Survie", [("Lance", 1), ("Tournevis", 1), ("Ruban adhésif", 2)]),
 
     # Catégorie Menuiserie
-    app.add_craft("Planche", [("Bûche", 1)], category="Menuiserie")
-    app.add_craft("Mortier et pilon", [("Planche", 1)], category="Menuiserie")
-    app.add_craft("Seau de plâtre",
-                  [("Seau", 1), ("Eau", 5), ("Plâtre", 1)],
-                  category="Menuiserie")
-    app.add_craft("Tiroir",
-                  [("Planche", 1), ("Poignée de porte", 1), ("Clous", 1)],
-                  category="Menuiserie")
-    app.add_craft("Matelas",
-                  [("Bobine de fil", 2), ("Drap", 5), ("Coussin", 5)],
-                  category="Menuiserie")
-    app.add_craft("Pile de bûches", [("Corde", 2), ("Bûche", 2)], category="Menuiserie")
-    app.add_craft("Batte de baseball cloutée",
-                  [("Batte de baseball", 1), ("Clous", 5)],
-                  category="Menuiserie")
-    app.add_craft("Planche cloutée",
-                  [("Planche", 1), ("Clous", 5)],
-                  category="Menuiserie")
-    app.add_craft("Barricade en bois",
-                  [("Porte", 1), ("Fenêtre", 1), ("Planche", 1), ("Clous", 2)],
-                  category="Menuiserie")
-    app.add_craft("Pieu en bois", [("Planche", 1), ("Clous", 2)], category="Menuiserie")
-    app.add_craft("Barrière en bois", [("Fil barbelé", 1)], category="Menuiserie")
-    app.add_craft("Clôture en bois", [("Planche", 2), ("Clous", 3)], category="Menuiserie")
-    app.add_craft("Mur en sacs de sable", [("Sac de sable", 3)], category="Menuiserie")
-    app.add_craft("Mur en sacs de gravier", [("Sac de gravier", 3)], category="Menuiserie")
-    app.add_craft("Caisse en bois", [("Planche", 3), ("Clous", 3)], category="Menuiserie")
-    app.add_craft("Élément de bar", [("Planche", 4), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Angle de bar", [("Planche", 4), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Petite table", [("Planche", 5), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Grande table", [("Planche", 6), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Table avec tiroir", [("Planche", 5), ("Clous", 4), ("Tiroir", 1)], category="Menuiserie")
-    app.add_craft("Chaise en bois", [("Planche", 5), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Collecteur d'eau de pluie",
-                  [("Planche", 4), ("Clous", 4), ("Sac poubelle", 4)],
-                  category="Menuiserie")
-    app.add_craft("Composteur", [("Planche", 5), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Bibliothèque", [("Planche", 5), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Petite bibliothèque", [("Planche", 3), ("Clous", 3)], category="Menuiserie")
-    app.add_craft("Étagères", [("Planche", 1), ("Clous", 2)], category="Menuiserie")
-    app.add_craft("Double étagères", [("Planche", 2), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Lit", [("Planche", 6), ("Clous", 4), ("Matelas", 1)], category="Menuiserie")
-    app.add_craft("Cairn", [("Pierre", 6)], category="Menuiserie")
-    app.add_craft("Lampe sur pilier",
-                  [("Planche", 2), ("Clous", 4), ("Corde", 1), ("Lampe de poche", 1)],
-                  category="Menuiserie")
-    app.add_craft("Croix en bois", [("Planche", 2), ("Clous", 2)], category="Menuiserie")
-    app.add_craft("Piquet en bois", [("Planche", 1), ("Corde de drap", 1)], category="Menuiserie")
-    app.add_craft("Panneau en bois", [("Planche", 3), ("Clous", 3)], category="Menuiserie")
-    app.add_craft("Cadre en bois", [("Planche", 2), ("Clous", 2)], category="Menuiserie")
-    app.add_craft("Mur en bois", [("Planche", 2), ("Clous", 2)], category="Menuiserie")
-    app.add_craft("Fenêtre en bois", [("Planche", 2), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Châssis de porte en bois", [("Planche", 4), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Pilier en bois", [("Planche", 4), ("Clous", 4)], category="Menuiserie")
-    app.add_craft("Mur en rondins",
-                  [("Tissu déchiré", 4), ("Corde", 4), ("Rope", 2), ("Bûche", 4)],
-                  category="Menuiserie")
-    app.add_craft("Porte en bois",
-                  [("Planche", 4), ("Clous", 4), ("Charnière", 2), ("Poignée de porte", 1)],
-                  category="Menuiserie")
-    app.add_craft("Porte double en bois",
-                  [("Planche", 12), ("Clous", 12), ("Charnière", 4), ("Poignée de porte", 2)],
-                  category="Menuiserie")
-    app.add_craft("Escaliers", [("Planche", 15), ("Clous", 15)], category="Menuiserie")
-    app.add_craft("Plancher en bois", [("Planche", 1), ("Clous", 1)], category="Menuiserie")
+    ("Planche", "Menuiserie", [("Bûche", 1)]),
+    ("Mortier et pilon", "Menuiserie", [("Planche", 1)]),
+    ("Seau de plâtre", "Menuiserie", [("Seau", 1), ("Eau", 5), ("Plâtre", 1)]),
+    ("Tiroir", "Menuiserie", [("Planche", 1), ("Poignée de porte", 1), ("Clous", 1)]),
+    ("Matelas", "Menuiserie", [("Bobine de fil", 2), ("Drap", 5), ("Coussin", 5)]),
+    ("Pile de bûches", "Menuiserie", [("Corde", 2), ("Bûche", 2)]),
+    ("Batte de baseball cloutée", "Menuiserie", [("Batte de baseball", 1), ("Clous", 5)]),
+    ("Planche cloutée", "Menuiserie", [("Planche", 1), ("Clous", 5)]),
+    ("Barricade en bois", "Menuiserie", [("Porte", 1), ("Fenêtre", 1), ("Planche", 1), ("Clous", 2)]),
+    ("Pieu en bois", "Menuiserie", [("Planche", 1), ("Clous", 2)]),
+    ("Barrière en bois", "Menuiserie", [("Fil barbelé", 1)]),
+    ("Clôture en bois", "Menuiserie", [("Planche", 2), ("Clous", 3)]),
+    ("Mur en sacs de sable", "Menuiserie", [("Sac de sable", 3)]),
+    ("Mur en sacs de gravier", "Menuiserie", [("Sac de gravier", 3)]),
+    ("Caisse en bois", "Menuiserie", [("Planche", 3), ("Clous", 3)]),
+    ("Élément de bar", "Menuiserie", [("Planche", 4), ("Clous", 4)]),
+    ("Angle de bar", "Menuiserie", [("Planche", 4), ("Clous", 4)]),
+    ("Petite table", "Menuiserie", [("Planche", 5), ("Clous", 4)]),
+    ("Grande table", "Menuiserie", [("Planche", 6), ("Clous", 4)]),
+    ("Table avec tiroir", "Menuiserie", [("Planche", 5), ("Clous", 4), ("Tiroir", 1)]),
+    ("Chaise en bois", "Menuiserie", [("Planche", 5), ("Clous", 4)]),
+    ("Collecteur d'eau de pluie", "Menuiserie", [("Planche", 4), ("Clous", 4), ("Sac poubelle", 4)]),
+    ("Composteur", "Menuiserie", [("Planche", 5), ("Clous", 4)]),
+    ("Bibliothèque", "Menuiserie", [("Planche", 5), ("Clous", 4)]),
+    ("Petite bibliothèque", "Menuiserie", [("Planche", 3), ("Clous", 3)]),
+    ("Étagères", "Menuiserie", [("Planche", 1), ("Clous", 2)]),
+    ("Double étagères", "Menuiserie", [("Planche", 2), ("Clous", 4)]),
+    ("Lit", "Menuiserie", [("Planche", 6), ("Clous", 4), ("Matelas", 1)]),
+    ("Cairn", "Menuiserie", [("Pierre", 6)]),
+    ("Lampe sur pilier", "Menuiserie", [("Planche", 2), ("Clous", 4), ("Corde", 1), ("Lampe de poche", 1)]),
+    ("Croix en bois", "Menuiserie", [("Planche", 2), ("Clous", 2)]),
+    ("Piquet en bois", "Menuiserie", [("Planche", 1), ("Corde de drap", 1)]),
+    ("Panneau en bois", "Menuiserie", [("Planche", 3), ("Clous", 3)]),
+    ("Cadre en bois", "Menuiserie", [("Planche", 2), ("Clous", 2)]),
+    ("Mur en bois", "Menuiserie", [("Planche", 2), ("Clous", 2)]),
+    ("Fenêtre en bois", "Menuiserie", [("Planche", 2), ("Clous", 4)]),
+    ("Châssis de porte en bois", "Menuiserie", [("Planche", 4), ("Clous", 4)]),
+    ("Pilier en bois", "Menuiserie", [("Planche", 4), ("Clous", 4)]),
+    ("Mur en rondins", "Menuiserie", [("Tissu déchiré", 4), ("Corde", 4), ("Rope", 2), ("Bûche", 4)]),
+    ("Porte en bois", "Menuiserie",
+     [("Planche", 4), ("Clous", 4), ("Charnière", 2), ("Poignée de porte", 1)]),
+    ("Porte double en bois", "Menuiserie",
+     [("Planche", 12), ("Clous", 12), ("Charnière", 4), ("Poignée de porte", 2)]),
+    ("Escaliers", "Menuiserie", [("Planche", 15), ("Clous", 15)]),
+    ("Plancher en bois", "Menuiserie", [("Planche", 1), ("Clous", 1)]),
 
     # Catégorie Électrique
-    app.add_craft("Composant électronique",
-                  [("Téléphone sans fil", 1), ("Montre numérique", 1), ("Écouteurs", 1),
-                   ("Lampe de poche", 1), ("Torche à main", 1), ("Casque", 1), ("Jeu vidéo", 1)],
-                  category="Électrique")
-    app.add_craft("Composant électronique", [("Lecteur CD", 1)], category="Électrique")
-    app.add_craft("Capteur de mouvement", [("Alarme maison", 1)], category="Électrique")
-    app.add_craft("Amplificateur", [("Haut-parleur", 1)], category="Électrique")
-    app.add_craft("Récepteur", [("Télécommande TV", 1)], category="Électrique")
-    app.add_craft("Composant électronique",
-                  [("Radio ValuTech", 1), ("Radio Premium Technologies", 1)],
-                  category="Électrique")
-    app.add_craft("Composant électronique",
-                  [("Télévision antique", 1), ("Télévision ValuTech", 1), ("Télévision Premium Technologies", 1)],
-                  category="Électrique")
-    app.add_craft("Composant électronique",
-                  [("Radio ham Premium Technologies", 1), ("Radio ham US Army", 1)],
-                  category="Électrique")
-    app.add_craft("Déclencheur",
-                  [("Récepteur radio", 1), ("Récepteur", 1), ("Composant électronique", 2),
-                   ("Colle", 2), ("Magazine électronique Vol. 4", 1)],
-                  category="Électrique")
-    app.add_craft("Minuterie",
-                  [("Réveil", 1), ("Minuterie", 1), ("Composant électronique", 1),
-                   ("Colle", 1), ("Magazine électronique Vol. 2", 1)],
-                  category="Électrique")
-    app.add_craft("Télécommande V1",
-                  [("Télécommande TV", 1), ("Composant électronique", 2),
-                   ("Colle", 2), ("Magazine électronique Vol. 1", 1)],
-                  category="Électrique")
-    app.add_craft("Télécommande V2",
-                  [("Télécommande TV", 1), ("Composant électronique", 3),
-                   ("Colle", 2), ("Magazine électronique Vol. 1", 1)],
-                  category="Électrique")
-    app.add_craft("Télécommande V3",
-                  [("Télécommande TV", 1), ("Composant électronique", 4),
-                   ("Colle", 2), ("Magazine électronique Vol. 1", 1)],
-                  category="Électrique")
-    app.add_craft("Radio de fortune",
-                  [("Composant électronique", 2), ("Amplificateur", 1),
-                   ("Ampoule", 1), ("Récepteur radio", 1), ("Fil électrique", 1),
-                   ("Aluminium", 2), ("Magazine électronique Vol. 1", 1)],
-                  category="Électrique")
-    app.add_craft("Talkie-walkie de fortune",
-                  [("Composant électronique", 3), ("Amplificateur", 1),
-                   ("Ampoule", 1), ("Ampoule verte", 1), ("Transmetteur radio", 1),
-                   ("Fil électrique", 2), ("Aluminium", 3), ("Magazine électronique Vol. 2", 1)],
-                  category="Électrique")
-    app.add_craft("Radio de fortune",
-                  [("Composant électronique", 4), ("Amplificateur", 1),
-                   ("Ampoule", 1), ("Ampoule verte", 1), ("Transmetteur radio", 1),
-                   ("Fil électrique", 3), ("Aluminium", 4), ("Magazine mécanique", 1)],
-                  category="Électrique")
+    ("Composant électronique", "Électrique",
+     [("Téléphone sans fil", 1), ("Montre numérique", 1), ("Écouteurs", 1), ("Lampe de poche", 1),
+      ("Torche à main", 1), ("Casque", 1), ("Jeu vidéo", 1)]),
+    ("Composant électronique", "Électrique", [("Lecteur CD", 1)]),
+    ("Capteur de mouvement", "Électrique", [("Alarme maison", 1)]),
+    ("Amplificateur", "Électrique", [("Haut-parleur", 1)]),
+    ("Récepteur", "Électrique", [("Télécommande TV", 1)]),
+    ("Composant électronique", "Électrique", [("Radio ValuTech", 1), ("Radio Premium Technologies", 1)]),
+    ("Composant électronique", "Électrique",
+     [("Télévision antique", 1), ("Télévision ValuTech", 1), ("Télévision Premium Technologies", 1)]),
+    ("Composant électronique", "Électrique",
+     [("Radio ham Premium Technologies", 1), ("Radio ham US Army", 1)]),
+    ("Déclencheur", "Électrique",
+     [("Récepteur radio", 1), ("Récepteur", 1), ("Composant électronique", 2), ("Colle", 2),
+      ("Magazine électronique Vol. 4", 1)]),
+    ("Minuterie", "Électrique",
+     [("Réveil", 1), ("Minuterie", 1), ("Composant électronique", 1), ("Colle", 1),
+      ("Magazine électronique Vol. 2", 1)]),
+    ("Télécommande V1", "Électrique",
+     [("Télécommande TV", 1), ("Composant électronique", 2), ("Colle", 2),
+      ("Magazine électronique Vol. 1", 1)]),
+    ("Télécommande V2", "Électrique",
+     [("Télécommande TV", 1), ("Composant électronique", 3), ("Colle", 2),
+      ("Magazine électronique Vol. 1", 1)]),
+    ("Télécommande V3", "Électrique",
+     [("Télécommande TV", 1), ("Composant électronique", 4), ("Colle", 2),
+      ("Magazine électronique Vol. 1", 1)]),
+    ("Radio de fortune", "Électrique",
+     [("Composant électronique", 2), ("Amplificateur", 1), ("Ampoule", 1), ("Récepteur radio", 1),
+      ("Fil électrique", 1), ("Aluminium", 2), ("Magazine électronique Vol. 1", 1)]),
+    ("Talkie-walkie de fortune", "Électrique",
+     [("Composant électronique", 3), ("Amplificateur", 1), ("Ampoule", 1), ("Ampoule verte", 1),
+      ("Transmetteur radio", 1), ("Fil électrique", 2), ("Aluminium", 3),
+      ("Magazine électronique Vol. 2", 1)]),
+    ("Radio de fortune", "Électrique",
+     [("Composant électronique", 4), ("Amplificateur", 1), ("Ampoule", 1), ("Ampoule verte", 1),
+      ("Transmetteur radio", 1), ("Fil électrique", 3), ("Aluminium", 4), ("Magazine mécanique", 1)]),
 
     # Catégorie Ingénierie
-    app.add_craft("Bombe aérosol", [("Aérosol", 1), ("Cocarde", 1), ("Aluminium", 1)], category="Ingénierie")
-    app.add_craft("Bombe incendiaire", [("Bouteille vide", 1), ("Essence", 4), ("Tissu déchiré", 1)], category="Ingénierie")
+    ("Bombe aérosol", "Ingénierie", [("Aérosol", 1), ("Cocarde", 1), ("Aluminium", 1)]),
+    ("Bombe incendiaire", "Ingénierie", [("Bouteille vide", 1), ("Essence", 4), ("Tissu déchiré", 1)]),
 
     # Bombes avec minuterie et capteurs (catégorie Électrique)
-    app.add_craft("Bombe aérosol avec minuterie",
-                  [("Bombe aérosol", 1), ("Minuterie", 1), ("Composant électronique", 2),
-                   ("Ruban adhésif", 1), ("Magazine électronique Vol. 2", 1)],
-                  category="Électrique")
-    app.add_craft("Bombe aérosol avec capteur (V1)",
-                  [("Bombe aérosol", 1), ("Capteur de mouvement", 1), ("Composant électronique", 2),
-                   ("Ruban adhésif", 1), ("Magazine électronique Vol. 3", 1)],
-                  category="Électrique")
-    app.add_craft("Bombe incendiaire avec minuterie",
-                  [("Bombe incendiaire", 1), ("Minuterie", 1), ("Composant électronique", 2),
-                   ("Ruban adhésif", 1), ("Magazine électronique Vol. 2", 1)],
-                  category="Électrique")
-    app.add_craft("Bombe incendiaire avec capteur (V1)",
-                  [("Bombe incendiaire", 1), ("Capteur de mouvement", 1), ("Composant électronique", 2),
-                   ("Ruban adhésif", 1), ("Magazine électronique Vol. 3", 1)],
-                  category="Électrique")
+    ("Bombe aérosol avec minuterie", "Électrique",
+     [("Bombe aérosol", 1), ("Minuterie", 1), ("Composant électronique", 2), ("Ruban adhésif", 1),
+      ("Magazine électronique Vol. 2", 1)]),
+    ("Bombe aérosol avec capteur (V1)", "Électrique",
+     [("Bombe aérosol", 1), ("Capteur de mouvement", 1), ("Composant électronique", 2), ("Ruban adhésif", 1),
+      ("Magazine électronique Vol. 3", 1)]),
+    ("Bombe incendiaire avec minuterie", "Électrique",
+     [("Bombe incendiaire", 1), ("Minuterie", 1), ("Composant électronique", 2), ("Ruban adhésif", 1),
+      ("Magazine électronique Vol. 2", 1)]),
+    ("Bombe incendiaire avec capteur (V1)", "Électrique",
+     [("Bombe incendiaire", 1), ("Capteur de mouvement", 1), ("Composant électronique", 2),
+      ("Ruban adhésif", 1), ("Magazine électronique Vol. 3", 1)]),
 
     # Quelques ajouts supplémentaires
-    app.add_craft("Bâton", [("Bois", 2)], category="Survie")
-    app.add_craft("Couteau en pierre",
-                  [("Branche d’arbre", 1), ("Pierre coupante", 1), ("Ficelle", 1)],
-                  category="Survie")
-    app.add_craft("Kit pour feu de camp",
-                  [("Bois", 5), ("Brindilles", 10), ("Feuille", 3)],
-                  category="Survie")
-    app.add_craft("Porte",
-                  [("Marteau", 10), ("Planche", 4), ("Clou", 8),
-                   ("Charnière de porte", 2), ("Poignée de porte", 1)],
-                  category="Menuiserie")
-
-# Chargement des recettes
-recipes = app.load_craft_recipes()
+    ("Bâton", "Survie", [("Bois", 2)]),
+    ("Couteau en pierre", "Survie", [("Branche d’arbre", 1), ("Pierre coupante", 1), ("Ficelle", 1)]),
+    ("Kit pour feu de camp", "Survie", [("Bois", 5), ("Brindilles", 10), ("Feuille", 3)]),
+    ("Porte", "Menuiserie",
+     [("Marteau", 10), ("Planche", 4), ("Clou", 8), ("Charnière de porte", 2), ("Poignée de porte", 1)]),
+]
+
+
+def bootstrap(db_name=DB_NAME, profile=None, seed=True):
+    """
+    Prépare la base avant sa première utilisation dans le processus.
+
+    Idempotent et exécuté au plus une fois par base et par processus. Si
+    PRAGMA user_version indique un schéma à jour, seul le profil SQLite est
+    appliqué. Sinon le schéma est créé ou complété, puis rempli avec
+    SEED_CRAFTS si la base est vide (sauf avec seed=False, ex. avant un import).
+    Les noms en attente dans SearchQueue sont ensuite indexés.
+    """
+    with _bootstrap_lock:
+        if db_name in _bootstrapped:
+            return
+        app = App(db_name, profile)
+        if app.storage.query_one("PRAGMA user_version")[0] >= SCHEMA_VERSION:
+            app.storage.apply_profile()
+        else:
+            app.fn_init_db()
+            if seed and is_db_empty(db_name):
+                app.add_crafts_bulk(SEED_CRAFTS)
+        # Noms écrits par une autre connexion depuis le dernier lancement
+        try:
+            with app.storage.transaction() as cursor:
+                refresh_search_keys(cursor)
+        except Error as e:
+            print(f"Erreur lors de la mise à jour de l'index de recherche: {e}", file=sys.stderr)
+        _bootstrapped.add(db_name)
 
@@ -1,10 +1,9 @@
 import customtkinter as ctk
 import sqlite3
 import tkinter.messagebox as tkmb
-from init_db import App as InitDBApp
-import json
-import os
-from datetime import datetime
+from craft_engine import CraftEngine
+from init_db import bootstrap, refresh_search_keys
+from storage import close_all
 
 # Initialiser l'application
 ctk.set_appearance_mode("dark")
@@ -12,70 +11,8 @@ ctk.set_default_color_theme("blue")
 
 # --- Paramètres de pagination ---
 CRAFTS_PER_PAGE = 20
-CACHE_FILE = "craft_cache.json"
-
-class CraftCache:
-    """Gestionnaire de cache pour optimiser les performances"""
-    
-    def __init__(self, db_name="Crafts.db"):
-        self.db_name = db_name
-        self.cache_file = CACHE_FILE
-        self.cache_data = None
-        self.last_db_modified = None
-        
-    def get_db_modification_time(self):
-        """Récupère la date de dernière modification de la base de données"""
-        try:
-            return os.path.getmtime(self.db_name)
-        except OSError:
-            return 0
-    
-    def is_cache_valid(self):
-        """Vérifie si le cache est encore valide"""
-        if not os.path.exists(self.cache_file):
-            return False
-        
-        try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                cache_info = json.load(f)
-            
-            cache_timestamp = cache_info.get('timestamp', 0)
-            db_timestamp = self.get_db_modification_time()
-            
-            return cache_timestamp >= db_timestamp
-        except (json.JSONDecodeError, KeyError):
-            return False
-    
-    def load_from_cache(self):
-        """Charge les données depuis le cache"""
-        try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            return cache_data.get('recipes', {}), cache_data.get('table_data', {})
-        except (json.JSONDecodeError, FileNotFoundError):
-            return None, None
-    
-    def save_to_cache(self, recipes, table_data):
-        """Sauvegarde les données dans le cache"""
-        cache_data = {
-            'timestamp': self.get_db_modification_time(),
-            'recipes': recipes,
-            'table_data': table_data,
-            'created_at': datetime.now().isoformat()
-        }
-        try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde du cache: {e}")
-    
-    def invalidate_cache(self):
-        """Invalide le cache (le supprime)"""
-        try:
-            if os.path.exists(self.cache_file):
-                os.remove(self.cache_file)
-        except OSError as e:
-            print(f"Erreur lors de la suppression du cache: {e}")
+# Charger la page suivante quand le bas de la liste visible dépasse cette fraction
+SCROLL_LOAD_THRESHOLD = 0.9
 
 class App(ctk.CTk):
     def __init__(self):
@@ -84,9 +21,7 @@ class App(ctk.CTk):
         self.geometry("800x500")
 
         self.init_db()
-        self.cache_manager = CraftCache()
-        self.table_data = {}
-        self.craft_recipes = {}
+        self.engine = CraftEngine()
         
         # Chargement optimisé des données
         self.load_data_optimized()
@@ -103,72 +38,36 @@ class App(ctk.CTk):
 
         self.create_home_frame()
 
+    @property
+    def table_data(self):
+        """Données de la table des crafts (portées par le moteur)"""
+        return self.engine.table_data
+
+    @property
+    def craft_recipes(self):
+        """Recettes principales des crafts (portées par le moteur)"""
+        return self.engine.craft_recipes
+
+    @property
+    def storage(self):
+        """Accès partagé à la base de données"""
+        return self.engine.storage
+
+    @property
+    def cache_manager(self):
+        """Gestionnaire de cache du moteur"""
+        return self.engine.cache_manager
+
     def init_db(self):
-        """Initialise la base de données."""
-        db_app = InitDBApp()
-        db_app.fn_init_db()
+        """Prépare la base de données (schéma et données initiales, une fois par processus)."""
+        bootstrap()
 
     def load_data_optimized(self):
         """Charge les données de manière optimisée avec cache"""
-        # Vérifier si le cache est valide
-        if self.cache_manager.is_cache_valid():
+        if self.engine.load() == "cache":
             print("Chargement depuis le cache...")
-            recipes, table_data = self.cache_manager.load_from_cache()
-            if recipes is not None and table_data is not None:
-                self.craft_recipes = recipes
-                self.table_data = table_data
-                return
-        
-        # Si pas de cache valide, charger depuis la DB et créer le cache
-        print("Chargement depuis la base de données...")
-        self.craft_recipes = self.load_craft_recipes_from_db()
-        self.cache_manager.save_to_cache(self.craft_recipes, self.table_data)
-
-    def load_craft_recipes_from_db(self):
-        """Charge les recettes depuis la base de données (méthode originale)"""
-        db_name = "Crafts.db"
-        recipes = {}
-        VALID_CATEGORIES = [
-            "Général", "Survie", "Menuiserie", "Électrique", 
-            "Agriculture", "Pêche", "Trappeur", "Cuisine", 
-            "Premiers Secours", "Travail du Métal", "Artisanat"
-        ]
-        try:
-            with sqlite3.connect(db_name) as conn:
-                cursor = conn.cursor()
-                # Récupérer toutes les données de crafts en une seule requête
-                cursor.execute("SELECT id, name, category, favorite FROM Craft")
-                crafts = cursor.fetchall()
-                # Créer une correspondance entre craft_id et craft_name
-                craft_map = {}
-                for craft in crafts:
-                    craft_id, craft_name, craft_category, is_favorite = craft
-                    recipes[craft_name] = {}
-                    self.table_data[craft_name] = {
-                        'quantity': 0,
-                        'favorite': bool(is_favorite),
-                        'category': craft_category if craft_category and craft_category in VALID_CATEGORIES else "Général"
-                    }
-                    craft_map[craft_id] = craft_name
-
-                if craft_map:
-                    # Récupérer tous les ingrédients en une seule requête
-                    placeholders = ','.join('?' for _ in craft_map)
-                    query = f"""
-                        SELECT CraftIngredient.craft_id, Ingredient.name 
-                        FROM CraftIngredient
-                        JOIN Ingredient ON Ingredient.id = CraftIngredient.ingredient_id
-                        WHERE CraftIngredient.craft_id IN ({placeholders})
-                    """
-                    cursor.execute(query, list(craft_map.keys()))
-                    for craft_id, ingredient_name in cursor.fetchall():
-                        craft_name = craft_map[craft_id]
-                        recipes[craft_name][ingredient_name] = 1
-        except sqlite3.Error as e:
-            print(f"Une erreur s'est produite : {e}")
-            return {}
-        
-        return recipes
+        else:
+            print("Chargement depuis la base de données...")
 
     def invalidate_cache_and_reload(self):
         """Invalide le cache et recharge les données"""
@@ -176,21 +75,28 @@ class App(ctk.CTk):
         self.load_data_optimized()
 
     def save_favorite(self, item, is_favorite):
-        """Sauvegarde l'état du favori dans la base de données et invalide le cache"""
+        """Sauvegarde l'état du favori dans la base de données puis applique le journal en mémoire"""
         try:
-            with sqlite3.connect("Crafts.db") as conn:
-                cursor = conn.cursor()
+            with self.storage.transaction() as cursor:
                 cursor.execute("""
                     UPDATE Craft 
                     SET favorite = ? 
                     WHERE name = ?
                 """, (int(is_favorite), item))
-                conn.commit()
-            # Invalider le cache après modification
-            self.cache_manager.invalidate_cache()
+            # Le cache disque reste valide : le changement est journalisé et rejoué au prochain chargement
+            self.engine.sync()
         except sqlite3.Error as error:
             print(f"Erreur lors de la sauvegarde du favori: {error}")
 
+    def set_craft_favorite(self, craft_id, is_favorite):
+        """Modifie le favori d'un craft désigné par son id puis applique le journal en mémoire"""
+        with self.storage.transaction() as cursor:
+            cursor.execute(
+                "UPDATE Craft SET favorite = ? WHERE id = ?",
+                (1 if is_favorite else 0, craft_id)
+            )
+        self.engine.sync()
+
     def create_navbar_buttons(self):
         # Bouton Gestionnaire de craft
         self.craft_button = ctk.CTkButton(
@@ -286,8 +192,7 @@ class App(ctk.CTk):
                 tkmb.showerror("Erreur", "Au moins un ingrédient est requis.")
                 return
             try:
-                with sqlite3.connect("Crafts.db") as conn:
-                    cursor = conn.cursor()
+                with self.storage.transaction() as cursor:
                     cursor.execute("SELECT id FROM Craft WHERE name = ?", (name,))
                     if cursor.fetchone():
                         tkmb.showerror("Erreur", f"Le craft '{name}' existe déjà.")
@@ -299,8 +204,8 @@ class App(ctk.CTk):
                         cursor.execute("SELECT id FROM Ingredient WHERE name = ?", (ing,))
                         ing_id = cursor.fetchone()[0]
                         cursor.execute("INSERT INTO CraftIngredient (craft_id, ingredient_id) VALUES (?, ?)", (craft_id, ing_id))
-                    conn.commit()
-                self.invalidate_cache_and_reload()
+                    refresh_search_keys(cursor)
+                self.engine.sync()
                 if hasattr(self, 'table_frame'):
                     self.create_first_table()
                     self.create_second_table()
@@ -344,7 +249,7 @@ class App(ctk.CTk):
         ctk.CTkLabel(main_frame, text="Sélectionnez un craft à modifier :", 
                     font=ctk.CTkFont(size=14, weight="bold")).pack(pady=(10, 5))
         
-        craft_names = sorted(self.table_data.keys())
+        craft_names = self.engine.sort_crafts()
         filtered_crafts = craft_names.copy()
         
         if craft_names:
@@ -356,9 +261,9 @@ class App(ctk.CTk):
 
 
         def update_craft_list(*args):
-            search_term = search_var.get().lower()
+            search_term = search_var.get()
             if search_term:
-                filtered = [craft for craft in craft_names if search_term in craft.lower()]
+                filtered = self.engine.sort_crafts(self.engine.search_crafts(search_term))
             else:
                 filtered = craft_names.copy()
             craft_menu.configure(values=filtered)
@@ -401,8 +306,7 @@ class App(ctk.CTk):
                 tkmb.showerror("Erreur", "Au moins un ingrédient est requis.")
                 return
             try:
-                with sqlite3.connect("Crafts.db") as conn:
-                    cursor = conn.cursor()
+                with self.storage.transaction() as cursor:
                     cursor.execute("SELECT id FROM Craft WHERE name = ?", (old_name,))
                     row = cursor.fetchone()
                     if not row:
@@ -415,14 +319,15 @@ class App(ctk.CTk):
                             tkmb.showerror("Erreur", f"Le craft '{new_name}' existe déjà.")
                             return
                     cursor.execute("UPDATE Craft SET name = ?, category = ? WHERE id = ?", (new_name, category, craft_id))
-                    cursor.execute("DELETE FROM CraftIngredient WHERE craft_id = ?", (craft_id,))
+                    # Seule la recette principale est modifiée, les variantes sont conservées
+                    cursor.execute("DELETE FROM CraftIngredient WHERE craft_id = ? AND variant = 0", (craft_id,))
                     for ing in ingredients:
                         cursor.execute("INSERT OR IGNORE INTO Ingredient (name) VALUES (?)", (ing,))
                         cursor.execute("SELECT id FROM Ingredient WHERE name = ?", (ing,))
                         ing_id = cursor.fetchone()[0]
                         cursor.execute("INSERT INTO CraftIngredient (craft_id, ingredient_id) VALUES (?, ?)", (craft_id, ing_id))
-                    conn.commit()
-                self.invalidate_cache_and_reload()
+                    refresh_search_keys(cursor)
+                self.engine.sync()
                 if hasattr(self, 'table_frame'):
                     self.create_first_table()
                     self.create_second_table()
@@ -454,7 +359,7 @@ class App(ctk.CTk):
         search_entry.pack(pady=(0, 15))
 
         ctk.CTkLabel(main_frame, text="Sélectionnez un craft à supprimer :", font=ctk.CTkFont(size=14, weight="bold")).pack(pady=(10, 5))
-        craft_names = sorted(self.table_data.keys())
+        craft_names = self.engine.sort_crafts()
         filtered_crafts = craft_names.copy()
         if craft_names:
             selected_craft_var.set(craft_names[0])
@@ -462,9 +367,9 @@ class App(ctk.CTk):
         craft_menu.pack(pady=(0, 20))
 
         def update_craft_list(*args):
-            search_term = search_var.get().lower()
+            search_term = search_var.get()
             if search_term:
-                filtered = [craft for craft in craft_names if search_term in craft.lower()]
+                filtered = self.engine.sort_crafts(self.engine.search_crafts(search_term))
             else:
                 filtered = craft_names.copy()
             craft_menu.configure(values=filtered)
@@ -483,8 +388,7 @@ class App(ctk.CTk):
             if not tkmb.askyesno("Confirmation de suppression", message):
                 return
             try:
-                with sqlite3.connect("Crafts.db") as conn:
-                    cursor = conn.cursor()
+                with self.storage.transaction() as cursor:
                     cursor.execute("SELECT id FROM Craft WHERE name = ?", (craft,))
                     row = cursor.fetchone()
                     if not row:
@@ -493,16 +397,10 @@ class App(ctk.CTk):
                     craft_id = row[0]
                     cursor.execute("DELETE FROM CraftIngredient WHERE craft_id = ?", (craft_id,))
                     cursor.execute("DELETE FROM Craft WHERE id = ?", (craft_id,))
-                    conn.commit()
-                    cursor.execute("SELECT id FROM Craft WHERE id = ?", (craft_id,))
-                    if cursor.fetchone():
-                        tkmb.showerror("Erreur", "Échec de la suppression.")
-                        return
-                if craft in self.table_data:
-                    del self.table_data[craft]
-                if craft in self.craft_recipes:
-                    del self.craft_recipes[craft]
-                self.invalidate_cache_and_reload()
+                if self.storage.query_one("SELECT id FROM Craft WHERE id = ?", (craft_id,)):
+                    tkmb.showerror("Erreur", "Échec de la suppression.")
+                    return
+                self.engine.sync()
                 if hasattr(self, 'table_frame'):
                     self.create_first_table()
                     self.create_second_table()
@@ -525,6 +423,16 @@ class App(ctk.CTk):
         search_entry.pack(pady=5, padx=10)
         search_entry.bind("<KeyRelease>", self.update_first_table)
 
+        # Mode de recherche : par nom de craft ou par ingrédient utilisé
+        self.search_mode_var = ctk.StringVar(value="Nom")
+        search_mode = ctk.CTkSegmentedButton(
+            self.sidebar_frame,
+            values=["Nom", "Ingrédient"],
+            variable=self.search_mode_var,
+            command=self.update_first_table
+        )
+        search_mode.pack(pady=5, padx=10)
+
         self.favorite_filter = ctk.CTkCheckBox(self.sidebar_frame, text="Favoris", command=self.update_first_table)
         self.favorite_filter.pack(pady=5)
 
@@ -650,7 +558,10 @@ class App(ctk.CTk):
     # [Le reste des méthodes comme create_first_table, update_first_table, etc. restent identiques]
 
     def create_first_table(self):
-        """Crée les widgets une seule fois pour tous les crafts, sans pagination."""
+        """
+        Crée la liste des crafts. Les lignes sont chargées par pages de
+        CRAFTS_PER_PAGE au fil du défilement (voir load_next_page).
+        """
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         if hasattr(self, 'table_frame') and self.table_frame is not None:
@@ -670,32 +581,81 @@ class App(ctk.CTk):
         title_label = ctk.CTkLabel(self.table_frame, text="Sélectionnez les objets à crafter", font=ctk.CTkFont(size=14, weight="bold"))
         title_label.pack(pady=5)
 
+        # Lignes déjà créées (réutilisées d'un filtre à l'autre) et lignes affichées
         self.row_frames = {}
         self.quantity_entries = {}
         self.favorite_checkboxes = {}
-        self.craft_names_sorted = sorted(self.table_data.keys(), key=lambda x: x.lower())
-
-        for item in self.craft_names_sorted:
-            row_frame = self.create_craft_row(self.table_frame, item)
-            row_frame.pack(fill="x", padx=10, pady=2)
+        self.visible_rows = []
+        self.page_cursor = None
+        self.pages_exhausted = True
+        self.page_load_pending = False
 
+        self.watch_table_scroll()
         self.update_first_table()
 
     def update_first_table(self, event=None):
-        """Affiche/masque les lignes selon les filtres, sans pagination."""
-        search_term = self.search_var.get().lower()
-        selected_category = self.category_var.get()
-        show_favorites = self.favorite_filter.get()
-        for item, row_frame in self.row_frames.items():
-            visible = (
-                (search_term in item.lower() or not search_term)
-                and (selected_category == "Tous" or self.table_data[item]['category'] == selected_category)
-                and (not show_favorites or self.table_data[item].get('favorite', False))
-            )
-            if visible:
-                row_frame.pack(fill="x", padx=10, pady=2)
-            else:
-                row_frame.pack_forget()
+        """Repart de la première page de crafts correspondant aux filtres."""
+        for item in self.visible_rows:
+            self.row_frames[item].pack_forget()
+        self.visible_rows = []
+        self.page_cursor = None
+        self.pages_exhausted = False
+        # Le cadre défilant est placé dans un canevas Tk : son parent
+        self.table_frame.master.yview_moveto(0)
+        self.load_next_page()
+
+    def load_next_page(self):
+        """Ajoute la page suivante de crafts (pagination par clé côté base)."""
+        if self.pages_exhausted:
+            return
+        names, self.page_cursor = self.engine.page_crafts(
+            self.page_cursor,
+            CRAFTS_PER_PAGE,
+            self.category_var.get(),
+            self.favorite_filter.get(),
+            self.search_var.get(),
+            self.search_mode_var.get()
+        )
+        self.pages_exhausted = self.page_cursor is None
+        for item in names:
+            if item not in self.table_data:
+                continue
+            row_frame = self.row_frames.get(item)
+            if row_frame is None:
+                row_frame = self.create_craft_row(self.table_frame, item)
+            row_frame.pack(fill="x", padx=10, pady=2)
+            self.visible_rows.append(item)
+
+    def watch_table_scroll(self):
+        """
+        Relie le chargement des pages au défilement de la liste. Le canevas appelle
+        sa commande yscrollcommand à chaque changement de la zone visible (molette,
+        barre de défilement, redimensionnement, lignes ajoutées) : elle est
+        complétée pour appeler on_table_scroll, après la barre de défilement.
+        """
+        canvas = self.table_frame.master
+        scrollbar_command = canvas.tk.splitlist(canvas.cget("yscrollcommand"))
+
+        def on_scroll(first, last):
+            if scrollbar_command:
+                canvas.tk.call(*scrollbar_command, first, last)
+            self.on_table_scroll(float(last))
+
+        canvas.configure(yscrollcommand=on_scroll)
+
+    def on_table_scroll(self, visible_end):
+        """Charge une page de plus quand la liste approche du bas (ou ne remplit pas la vue)."""
+        if self.pages_exhausted or self.page_load_pending or visible_end < SCROLL_LOAD_THRESHOLD:
+            return
+        # Hors de la commande de défilement : ajouter des lignes la rappelle
+        self.page_load_pending = True
+        self.after_idle(self.load_pending_page)
+
+    def load_pending_page(self):
+        """Charge la page demandée par on_table_scroll si la liste existe encore."""
+        self.page_load_pending = False
+        if self.table_frame is not None and self.table_frame.winfo_exists():
+            self.load_next_page()
 
     def update_quantity(self, item, entry):
         """Met à jour la quantité et seulement les labels concernés."""
@@ -703,8 +663,9 @@ class App(ctk.CTk):
             new_qty = int(entry.get())
         except ValueError:
             new_qty = 0
-        self.table_data[item]['quantity'] = new_qty
-        self.update_second_table_labels()
+        changed = self.engine.set_quantity(item, new_qty)
+        if changed:
+            self.update_second_table_labels(changed=changed)
 
     def create_second_table(self):
         """Crée le tableau des résultats (labels uniquement, pas de destruction)."""
@@ -724,8 +685,27 @@ class App(ctk.CTk):
         self.second_table_labels = {}
         self.update_second_table_labels(init=True)
 
-    def update_second_table_labels(self, init=False):
-        """Met à jour uniquement les labels des ressources nécessaires."""
+    def update_second_table_labels(self, init=False, changed=None):
+        """
+        Met à jour uniquement les labels des ressources nécessaires.
+        Si `changed` est fourni, seules ces ressources sont reconfigurées.
+        """
+        if changed is not None:
+            totals = self.engine.running_totals.totals
+            for resource in changed:
+                quantity = totals.get(resource)
+                label = self.second_table_labels.get(resource)
+                if quantity:
+                    if label is not None:
+                        label.configure(text=str(quantity))
+                    else:
+                        resource_row, quantity_label = self.create_resource_row(self.second_table_frame, resource, quantity)
+                        self.second_table_labels[resource] = quantity_label
+                elif label is not None:
+                    label.master.destroy()
+                    del self.second_table_labels[resource]
+            return
+
         resources = self.calculate_resources_needed()
         if init:
             self.second_table_labels = {}
@@ -746,8 +726,7 @@ class App(ctk.CTk):
 
     def reset_all_crafts(self):
         """Réinitialise toutes les quantités de crafts à zéro et rafraîchit les tableaux."""
-        for item in self.table_data:
-            self.table_data[item]['quantity'] = 0
+        self.engine.reset_quantities()
         if hasattr(self, 'quantity_entries'):
             for entry in self.quantity_entries.values():
                 entry.delete(0, "end")
@@ -763,13 +742,10 @@ class App(ctk.CTk):
     def reset_favorites(self):
         """Décoche toutes les cases favoris, met à jour la base de données et l'UI."""
         # Mets à jour la base de données
-        with sqlite3.connect('Crafts.db') as conn:
-            cursor = conn.cursor()
+        with self.storage.transaction() as cursor:
             cursor.execute("UPDATE Craft SET favorite = 0")
-            conn.commit()
-        # Mets à jour self.table_data
-        for item in self.table_data:
-            self.table_data[item]['favorite'] = False
+        # Mets à jour self.table_data depuis le journal
+        self.engine.sync()
         # Décoche toutes les cases favoris dans l’UI
         for checkbox in self.favorite_checkboxes.values():
             checkbox.deselect()
@@ -781,15 +757,10 @@ class App(ctk.CTk):
     def calculate_resources_needed(self):
         """
         Calcule les ressources nécessaires en fonction des quantités de chaque craft.
+        Les crafts intermédiaires sont développés jusqu'aux matériaux de base.
         Retourne un dictionnaire {nom_ressource: quantité_totale}.
         """
-        resources = {}
-        for craft, data in self.table_data.items():
-            qty = data.get('quantity', 0)
-            if qty > 0 and craft in self.craft_recipes:
-                for ingredient, ing_qty in self.craft_recipes[craft].items():
-                    resources[ingredient] = resources.get(ingredient, 0) + ing_qty * qty
-        return resources
+        return self.engine.calculate_resources_needed()
 
     def create_resource_row(self, parent, resource, quantity):
         """Crée une ligne pour une ressource dans la seconde table."""
@@ -829,7 +800,9 @@ class App(ctk.CTk):
         current = self.table_data[item]['favorite']
         self.table_data[item]['favorite'] = not current
         self.save_favorite(item, not current)
-        self.update_first_table()
+        # Sans filtre favoris la liste ne change pas : on garde la position de défilement
+        if self.favorite_filter.get():
+            self.update_first_table()
 
     def delete_selected(self):
         """Supprime l’élément sélectionné dans la liste."""
@@ -837,23 +810,14 @@ class App(ctk.CTk):
         pass
 
     def get_favorite_crafts(self):
-        with sqlite3.connect('Crafts.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM Craft WHERE favorite = 1")
-            return cursor.fetchall()
+        return self.storage.query_all("SELECT * FROM Craft WHERE favorite = 1")
 
 
 
-def set_craft_favorite(craft_id, is_favorite):
-    with sqlite3.connect('Crafts.db') as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE Craft SET favorite = ? WHERE id = ?",
-            (1 if is_favorite else 0, craft_id)
-        )
-        conn.commit()
-
 # Lancer l'application
 if __name__ == "__main__":
     app = App()
     app.mainloop()
+    # Termine l'écriture du cache encore en cours avant de quitter
+    app.engine.close()
+    close_all()
@@ -0,0 +1,349 @@
+"""
+Format binaire du cache de CraftCache (instantané des recettes).
+
+Le fichier est projeté en mémoire (mmap) et découpé en sections lues à la
+demande : l'en-tête (révision du journal, empreinte de la base) se lit seul, et
+chaque section n'est convertie en objets Python qu'au premier accès.
+
+Disposition (ordre des octets de la machine, indiqué dans l'en-tête) :
+    en-tête    : MAGIC, version du format, ordre des octets, nombre de sections, révision, empreinte
+    répertoire : une entrée (étiquette, position, taille) par section
+    sections   : alignées sur 8 octets
+
+Les chaînes (noms de crafts, catégories, ingrédients) sont stockées une seule
+fois dans la table STRS ; les autres sections n'en contiennent que les numéros.
+Les recettes sont des tableaux d'entiers à plat :
+    VOFF[c] .. VOFF[c + 1]  : variantes du craft c (la première est la recette principale)
+    EOFF[v] .. EOFF[v + 1]  : ingrédients de la variante v dans ESID (chaîne) et EQTY (quantité)
+Les favoris forment un bitmap (FAVB, bit c de l'octet c // 8). Avec les vues de
+l'interface (CraftViews.to_dict()), les crafts sont écrits dans l'ordre
+d'affichage et s'y ajoutent la clé de recherche de chaque craft (SKEY) et les
+positions par catégorie :
+    CATO[k] .. CATO[k + 1]  : positions dans CATP des crafts de la catégorie CATN[k]
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+MAGIC = b"CRFTSNAP"
+FORMAT_VERSION = 4
+# MAGIC, version, petit-boutiste (1) ou gros-boutiste (0), nombre de sections, révision, empreinte
+HEADER = struct.Struct("<8sHHIqQ")
+# Étiquette, position, taille
+SECTION = struct.Struct("<4sQQ")
+ALIGNMENT = 8
+STRING_SEPARATOR = "\0"
+LITTLE_ENDIAN = int(sys.byteorder == "little")
+# Octet du bitmap des favoris -> un octet 0/1 par bit
+_BITS = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+class SnapshotError(ValueError):
+    """Fichier absent, tronqué, d'une autre version ou d'une autre architecture"""
+
+def _strings_builder():
+    """Table de chaînes internées : retourne (liste, fonction chaîne -> numéro)"""
+    strings = []
+    ids = {}
+
+    def intern(text):
+        sid = ids.get(text)
+        if sid is None:
+            if STRING_SEPARATOR in text:
+                raise ValueError(f"Caractère nul interdit dans le cache : {text!r}")
+            sid = ids[text] = len(strings)
+            strings.append(text)
+        return sid
+    return strings, intern
+
+def _pack_bits(flags):
+    """Bitmap d'une suite de 0/1"""
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for position, flag in enumerate(flags):
+        if flag:
+            bitmap[position >> 3] |= 1 << (position & 7)
+    return bytes(bitmap)
+
+def encode(recipes, table_data, variants=None, graph=None, revision=0, fingerprint=0, meta=None, views=None):
+    """
+    Construit le contenu binaire d'un instantané. `graph` est la forme
+    CraftGraph.to_dict() et `views` la forme CraftViews.to_dict() ;
+    `fingerprint` un entier sur 64 bits identifiant la base et son schéma ;
+    `meta` un petit dictionnaire JSON (base, dates). Les favoris sont pris dans
+    table_data.
+    """
+    variants = variants or {}
+    strings, intern = _strings_builder()
+    sections = {}
+
+    names = array('I')
+    categories = array('I')
+    craft_ids = array('q')
+    favorites = bytearray()
+    variant_offsets = array('I', [0])
+    entry_offsets = array('I', [0])
+    entry_strings = array('I')
+    entry_quantities = array('i')
+    for name in (views['order'] if views is not None else table_data):
+        data = table_data[name]
+        names.append(intern(name))
+        categories.append(intern(data.get('category') or "Général"))
+        craft_ids.append(data.get('id', 0))
+        favorites.append(1 if data.get('favorite') else 0)
+        for recipe in variants.get(name) or [recipes.get(name, {})]:
+            for ingredient, qty in recipe.items():
+                entry_strings.append(intern(ingredient))
+                entry_quantities.append(qty)
+            entry_offsets.append(len(entry_strings))
+        variant_offsets.append(len(entry_offsets) - 1)
+
+    sections[b"NAME"] = names
+    sections[b"CATG"] = categories
+    sections[b"IDS "] = craft_ids
+    sections[b"FAVB"] = _pack_bits(favorites)
+    sections[b"VOFF"] = variant_offsets
+    sections[b"EOFF"] = entry_offsets
+    sections[b"ESID"] = entry_strings
+    sections[b"EQTY"] = entry_quantities
+    if graph is not None:
+        sections[b"GORD"] = array('I', (intern(craft) for craft in graph['order']))
+        sections[b"GCMP"] = array('I', (graph['component'][craft] for craft in graph['order']))
+        sections[b"GDEP"] = array('I', (graph['depth'][craft] for craft in graph['order']))
+        sections[b"GCYC"] = json.dumps(graph['cycles'], ensure_ascii=False).encode('utf-8')
+    if views is not None:
+        sections[b"SKEY"] = array('I', map(intern, views['keys']))
+        bucket_offsets = array('I', [0])
+        bucket_positions = array('I')
+        for positions in views['buckets'].values():
+            bucket_positions.extend(positions)
+            bucket_offsets.append(len(bucket_positions))
+        sections[b"CATN"] = array('I', map(intern, views['buckets']))
+        sections[b"CATO"] = bucket_offsets
+        sections[b"CATP"] = bucket_positions
+    sections[b"META"] = json.dumps(meta or {}, ensure_ascii=False).encode('utf-8')
+    sections[b"STRS"] = STRING_SEPARATOR.join(strings).encode('utf-8')
+
+    position = HEADER.size + SECTION.size * len(sections)
+    directory = []
+    body = []
+    for tag, payload in sections.items():
+        payload = payload.tobytes() if isinstance(payload, array) else payload
+        padding = -position % ALIGNMENT
+        position += padding
+        directory.append(SECTION.pack(tag, position, len(payload)))
+        body.append(b"\0" * padding)
+        body.append(payload)
+        position += len(payload)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, LITTLE_ENDIAN, len(sections), revision or 0, fingerprint or 0)
+    return b"".join([header, *directory, *body])
+
+def write_temporary(path, *args, **kwargs):
+    """
+    Écrit un instantané (voir encode) à côté de `path` et retourne le chemin du
+    fichier temporaire, à mettre en place par os.replace.
+    """
+    data = encode(*args, **kwargs)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return temporary
+
+def write(path, *args, **kwargs):
+    """
+    Écrit un instantané dans un fichier temporaire puis le met en place par
+    os.replace : un lecteur qui projette encore l'ancien fichier n'est pas
+    affecté, et un arrêt brutal ne laisse jamais un fichier tronqué.
+    """
+    os.replace(write_temporary(path, *args, **kwargs), path)
+
+def read_header(path):
+    """Lit uniquement l'en-tête : retourne (révision, empreinte) (SnapshotError si invalide)"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError as e:
+        raise SnapshotError(str(e))
+    return _check_header(header)[1:]
+
+def _check_header(header):
+    """Vérifie l'en-tête et retourne (nombre de sections, révision, empreinte)"""
+    if len(header) < HEADER.size:
+        raise SnapshotError("Instantané tronqué")
+    magic, version, little_endian, count, revision, fingerprint = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise SnapshotError("Ce fichier n'est pas un instantané de recettes")
+    if version != FORMAT_VERSION or little_endian != LITTLE_ENDIAN:
+        raise SnapshotError(f"Instantané d'un autre format (version {version})")
+    return count, revision, fingerprint
+
+class Snapshot:
+    """
+    Instantané ouvert en lecture par mmap. Les sections sont décodées au premier
+    accès puis gardées ; close() libère la projection (à appeler avant de
+    remplacer le fichier sous Windows).
+    """
+
+    def __init__(self, path):
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < HEADER.size:
+                    raise SnapshotError("Instantané tronqué")
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            raise SnapshotError(str(e))
+        try:
+            count, self.revision, self.fingerprint = _check_header(self._mmap[:HEADER.size])
+            self._sections = {}
+            for number in range(count):
+                tag, offset, length = SECTION.unpack_from(self._mmap, HEADER.size + number * SECTION.size)
+                if offset + length > size:
+                    raise SnapshotError("Instantané tronqué")
+                self._sections[tag] = (offset, length)
+        except (SnapshotError, struct.error) as e:
+            self.close()
+            raise SnapshotError(str(e))
+        self._decoded = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Libère la projection mémoire du fichier"""
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._mmap = None
+
+    def detach(self):
+        """
+        Copie en mémoire de l'instantané, indépendante du fichier (qui peut ensuite
+        être remplacé ou fermé) : les sections déjà décodées sont reprises, les
+        autres ne le seront qu'au premier accès.
+        """
+        copy = object.__new__(Snapshot)
+        copy._mmap = bytes(self._mmap)
+        copy.revision, copy.fingerprint = self.revision, self.fingerprint
+        copy._sections = self._sections
+        copy._decoded = dict(self._decoded)
+        return copy
+
+    def _raw(self, tag):
+        """Octets d'une section"""
+        offset, length = self._sections[tag]
+        return self._mmap[offset:offset + length]
+
+    def _ints(self, tag, typecode):
+        """Section de tableau d'entiers convertie en liste"""
+        offset, length = self._sections[tag]
+        with memoryview(self._mmap) as view:
+            with view[offset:offset + length].cast(typecode) as values:
+                return values.tolist()
+
+    def _cached(self, key, decode):
+        """Décode une partie de l'instantané au premier accès"""
+        if key not in self._decoded:
+            self._decoded[key] = decode()
+        return self._decoded[key]
+
+    def _lookup(self, string_ids):
+        """Chaînes correspondant à une liste de numéros"""
+        return list(map(self.strings.__getitem__, string_ids))
+
+    @property
+    def meta(self):
+        """Métadonnées (base d'origine, dates)"""
+        return self._cached('meta', lambda: json.loads(self._raw(b"META").decode('utf-8')))
+
+    @property
+    def strings(self):
+        """Table des chaînes, décodée en une fois"""
+        return self._cached('strings', lambda: self._raw(b"STRS").decode('utf-8').split(STRING_SEPARATOR))
+
+    @property
+    def names(self):
+        """Noms des crafts dans l'ordre de l'instantané"""
+        return self._cached('names', lambda: self._lookup(self._ints(b"NAME", 'I')))
+
+    def table_data(self):
+        """
+        {nom: {'id', 'quantity', 'favorite', 'category'}} ; les quantités du plan
+        ne sont pas enregistrées (état de la session) et valent 0
+        """
+        def decode():
+            rows = zip(self.names, self.ids, self.favorites, self.categories)
+            return {name: {'id': craft_id, 'quantity': 0, 'favorite': bool(favorite), 'category': category}
+                    for name, craft_id, favorite, category in rows}
+        return self._cached('table_data', decode)
+
+    @property
+    def ids(self):
+        """Ids des crafts dans l'ordre de l'instantané"""
+        return self._cached('ids', lambda: self._ints(b"IDS ", 'q'))
+
+    @property
+    def categories(self):
+        """Catégorie de chaque craft dans l'ordre de l'instantané"""
+        return self._cached('categories', lambda: self._lookup(self._ints(b"CATG", 'I')))
+
+    @property
+    def favorites(self):
+        """Favoris (un octet 0/1 par craft) décodés du bitmap"""
+        def decode():
+            return bytearray(b"".join(map(_BITS.__getitem__, self._raw(b"FAVB")))[:len(self.names)])
+        return self._cached('favorites', decode)
+
+    def recipes(self):
+        """(recettes, variantes) au format de load_craft_recipes_from_db"""
+        def decode():
+            ingredients = self._lookup(self._ints(b"ESID", 'I'))
+            quantities = self._ints(b"EQTY", 'i')
+            entry_offsets = self._ints(b"EOFF", 'I')
+            recipe_list = [dict(zip(ingredients[start:end], quantities[start:end]))
+                           for start, end in zip(entry_offsets, entry_offsets[1:])]
+            variant_offsets = self._ints(b"VOFF", 'I')
+            recipes = {}
+            variants = {}
+            for name, start, end in zip(self.names, variant_offsets, variant_offsets[1:]):
+                recipes[name] = recipe_list[start] if end > start else {}
+                if end - start > 1:
+                    variants[name] = recipe_list[start:end]
+            return recipes, variants
+        return self._cached('recipes', decode)
+
+    def graph(self):
+        """Forme CraftGraph.to_dict() de l'analyse du graphe, ou None si absente"""
+        def decode():
+            if b"GORD" not in self._sections:
+                return None
+            order = self._lookup(self._ints(b"GORD", 'I'))
+            return {'order': order,
+                    'component': dict(zip(order, self._ints(b"GCMP", 'I'))),
+                    'depth': dict(zip(order, self._ints(b"GDEP", 'I'))),
+                    'cycles': json.loads(self._raw(b"GCYC").decode('utf-8'))}
+        return self._cached('graph', decode)
+
+    def views(self):
+        """Forme CraftViews.to_dict() des vues de l'interface, ou None si absentes"""
+        def decode():
+            if b"SKEY" not in self._sections:
+                return None
+            offsets = self._ints(b"CATO", 'I')
+            positions = self._ints(b"CATP", 'I')
+            buckets = {category: positions[start:end] for category, start, end
+                       in zip(self._lookup(self._ints(b"CATN", 'I')), offsets, offsets[1:])}
+            return {'order': self.names, 'keys': self._lookup(self._ints(b"SKEY", 'I')), 'ids': self.ids,
+                    'categories': self.categories, 'buckets': buckets, 'favorites': self.favorites}
+        return self._cached('views', decode)
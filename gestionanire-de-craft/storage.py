@@ -0,0 +1,190 @@
+"""
+Couche d'accès à SQLite partagée par init_db, craft_engine et l'interface.
+
+Chaque base possède un unique objet Storage (voir get_storage) qui garde une
+connexion ouverte par thread, avec un cache de requêtes préparées : basculer
+un favori ou enregistrer une modification ne paie plus l'ouverture de la
+connexion ni l'analyse du schéma à chaque opération.
+
+Les réglages SQLite (journal, synchronisation, cache, mmap) sont regroupés en
+profils nommés (voir PROFILES), choisis par paramètre ou par la variable
+d'environnement CRAFTS_DB_PROFILE :
+
+    CRAFTS_DB_PROFILE=fast python main.py
+
+Chaque connexion enregistre aussi la fonction SQL fold(texte), pour les requêtes
+et les migrations de l'application. Aucun déclencheur ne l'utilise : la base
+reste modifiable depuis une autre connexion (sqlite3, outils externes), les noms
+ainsi écrits étant normalisés par init_db.refresh_search_keys.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import unicodedata
+from contextlib import contextmanager
+
+DB_NAME = "Crafts.db"
+# Nombre de requêtes préparées conservées par connexion
+STATEMENT_CACHE_SIZE = 256
+
+# Profils de réglage SQLite. journal_mode est persistant (enregistré dans le
+# fichier) et n'est appliqué que par apply_profile ; les autres PRAGMA valent
+# pour une connexion et sont appliqués à chaque ouverture.
+#   default  : réglages d'origine de SQLite (journal de rollback, fsync complet)
+#   safe     : WAL, fsync à chaque validation ; les lectures ne bloquent plus les écritures
+#   balanced : WAL, fsync aux checkpoints seulement, cache et mmap plus larges
+#   fast     : WAL sans fsync ; une coupure de courant peut perdre les dernières écritures
+PROFILES = {
+    'default': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'cache_size': -2000,
+                'mmap_size': 0, 'temp_store': 'DEFAULT'},
+    'safe': {'journal_mode': 'WAL', 'synchronous': 'FULL', 'cache_size': -8000,
+             'mmap_size': 0, 'temp_store': 'MEMORY'},
+    'balanced': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -16000,
+                 'mmap_size': 64 * 1024 * 1024, 'temp_store': 'MEMORY'},
+    'fast': {'journal_mode': 'WAL', 'synchronous': 'OFF', 'cache_size': -64000,
+             'mmap_size': 256 * 1024 * 1024, 'temp_store': 'MEMORY'},
+}
+DEFAULT_PROFILE = "balanced"
+PROFILE_ENV = "CRAFTS_DB_PROFILE"
+
+def fold(text):
+    """Forme de recherche d'un texte : minuscules et sans accents (« Étoile » -> « etoile »)"""
+    if text is None:
+        return None
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def resolve_profile(profile=None):
+    """Nom du profil à utiliser : paramètre, sinon variable d'environnement, sinon DEFAULT_PROFILE"""
+    name = profile or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        print(f"Profil SQLite inconnu : {name} (profils : {', '.join(PROFILES)}), utilisation de {DEFAULT_PROFILE}", file=sys.stderr)
+        name = DEFAULT_PROFILE
+    return name
+
+class Storage:
+    """Connexions SQLite longue durée (une par thread) vers une base donnée"""
+
+    def __init__(self, db_name=DB_NAME, profile=None):
+        self.db_name = db_name
+        self.profile = resolve_profile(profile)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connection(self):
+        """Retourne la connexion du thread courant (ouverte au premier appel)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, cached_statements=STATEMENT_CACHE_SIZE)
+            conn.create_function("fold", 1, fold, deterministic=True)
+            self._configure(conn)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _configure(self, conn):
+        """Applique les PRAGMA de connexion du profil"""
+        settings = PROFILES[self.profile]
+        for pragma in ('synchronous', 'cache_size', 'mmap_size', 'temp_store'):
+            conn.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+
+    def apply_profile(self):
+        """
+        Applique le profil complet, y compris le mode de journal enregistré dans
+        le fichier. Doit être appelé hors transaction ; retourne le mode obtenu.
+        """
+        conn = self.connection()
+        self._configure(conn)
+        mode = conn.execute(f"PRAGMA journal_mode = {PROFILES[self.profile]['journal_mode']}").fetchone()[0]
+        return mode
+
+    def execute(self, sql, params=()):
+        """Exécute une requête et retourne le curseur"""
+        return self.connection().execute(sql, params)
+
+    def executemany(self, sql, rows):
+        """Exécute une requête pour chaque ligne de `rows`"""
+        return self.connection().executemany(sql, rows)
+
+    def query_all(self, sql, params=()):
+        """Exécute une requête de lecture et retourne toutes les lignes"""
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        """Exécute une requête de lecture et retourne la première ligne (ou None)"""
+        return self.connection().execute(sql, params).fetchone()
+
+    def change_counter(self):
+        """
+        Compteur de modifications vu par la connexion du thread courant, sans lire
+        aucune table : PRAGMA data_version change quand une autre connexion valide
+        une écriture, total_changes compte celles de cette connexion. Une valeur
+        inchangée garantit que la base n'a pas été modifiée entre-temps (les
+        compteurs étant propres à une connexion, celle-ci fait partie de la valeur).
+        """
+        conn = self.connection()
+        return id(conn), conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    @contextmanager
+    def transaction(self):
+        """
+        Ouvre une transaction sur la connexion du thread courant et fournit un curseur.
+        Validée à la sortie du bloc, annulée si une exception est levée.
+        """
+        conn = self.connection()
+        with conn:
+            yield conn.cursor()
+
+    def close(self):
+        """Ferme toutes les connexions ouvertes par cet objet"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connexion créée par un autre thread : fermée par celui-ci (close_thread)
+                pass
+        self._local = threading.local()
+
+    def close_thread(self):
+        """Ferme la connexion du thread courant (à appeler avant la fin d'un thread de travail)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+def get_storage(db_name=DB_NAME, profile=None):
+    """
+    Retourne l'objet Storage partagé d'une base (créé au premier appel).
+    Le profil n'est pris en compte qu'à la création.
+    """
+    with _storages_lock:
+        storage = _storages.get(db_name)
+        if storage is None:
+            storage = _storages[db_name] = Storage(db_name, profile)
+        return storage
+
+def close_all():
+    """Ferme les connexions de toutes les bases ouvertes"""
+    with _storages_lock:
+        storages = list(_storages.values())
+    for storage in storages:
+        storage.close()
+
+def close_thread():
+    """Ferme les connexions du thread courant vers toutes les bases"""
+    with _storages_lock:
+        storages = list(_storages.values())
+    for storage in storages:
+        storage.close_thread()
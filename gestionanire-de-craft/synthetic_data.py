@@ -0,0 +1,116 @@
+"""
+Générateur de bases de crafts synthétiques pour les benchmarks.
+
+Produit des fichiers au format de Crafts.db avec un nombre de crafts donné,
+un éventail d'ingrédients réaliste et des recettes sur plusieurs niveaux
+(les crafts d'un niveau utilisent des matériaux de base et des crafts des
+niveaux inférieurs, comme « Bandage stérilisé » -> « Bandage » -> « Tissu déchiré »).
+
+    python synthetic_data.py --crafts 10000 --out bench_data/crafts_10k.db
+    python synthetic_data.py --all --out-dir bench_data
+"""
+import argparse
+import os
+import random
+import time
+
+from craft_engine import VALID_CATEGORIES
+from init_db import App
+from storage import get_storage
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+# Nombre d'ingrédients par recette et poids associés (la plupart des recettes en ont 2 ou 3)
+FAN_OUT = [1, 2, 3, 4, 5, 6]
+FAN_OUT_WEIGHTS = [10, 35, 30, 15, 7, 3]
+# Quantités par ingrédient (surtout 1)
+QUANTITIES = [1, 2, 3, 4, 5, 10]
+QUANTITY_WEIGHTS = [60, 15, 10, 7, 5, 3]
+
+def generate_crafts(n_crafts, depth=5, seed=42, variant_ratio=0.05, favorite_ratio=0.05):
+    """
+    Produit au fil de l'eau des tuples (nom, catégorie, favori, [recettes]) où chaque
+    recette est une liste de (nom_ingrédient, quantité).
+
+    Les crafts sont répartis sur `depth` niveaux ; un craft de niveau L mélange des
+    matériaux de base et des crafts des niveaux 0..L-1, ce qui garantit un graphe
+    sans cycle de profondeur `depth`.
+    """
+    rng = random.Random(seed)
+    n_materials = max(50, n_crafts // 4)
+    per_level = max(1, n_crafts // depth)
+
+    def pick_recipe(index):
+        level = min(index // per_level, depth - 1)
+        lower_crafts = level * per_level
+        recipe = {}
+        for _ in range(rng.choices(FAN_OUT, FAN_OUT_WEIGHTS)[0]):
+            if lower_crafts and rng.random() < 0.4:
+                name = f"Craft {rng.randrange(lower_crafts)}"
+            else:
+                name = f"Matériau {rng.randrange(n_materials)}"
+            recipe[name] = rng.choices(QUANTITIES, QUANTITY_WEIGHTS)[0]
+        return list(recipe.items())
+
+    for index in range(n_crafts):
+        recipes = [pick_recipe(index)]
+        if rng.random() < variant_ratio:
+            recipes.append(pick_recipe(index))
+        yield (f"Craft {index}", rng.choice(VALID_CATEGORIES), int(rng.random() < favorite_ratio), recipes)
+
+def build_database(path, n_crafts, depth=5, seed=42):
+    """Crée (ou remplace) une base synthétique de `n_crafts` crafts et retourne sa durée de génération"""
+    storage = get_storage(path)
+    storage.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    start = time.perf_counter()
+    app = App(path)
+    app.fn_init_db()
+    favorites = []
+
+    def rows():
+        for name, category, favorite, recipes in generate_crafts(n_crafts, depth, seed):
+            if favorite:
+                favorites.append(name)
+            for recipe in recipes:
+                yield name, category, recipe
+
+    app.add_crafts_bulk(rows())
+    with storage.transaction() as cursor:
+        craft_ids = dict(cursor.execute("SELECT name, id FROM Craft"))
+        cursor.executemany("UPDATE Craft SET favorite = 1 WHERE id = ?", ((craft_ids[name],) for name in favorites))
+    storage.close()
+    return time.perf_counter() - start
+
+def database_path(out_dir, size_label):
+    """Chemin conventionnel d'une base synthétique (ex: bench_data/crafts_10k.db)"""
+    return os.path.join(out_dir, f"crafts_{size_label}.db")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des bases de crafts synthétiques")
+    parser.add_argument("--crafts", type=int, help="Nombre de crafts à générer")
+    parser.add_argument("--out", help="Fichier de sortie (avec --crafts)")
+    parser.add_argument("--all", action="store_true", help="Génère les tailles " + ", ".join(SIZES))
+    parser.add_argument("--out-dir", default="bench_data", help="Dossier de sortie pour --all (défaut : %(default)s)")
+    parser.add_argument("--depth", type=int, default=5, help="Profondeur des recettes (défaut : %(default)s)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (défaut : %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.all:
+        targets = [(database_path(args.out_dir, label), count) for label, count in SIZES.items()]
+    elif args.crafts and args.out:
+        targets = [(args.out, args.crafts)]
+    else:
+        parser.error("indiquer --crafts et --out, ou --all")
+
+    for path, count in targets:
+        elapsed = build_database(path, count, args.depth, args.seed)
+        print(f"{path} : {count} crafts générés en {elapsed:.1f} s")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,38 @@
+"""Fixtures communes : bases et caches temporaires, un fichier par test."""
+import os
+import sys
+
+import pytest
+
+# Les modules de l'application sont importés par leur nom, comme depuis main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from craft_engine import CraftEngine
+from init_db import bootstrap
+from storage import get_storage
+
+@pytest.fixture
+def db_name(tmp_path):
+    """Base préparée par bootstrap et remplie avec SEED_CRAFTS"""
+    name = str(tmp_path / "Crafts.db")
+    bootstrap(name)
+    yield name
+    get_storage(name).close()
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "craft_cache.bin")
+
+@pytest.fixture
+def make_engine(db_name, cache_file):
+    """Crée des moteurs sur la même base et le même cache (un nouveau lancement par appel)"""
+    engines = []
+
+    def make():
+        engine = CraftEngine(db_name, cache_file=cache_file)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.close()
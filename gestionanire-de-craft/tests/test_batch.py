@@ -0,0 +1,59 @@
+"""Évaluation de plans par lots (evaluate_plans, commande batch)."""
+import io
+import json
+
+import pytest
+
+from craft_engine import ResourceMatrix, evaluate_plans, main, parse_plan, read_plans
+
+MATRIX = ResourceMatrix({"Porte": {"Bûche": 2, "Clou": 8}, "Planche": {"Bûche": 1}})
+
+def test_parse_plan():
+    assert parse_plan(" Porte=3, Planche ,Porte=1,") == {"Porte": 4, "Planche": 1}
+    with pytest.raises(ValueError):
+        parse_plan("Porte=trois")
+
+def test_read_plans_reports_line_numbers(capsys):
+    errors = []
+    plans = list(read_plans(io.StringIO("Porte=1\n\nPorte=x\nPlanche=2\n"), errors))
+    assert plans == [{"Porte": 1}, None, {"Planche": 2}]
+    assert errors == [3]
+    assert "Ligne 3" in capsys.readouterr().err
+
+def test_results_are_streamed():
+    read = []
+
+    def plans():
+        for qty in range(1, 4):
+            read.append(qty)
+            yield {"Planche": qty}
+
+    results = evaluate_plans(MATRIX, plans(), parallel_threshold=100)
+    assert next(results) == {"Bûche": 1}
+    # Un seul plan lu pour produire le premier résultat
+    assert read == [1]
+    assert list(results) == [{"Bûche": 2}, {"Bûche": 3}]
+
+def test_parallel_keeps_order():
+    plans = [{"Porte": qty} if qty % 5 else None for qty in range(1, 40)]
+    expected = [MATRIX.resolve(plan) if plan is not None else None for plan in plans]
+    assert list(evaluate_plans(MATRIX, plans, workers=2, chunk_size=4, parallel_threshold=10)) == expected
+
+def test_cli_output_is_only_json_on_a_new_database(tmp_path, capsys):
+    """Les messages de préparation de la base vont sur stderr, pas dans la sortie JSON"""
+    db_name = str(tmp_path / "Nouvelle.db")
+    assert main(["--db", db_name, "--cache", str(tmp_path / "cache.bin"), "plan", "Porte=2", "--json"]) == 0
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 1
+    assert json.loads(captured.out)["Clou"] == 16
+    assert "Migration" in captured.err
+
+def test_cli_continues_after_invalid_line(db_name, cache_file, tmp_path, capsys):
+    path = tmp_path / "plans.txt"
+    path.write_text("Porte=2\nPorte=deux\n\nBandage=1\n", encoding="utf-8")
+    assert main(["--db", db_name, "--cache", cache_file, "batch", str(path), "--workers", "1"]) == 1
+    captured = capsys.readouterr()
+    lines = [json.loads(line) for line in captured.out.splitlines()]
+    assert len(lines) == 3
+    assert lines[0] and lines[1] is None and lines[2]
+    assert "Ligne 2" in captured.err
@@ -0,0 +1,127 @@
+"""Cache disque : instantané puis journal de correctifs (CraftCache)."""
+import json
+
+from craft_engine import apply_patch
+from init_db import App
+from storage import get_storage
+
+def set_favorite(db_name, name, favorite):
+    with get_storage(db_name).transaction() as cursor:
+        cursor.execute("UPDATE Craft SET favorite = ? WHERE name = ?", (int(favorite), name))
+
+def set_category(db_name, name, category):
+    with get_storage(db_name).transaction() as cursor:
+        cursor.execute("UPDATE Craft SET category = ? WHERE name = ?", (category, name))
+
+def cached_engine(make_engine):
+    """Premier lancement : instantané écrit avant de continuer"""
+    engine = make_engine()
+    assert engine.load() == "db"
+    engine.cache_manager.flush()
+    return engine
+
+def journal_lines(engine):
+    with open(engine.cache_manager.patch_file, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+def test_second_launch_uses_snapshot(make_engine):
+    engine = cached_engine(make_engine)
+    relaunched = make_engine()
+    assert relaunched.load() == "cache"
+    assert relaunched.craft_recipes == engine.craft_recipes
+    assert relaunched.craft_variants == engine.craft_variants
+    assert relaunched.views.order == engine.views.order
+
+def test_graph_and_views_are_decoded_on_first_access(db_name, make_engine):
+    engine = cached_engine(make_engine)
+    set_favorite(db_name, "Porte", True)
+    engine.sync()
+
+    relaunched = make_engine()
+    assert relaunched.load() == "cache"
+    assert relaunched._graph_loader is not None and relaunched._views_loader is not None
+    assert relaunched._resources is None
+    assert relaunched.graph.order == engine.graph.order
+    assert relaunched._views_loader is not None
+    # Favori du journal relu au décodage des vues
+    assert relaunched.views.favorites == engine.views.favorites
+    assert relaunched.resolve_plan({"Porte": 2}) == engine.resolve_plan({"Porte": 2})
+
+def test_journal_is_replayed(db_name, make_engine):
+    engine = cached_engine(make_engine)
+    set_favorite(db_name, "Porte", True)
+    assert engine.sync() == 1
+    App(db_name).add_craft("Tabouret", [("Planche", 3), ("Clou", 4)], "Menuiserie")
+    assert engine.sync() == 1
+    assert len(journal_lines(engine)) == 3
+
+    recipes, table_data, variants, graph, views, revision = make_engine().cache_manager.load_from_cache()
+    assert revision == engine.revision
+    assert table_data["Porte"]['favorite'] is True
+    assert recipes["Tabouret"] == {"Planche": 3, "Clou": 4}
+    assert table_data["Tabouret"]['category'] == "Menuiserie"
+    # Recettes modifiées par le journal : graphe et vues à reconstruire
+    assert graph is None and views is None
+
+def test_torn_line_stops_replay(db_name, make_engine):
+    engine = cached_engine(make_engine)
+    set_favorite(db_name, "Porte", True)
+    engine.sync()
+    set_favorite(db_name, "Bandage", True)
+    engine.sync()
+    lines = journal_lines(engine)
+    # Arrêt brutal pendant l'ajout de la dernière ligne
+    with open(engine.cache_manager.patch_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines[:2]) + "\n" + lines[2][:len(lines[2]) // 2])
+
+    table_data, revision = make_engine().cache_manager.load_from_cache()[1::4]
+    assert revision == engine.revision - 1
+    assert table_data["Porte"]['favorite'] is True
+    assert table_data["Bandage"]['favorite'] is False
+
+    # La modification perdue est relue dans ChangeLog, et le journal réparé avant l'ajout suivant
+    relaunched = make_engine()
+    assert relaunched.load() == "cache"
+    assert relaunched.table_data["Bandage"]['favorite'] is True
+    set_favorite(db_name, "Porte", False)
+    relaunched.sync()
+    assert all(json.loads(line) for line in journal_lines(relaunched))
+    assert make_engine().cache_manager.load_from_cache()[-1] == relaunched.revision
+
+def test_journal_of_another_snapshot_is_ignored(db_name, make_engine):
+    engine = cached_engine(make_engine)
+    set_favorite(db_name, "Porte", True)
+    engine.sync()
+    with open(engine.cache_manager.patch_file, 'r+', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+        header = json.loads(lines[0])
+        header['base'] += 1
+        f.seek(0)
+        f.truncate()
+        f.write("\n".join([json.dumps(header)] + lines[1:]) + "\n")
+    table_data, revision = make_engine().cache_manager.load_from_cache()[1::4]
+    assert revision == engine.revision - 1
+    assert table_data["Porte"]['favorite'] is False
+
+def test_replay_keeps_plan_quantities(db_name, make_engine):
+    engine = cached_engine(make_engine)
+    engine.set_quantity("Porte", 5)
+    set_category(db_name, "Porte", "Survie")
+    engine.sync()
+    assert engine.table_data["Porte"]['quantity'] == 5
+    assert all('quantity' not in patch[2] for line in journal_lines(engine)[1:]
+               for patch in json.loads(line)['patches'] if patch[0] == 'craft')
+
+    relaunched = make_engine()
+    assert relaunched.load() == "cache"
+    assert relaunched.table_data["Porte"]['category'] == "Survie"
+    assert relaunched.current_plan() == {}
+
+def test_apply_patch_keeps_quantity_in_memory():
+    recipes = {"Porte": {"Planche": 4}}
+    table_data = {"Porte": {'id': 1, 'quantity': 3, 'favorite': False, 'category': "Général"}}
+    variants = {}
+    patch = ['craft', "Porte", {'id': 1, 'favorite': True, 'category': "Menuiserie"}, {"Planche": 5}, None]
+    assert apply_patch(patch, recipes, table_data, variants) is True
+    assert table_data["Porte"] == {'id': 1, 'quantity': 3, 'favorite': True, 'category': "Menuiserie"}
+    assert recipes["Porte"] == {"Planche": 5}
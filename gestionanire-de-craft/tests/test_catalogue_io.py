@@ -0,0 +1,60 @@
+"""Import et export du catalogue (catalogue_io)."""
+import os
+
+import pytest
+
+from catalogue_io import export_catalogue, import_catalogue, main
+from craft_engine import load_craft_recipes_from_db
+from storage import get_storage
+
+def test_export_requires_an_existing_database(tmp_path):
+    missing = str(tmp_path / "Absente.db")
+    with pytest.raises(FileNotFoundError):
+        export_catalogue(str(tmp_path / "catalogue.jsonl"), missing)
+    assert not os.path.exists(missing)
+
+def test_cli_reports_a_missing_database(tmp_path, capsys):
+    missing = str(tmp_path / "Absente.db")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--db", missing, "export", str(tmp_path / "catalogue.csv")])
+    assert exit_info.value.code == 2
+    assert "introuvable" in capsys.readouterr().err
+    assert not os.path.exists(missing)
+
+@pytest.mark.parametrize("extension", [".csv", ".jsonl"])
+def test_round_trip(db_name, tmp_path, extension):
+    path = str(tmp_path / ("catalogue" + extension))
+    exported = export_catalogue(path, db_name)
+    copy = str(tmp_path / "Copie.db")
+    assert import_catalogue(path, copy) == exported
+    (recipes, table_data, variants), original = load_craft_recipes_from_db(copy), load_craft_recipes_from_db(db_name)
+    assert (recipes, variants) == (original[0], original[2])
+    # Les ids sont propres à chaque base
+    assert {name: dict(data, id=0) for name, data in table_data.items()} == \
+        {name: dict(data, id=0) for name, data in original[1].items()}
+    get_storage(copy).close()
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_repeated_recipe_is_rejected(db_name, tmp_path, chunk_size):
+    path = tmp_path / "catalogue.csv"
+    path.write_text("craft,variant,ingredient,quantity\n"
+                    "Tabouret,0,Planche,3\n"
+                    "Tabouret,0,Clou,4\n"
+                    "Chaise,0,Planche,5\n"
+                    "Tabouret,0,Vis,2\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Tabouret"):
+        import_catalogue(str(path), db_name, chunk_size=chunk_size)
+    # Import tout ou rien : la base est inchangée
+    recipes = load_craft_recipes_from_db(db_name)[0]
+    assert "Tabouret" not in recipes and "Chaise" not in recipes
+
+def test_consecutive_rows_form_one_recipe(db_name, tmp_path):
+    path = tmp_path / "catalogue.csv"
+    path.write_text("craft,variant,ingredient,quantity\n"
+                    "Tabouret,0,Planche,3\n"
+                    "Tabouret,0,Clou,4\n"
+                    "Tabouret,1,Bûche,2\n", encoding="utf-8")
+    assert import_catalogue(str(path), db_name, chunk_size=1) == 2
+    recipes, _, variants = load_craft_recipes_from_db(db_name)
+    assert recipes["Tabouret"] == {"Planche": 3, "Clou": 4}
+    assert variants["Tabouret"] == [{"Planche": 3, "Clou": 4}, {"Bûche": 2}]
@@ -0,0 +1,41 @@
+"""Index inversé ingrédient -> crafts (« utilisé dans »)."""
+from craft_engine import IngredientIndex, get_crafts_using_ingredient
+from init_db import App
+
+RECIPES = {
+    "Porte": {"Planche": 4, "Clou": 8},
+    "Chaise": {"Planche": 6, "Clou": 20},
+    "attelle": {"Planche": 1, "Tissu déchiré": 1},
+    "Bandage": {"Tissu déchiré": 1, "Eau": 1},
+}
+
+def test_used_in_is_sorted_without_case():
+    index = IngredientIndex(RECIPES)
+    assert index.used_in("Planche") == ["attelle", "Chaise", "Porte"]
+    assert index.used_in("Eau") == ["Bandage"]
+    assert index.used_in("Inconnu") == []
+
+def test_search_ignores_accents_and_case():
+    index = IngredientIndex(RECIPES)
+    assert index.search("DECHIRE") == {"attelle", "Bandage"}
+    assert index.search("clou") == {"Porte", "Chaise"}
+    assert index.search("fer") == set()
+
+def test_add_and_remove_keep_index_in_step():
+    index = IngredientIndex(RECIPES)
+    index.remove_craft("Bandage", RECIPES["Bandage"])
+    assert "Eau" not in index.crafts
+    assert index.used_in("Tissu déchiré") == ["attelle"]
+    index.add_craft("Tabouret", {"Planche": 3, "Eau": 1})
+    assert index.used_in("Eau") == ["Tabouret"]
+    assert "Tabouret" in index.used_in("Planche")
+
+def test_engine_index_matches_sql(db_name, make_engine):
+    engine = make_engine()
+    engine.load()
+    for ingredient in ("Planche", "Eau", "Tissu déchiré"):
+        assert set(engine.get_crafts_using(ingredient)) == set(get_crafts_using_ingredient(ingredient, db_name))
+    # Index mis à jour par sync
+    App(db_name).add_craft("Tabouret", [("Pied de tabouret", 3)])
+    engine.sync()
+    assert engine.get_crafts_using("Pied de tabouret") == ["Tabouret"]
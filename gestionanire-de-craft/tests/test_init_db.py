@@ -0,0 +1,43 @@
+"""Écritures de init_db.App (ajout unitaire et en masse)."""
+from init_db import App
+from storage import get_storage
+
+def test_bulk_does_not_reuse_deleted_ids(db_name, make_engine):
+    storage = get_storage(db_name)
+    app = App(db_name)
+    app.add_craft("Tabouret", [("Pied de tabouret", 3)])
+    deleted_craft, deleted_ingredient = storage.query_one("""
+        SELECT Craft.id, Ingredient.id FROM Craft, Ingredient
+        WHERE Craft.name = 'Tabouret' AND Ingredient.name = 'Pied de tabouret'
+    """)
+    engine = make_engine()
+    engine.load()
+    with storage.transaction() as cursor:
+        cursor.execute("DELETE FROM CraftIngredient WHERE craft_id = ?", (deleted_craft,))
+        cursor.execute("DELETE FROM Craft WHERE id = ?", (deleted_craft,))
+        cursor.execute("DELETE FROM Ingredient WHERE id = ?", (deleted_ingredient,))
+
+    assert app.add_crafts_bulk([("Banc", "Menuiserie", [("Pied de banc", 4)])]) == 1
+    craft_id, ingredient_id = storage.query_one("""
+        SELECT Craft.id, Ingredient.id FROM Craft, Ingredient
+        WHERE Craft.name = 'Banc' AND Ingredient.name = 'Pied de banc'
+    """)
+    assert craft_id > deleted_craft and ingredient_id > deleted_ingredient
+    assert storage.query_one("SELECT seq FROM sqlite_sequence WHERE name = 'Craft'")[0] == craft_id
+    # Un id neuf : le journal ne confond pas le nouveau craft avec le craft supprimé
+    engine.sync()
+    assert "Tabouret" not in engine.table_data
+    assert engine.craft_recipes["Banc"] == {"Pied de banc": 4}
+    # Les ajouts suivants continuent après le lot
+    app.add_craft("Coffre", [("Planche", 6)])
+    assert storage.query_one("SELECT id FROM Craft WHERE name = 'Coffre'")[0] == craft_id + 1
+
+def test_bulk_adds_variants(db_name):
+    app = App(db_name)
+    crafts = [("Banc", "Menuiserie", [("Planche", 4)]), ("Banc", "Menuiserie", [("Bûche", 2)])]
+    assert app.add_crafts_bulk(crafts, chunk_size=1) == 2
+    rows = get_storage(db_name).query_all("""
+        SELECT variant FROM CraftIngredient
+        WHERE craft_id = (SELECT id FROM Craft WHERE name = 'Banc') ORDER BY variant
+    """)
+    assert rows == [(0,), (1,)]
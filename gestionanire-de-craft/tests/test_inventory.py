@@ -0,0 +1,52 @@
+"""Stock possédé : crafts réalisables et ingrédients manquants (Inventory)."""
+from craft_engine import CraftGraph, IngredientIndex, Inventory
+
+RECIPES = {
+    "Bandage": {"Tissu déchiré": 1, "Eau": 1},
+    "Tissu déchiré": {"Chiffon sale": 1, "Eau": 1},
+    "Attelle": {"Bandage": 2, "Bâton": 1},
+}
+
+def inventory(stock=None, recipes=RECIPES):
+    return Inventory(recipes, IngredientIndex(recipes), stock)
+
+def test_craftable_counts_use_direct_ingredients():
+    stock = inventory({"Tissu déchiré": 3, "Eau": 2})
+    assert stock.craftable_now() == {"Bandage": 2}
+
+def test_stock_updates_only_touch_affected_crafts():
+    stock = inventory()
+    assert stock.set_stock("Chiffon sale", 2) == {"Tissu déchiré": 0}
+    assert stock.set_stock("Eau", 5) == {"Bandage": 0, "Tissu déchiré": 2}
+    assert stock.set_stock("Bâton", 1) == {"Attelle": 0}
+    assert stock.set_stock("Bandage", 4) == {"Attelle": 1}
+    assert stock.craftable_now() == {"Tissu déchiré": 2, "Attelle": 1}
+    # Un stock remis à zéro est retiré et les crafts concernés repassent à 0
+    assert stock.set_stock("Eau", 0) == {"Bandage": 0, "Tissu déchiré": 0}
+    assert "Eau" not in stock.stock
+
+def test_owned_intermediate_is_not_resolved_again():
+    stock = inventory({"Tissu déchiré": 1})
+    graph = CraftGraph.analyze(RECIPES)
+    assert stock.max_craftable("Bandage") == 0
+    stock.set_stock("Eau", 1)
+    assert stock.max_craftable("Bandage") == 1
+    assert stock.plan_shortfall({"Bandage": 1}, graph) == {}
+    # Deux bandages : le tissu possédé couvre le premier, le second est fabriqué
+    assert stock.plan_shortfall({"Bandage": 2}, graph) == {"Chiffon sale": 1, "Eau": 2}
+
+def test_shortfall_without_stock_matches_resolved_plan(make_engine):
+    engine = make_engine()
+    engine.load()
+    engine.set_quantity("Porte", 2)
+    engine.set_quantity("Bandage", 3)
+    assert engine.get_plan_shortfall() == engine.calculate_resources_needed()
+    engine.set_stock("Tissu déchiré", 3)
+    shortfall = engine.get_plan_shortfall()
+    assert "Tissu déchiré" not in shortfall and "Chiffon sale" not in shortfall
+
+def test_cycle_members_are_not_expanded():
+    recipes = {"Lampe": {"Pile": 1, "Verre": 1}, "Pile": {"Lampe": 1, "Acide": 1}}
+    graph = CraftGraph.analyze(recipes)
+    assert inventory({}, recipes).plan_shortfall({"Lampe": 2}, graph) == {"Pile": 2, "Verre": 2}
+    assert inventory({"Pile": 1}, recipes).plan_shortfall({"Lampe": 2}, graph) == {"Pile": 1, "Verre": 2}
@@ -0,0 +1,109 @@
+"""Migrations du schéma (init_db.App.migrate)."""
+import os
+import sqlite3
+
+import pytest
+
+from craft_engine import CraftEngine
+from init_db import SCHEMA_VERSION, App, bootstrap, refresh_search_keys
+from storage import get_storage
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crafts_database.sql")
+
+@pytest.fixture
+def script_db(tmp_path):
+    """Base créée par le script de référence, sans PRAGMA user_version"""
+    name = str(tmp_path / "Script.db")
+    with open(SCRIPT, encoding='utf-8') as f, sqlite3.connect(name) as conn:
+        conn.executescript(f.read())
+    yield name
+    get_storage(name).close()
+
+def user_version(db_name):
+    return get_storage(db_name).query_one("PRAGMA user_version")[0]
+
+def objects(db_name, kind):
+    return {name for (name,) in get_storage(db_name).query_all(
+        "SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+def test_empty_database(tmp_path):
+    name = str(tmp_path / "Empty.db")
+    app = App(name)
+    assert app.migrate() == SCHEMA_VERSION
+    assert user_version(name) == SCHEMA_VERSION
+    assert {"Craft", "Ingredient", "CraftIngredient", "ChangeLog", "DatabaseInfo", "SearchQueue"} <= objects(name, 'table')
+    assert {f"searchqueue_{source}_{event}" for source in ("craft", "ingredient")
+            for event in ("insert", "rename")} <= objects(name, 'trigger')
+    # Aucun déclencheur n'appelle fold()
+    triggers = get_storage(name).query_all("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+    assert triggers and all("fold(" not in sql for _, sql in triggers)
+    # Relancer ne refait rien
+    assert app.migrate() == SCHEMA_VERSION
+    get_storage(name).close()
+
+def test_script_database_is_migrated_and_seeded(script_db):
+    assert user_version(script_db) == 0
+    bootstrap(script_db)
+    assert user_version(script_db) == SCHEMA_VERSION
+    engine = CraftEngine(script_db, use_cache=False)
+    engine.load()
+    assert "Porte" in engine.table_data
+    App(script_db).add_craft("Tabouret", [("Planche", 3)])
+    assert engine.sync() == 1
+    assert "Tabouret" in engine.table_data
+
+def test_old_database_keeps_its_data(tmp_path):
+    name = str(tmp_path / "Old.db")
+    with sqlite3.connect(name) as conn:
+        conn.executescript("""
+            CREATE TABLE Craft (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, favorite INTEGER DEFAULT 0);
+            CREATE TABLE Ingredient (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE);
+            CREATE TABLE CraftIngredient (id INTEGER PRIMARY KEY AUTOINCREMENT, craft_id INTEGER NOT NULL,
+                                          ingredient_id INTEGER NOT NULL, quantity INTEGER NOT NULL DEFAULT 1);
+            INSERT INTO Craft (name, favorite) VALUES ('Échelle', 1);
+            INSERT INTO Ingredient (name) VALUES ('Planche');
+            INSERT INTO CraftIngredient (craft_id, ingredient_id, quantity) VALUES (1, 1, 6);
+        """)
+    bootstrap(name)
+    assert user_version(name) == SCHEMA_VERSION
+    engine = CraftEngine(name, use_cache=False)
+    engine.load()
+    # Base non vide : pas de recettes d'exemple ajoutées
+    assert engine.craft_recipes == {"Échelle": {"Planche": 6}}
+    assert engine.table_data["Échelle"]['category'] == "Général"
+    assert engine.table_data["Échelle"]['favorite'] is True
+    assert get_storage(name).query_one("SELECT sort_key FROM Craft")[0] == "echelle"
+    assert engine.search_crafts("eche") == {"Échelle"}
+    get_storage(name).close()
+
+def test_writes_from_another_connection(db_name):
+    """Une connexion sans la fonction fold() peut écrire ; l'index est complété ensuite"""
+    with sqlite3.connect(db_name) as conn:
+        conn.execute("INSERT INTO Craft (name, category) VALUES ('Étagère', 'Menuiserie')")
+        conn.execute("UPDATE Ingredient SET name = 'Clou rouillé' WHERE name = 'Clou'")
+    conn.close()
+    storage = get_storage(db_name)
+    with storage.transaction() as cursor:
+        assert refresh_search_keys(cursor) == 2
+    assert storage.query_one("SELECT sort_key FROM Craft WHERE name = 'Étagère'")[0] == "etagere"
+    assert storage.query_one("SELECT COUNT(*) FROM SearchQueue")[0] == 0
+    engine = CraftEngine(db_name, use_cache=False)
+    engine.load()
+    assert "Étagère" in engine.search_crafts("etage")
+    assert engine.search_ingredients("rouill") == {"Clou rouillé"}
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    name = str(tmp_path / "Broken.db")
+    app = App(name)
+
+    def broken(cursor):
+        cursor.execute("CREATE TABLE Partial (id INTEGER)")
+        raise sqlite3.OperationalError("échec simulé")
+
+    migrations = app._migrations()
+    monkeypatch.setattr(app, "_migrations", lambda: migrations[:1] + [(2, broken)])
+    with pytest.raises(sqlite3.OperationalError):
+        app.migrate()
+    assert user_version(name) == 1
+    assert "Partial" not in objects(name, 'table')
+    get_storage(name).close()
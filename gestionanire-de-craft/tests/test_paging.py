@@ -0,0 +1,50 @@
+"""Pagination de la liste des crafts : vues en mémoire et requête SQL (avant load())."""
+import pytest
+
+from craft_engine import CraftEngine
+from storage import get_storage
+
+FILTERS = [
+    {},
+    {'category': "Menuiserie"},
+    {'favorites_only': True},
+    {'category': "Premiers Secours", 'favorites_only': True},
+    {'search_term': "bandage"},
+    {'search_term': "ÉTA"},
+    {'search_term': "ba"},
+    {'search_term': "planche", 'search_mode': "Ingrédient"},
+    {'search_term': "eau", 'search_mode': "Ingrédient", 'category': "Premiers Secours"},
+]
+
+def all_pages(engine, limit, **filters):
+    names, after = [], None
+    while True:
+        page, after = engine.page_crafts(after, limit, **filters)
+        names.extend(page)
+        if after is None:
+            return names
+
+@pytest.fixture
+def engines(db_name, cache_file):
+    with get_storage(db_name).transaction() as cursor:
+        cursor.execute("UPDATE Craft SET favorite = 1 WHERE id % 3 = 0")
+    loaded = CraftEngine(db_name, cache_file=cache_file)
+    loaded.load()
+    unloaded = CraftEngine(db_name, use_cache=False)
+    yield loaded, unloaded
+    loaded.close()
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_sql_pages_match_views(engines, filters):
+    loaded, unloaded = engines
+    assert unloaded.views is None
+    expected = all_pages(loaded, 7, **filters)
+    assert expected
+    assert all_pages(unloaded, 7, **filters) == expected
+    assert sorted(expected) == sorted(loaded.sort_crafts(loaded.filter_crafts(**filters)))
+
+def test_cursors_are_interchangeable(engines):
+    loaded, unloaded = engines
+    first, after = unloaded.page_crafts(limit=5)
+    second, _ = loaded.page_crafts(after, 5)
+    assert first + second == loaded.page_crafts(limit=10)[0]
@@ -0,0 +1,140 @@
+"""Résolution des plans : matrice des ressources et mémoïsation (PlanMemo)."""
+import random
+
+import pytest
+
+import craft_engine
+from craft_engine import PlanMemo, ResourceMatrix, RunningTotals
+from init_db import App
+
+BASE_VECTORS = {
+    "Porte": {"Bûche": 2, "Clou": 8},
+    "Planche": {"Bûche": 1},
+    "Établi": {"Bûche": 5, "Clou": 20},
+}
+
+@pytest.fixture(params=["numpy", "python"])
+def without_numpy(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(craft_engine, "np", None)
+    elif craft_engine.np is None:
+        pytest.skip("NumPy absent")
+
+def test_dense_and_sparse_plans_agree(without_numpy, monkeypatch):
+    matrix = ResourceMatrix(BASE_VECTORS)
+    plan = {"Porte": 2, "Établi": 1, "Inconnu": 3, "Planche": 0}
+    expected = {"Bûche": 9, "Clou": 36}
+    assert matrix.resolve(plan) == expected
+    monkeypatch.setattr(craft_engine, "DENSE_PLAN_RATIO", 0)
+    assert matrix.total(plan) == expected
+
+def test_matrix_rows_and_multiply(without_numpy):
+    matrix = ResourceMatrix(BASE_VECTORS)
+    assert list(matrix.craft_ids) == list(BASE_VECTORS)
+    for craft, vector in BASE_VECTORS.items():
+        assert dict(matrix.row(matrix.craft_ids[craft])) == vector
+    quantities = matrix.plan_vector()
+    assert len(quantities) == len(BASE_VECTORS) and not any(quantities)
+    quantities[matrix.craft_ids["Planche"]] = 3
+    quantities[matrix.craft_ids["Établi"]] = 2
+    assert matrix.multiply(quantities) == {"Bûche": 13, "Clou": 40}
+    assert matrix.multiply(matrix.plan_vector()) == {}
+
+def test_matrix_total_reuses_given_vector(monkeypatch):
+    if craft_engine.np is None:
+        pytest.skip("NumPy absent")
+    matrix = ResourceMatrix(BASE_VECTORS)
+    monkeypatch.setattr(craft_engine, "DENSE_PLAN_RATIO", 0)
+    quantities = matrix.plan_vector()
+    quantities[matrix.craft_ids["Porte"]] = 1
+    # Plan dense : le vecteur fourni est multiplié tel quel
+    assert matrix.total({"Porte": 1}, quantities) == {"Bûche": 2, "Clou": 8}
+    monkeypatch.setattr(craft_engine, "DENSE_PLAN_RATIO", 1.1)
+    # Plan creux : seules les lignes du plan sont lues
+    assert matrix.total({"Établi": 1}, quantities) == {"Bûche": 5, "Clou": 20}
+
+def test_running_totals_report_changed_resources(without_numpy):
+    totals = RunningTotals(ResourceMatrix(BASE_VECTORS))
+    assert totals.set_quantity("Porte", 2) == {"Bûche", "Clou"}
+    assert totals.set_quantity("Planche", 1) == {"Bûche"}
+    assert totals.totals == {"Bûche": 5, "Clou": 16}
+    # Quantité inchangée ou craft inconnu : rien ne change
+    assert totals.set_quantity("Planche", 1) == set()
+    assert totals.set_quantity("Inconnu", 4) == set()
+    # Un total revenu à zéro est retiré ; une quantité négative compte pour zéro
+    assert totals.set_quantity("Porte", -3) == {"Bûche", "Clou"}
+    assert totals.totals == {"Bûche": 1}
+    assert totals.plan == {"Planche": 1}
+    totals.reset()
+    assert totals.totals == {} and totals.plan == {}
+
+def test_engine_set_quantity_returns_changed_resources(make_engine):
+    engine = make_engine()
+    engine.load()
+    changed = engine.set_quantity("Porte", 2)
+    assert changed and changed == set(engine.calculate_resources_needed())
+    assert engine.set_quantity("Porte", 2) == set()
+    assert engine.set_quantity("Porte", 0) == changed
+    assert engine.calculate_resources_needed() == {}
+
+def test_engine_totals_match_resolve(db_name, make_engine, monkeypatch):
+    engine = make_engine()
+    engine.load()
+    rng = random.Random(0)
+    for craft in rng.sample(sorted(engine.craft_recipes), 60):
+        engine.set_quantity(craft, rng.randint(1, 9))
+    sparse = engine.resource_matrix.resolve(engine.current_plan())
+    monkeypatch.setattr(craft_engine, "DENSE_PLAN_RATIO", 0)
+    engine.plan_memo.clear()
+    assert engine.calculate_resources_needed() == sparse
+    monkeypatch.setattr(craft_engine, "DENSE_PLAN_RATIO", 1.1)
+    engine.plan_memo.clear()
+    assert engine.calculate_resources_needed() == sparse
+
+def test_memo_hits_and_invalidation(db_name, make_engine):
+    engine = make_engine()
+    engine.load()
+    engine.set_quantity("Porte", 2)
+    engine.set_quantity("Bandage", 1)
+    first = engine.calculate_resources_needed()
+    first["Planche"] = -1
+    assert engine.calculate_resources_needed() != first
+    assert engine.plan_memo.stats()['hits'] == 1
+
+    # Recette d'un autre craft : l'entrée reste valable
+    App(db_name).add_craft("Tabouret", [("Pied de tabouret", 3)])
+    engine.sync()
+    assert len(engine.plan_memo) == 1
+    # Nouvelle variante ajoutée à un craft du plan : l'entrée est retirée
+    engine.resolve_plan({"Tabouret": 1})
+    App(db_name).add_craft("Tabouret", [("Bûche", 1)])
+    engine.sync()
+    assert {"Tabouret": 1} not in engine.plan_memo
+    assert len(engine.plan_memo) == 1
+
+def test_memo_is_bounded():
+    memo = PlanMemo(maxsize=2)
+    matrix = ResourceMatrix(BASE_VECTORS)
+    for craft in BASE_VECTORS:
+        memo.get({craft: 1}, {}, matrix.total)
+    assert len(memo) == 2
+    assert {"Porte": 1} not in memo
+
+def test_large_plans_are_not_memoized():
+    memo = PlanMemo(max_plan_crafts=2)
+    matrix = ResourceMatrix(BASE_VECTORS)
+    plan = {craft: 1 for craft in BASE_VECTORS}
+    assert memo.get(plan, {}, matrix.total) == matrix.resolve(plan)
+    assert len(memo) == 0
+    memo.get({"Porte": 1, "Planche": 2}, {}, matrix.total)
+    assert len(memo) == 1
+
+def test_invalidation_keeps_unrelated_entries():
+    memo = PlanMemo()
+    matrix = ResourceMatrix(BASE_VECTORS)
+    recipes = {"Porte": {"Planche": 2, "Clou": 8}, "Planche": {"Bûche": 1}, "Établi": {"Bûche": 5}}
+    for plan in ({"Porte": 1}, {"Établi": 2}, {"Planche": 1, "Établi": 1}):
+        memo.get(plan, recipes, matrix.total)
+    assert memo.invalidate(["Planche"]) == 2
+    assert {"Établi": 2} in memo and len(memo) == 1
+    assert memo._dependents.keys() == {"Établi", "Bûche"}
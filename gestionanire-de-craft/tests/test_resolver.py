@@ -0,0 +1,54 @@
+"""Analyse du graphe des recettes et résolution jusqu'aux matériaux de base (RecipeResolver)."""
+from craft_engine import CraftGraph, RecipeResolver
+
+RECIPES = {
+    "Porte": {"Planche": 4, "Clou": 8},
+    "Planche": {"Bûche": 1},
+    "Étagère": {"Planche": 2, "Porte": 1},
+    # Cycle : chaque craft se défait en l'autre
+    "Paquet de graines": {"Graines": 50},
+    "Graines": {"Paquet de graines": 1},
+    "Potager": {"Graines": 10, "Planche": 2},
+}
+
+def test_order_puts_dependencies_first():
+    graph = CraftGraph.analyze(RECIPES)
+    assert sorted(graph.order) == sorted(RECIPES)
+    position = {craft: i for i, craft in enumerate(graph.order)}
+    assert position["Planche"] < position["Porte"] < position["Étagère"]
+    assert position["Graines"] < position["Potager"] and position["Planche"] < position["Potager"]
+    assert graph.depth == {"Planche": 1, "Porte": 2, "Étagère": 3,
+                           "Paquet de graines": 1, "Graines": 1, "Potager": 2}
+    assert graph.max_depth() == 3
+
+def test_cycle_is_reported_once():
+    graph = CraftGraph.analyze(RECIPES)
+    assert graph.component["Graines"] == graph.component["Paquet de graines"]
+    assert graph.component["Porte"] != graph.component["Planche"]
+    assert graph.cycles == [{'crafts': ["Graines", "Paquet de graines"],
+                             'edges': [["Graines", "Paquet de graines"], ["Paquet de graines", "Graines"]],
+                             'depth': 1}]
+
+def test_self_loop_is_a_cycle():
+    graph = CraftGraph.analyze({"Levain": {"Levain": 1, "Farine": 2}})
+    assert graph.cycles == [{'crafts': ["Levain"], 'edges': [["Levain", "Levain"]], 'depth': 1}]
+
+def test_cycle_members_stay_unexpanded():
+    resolver = RecipeResolver(RECIPES)
+    assert resolver.base_vectors["Étagère"] == {"Bûche": 6, "Clou": 8}
+    # Ingrédient du même cycle : traité comme un matériau de base
+    assert resolver.base_vectors["Graines"] == {"Paquet de graines": 1}
+    assert resolver.base_vectors["Paquet de graines"] == {"Graines": 50}
+    # Hors du cycle, le craft est développé avec son vecteur
+    assert resolver.base_vectors["Potager"] == {"Paquet de graines": 10, "Bûche": 2}
+
+def test_resolve_plan_skips_unknown_and_empty_crafts():
+    resolver = RecipeResolver(RECIPES)
+    plan = {"Porte": 2, "Planche": 3, "Inconnu": 5, "Étagère": 0}
+    assert resolver.resolve(plan) == {"Bûche": 11, "Clou": 16}
+
+def test_graph_round_trips_through_cache_form():
+    graph = CraftGraph.analyze(RECIPES)
+    restored = CraftGraph.from_dict(graph.to_dict())
+    assert restored.order == graph.order and restored.cycles == graph.cycles
+    assert RecipeResolver(RECIPES, restored).base_vectors == RecipeResolver(RECIPES).base_vectors
@@ -0,0 +1,70 @@
+"""Format binaire de l'instantané (snapshot)."""
+import pytest
+
+import snapshot
+from craft_engine import CraftGraph, CraftViews
+
+RECIPES = {
+    "Porte": {"Planche": 4, "Clou": 8},
+    "Établi": {"Planche": 10},
+    "Planche": {},
+}
+VARIANTS = {"Porte": [{"Planche": 4, "Clou": 8}, {"Planche": 6, "Colle": 1}]}
+TABLE_DATA = {
+    "Porte": {'id': 3, 'quantity': 2, 'favorite': True, 'category': "Maison"},
+    "Établi": {'id': 1, 'quantity': 0, 'favorite': False, 'category': "Atelier"},
+    "Planche": {'id': 2, 'quantity': 0, 'favorite': True, 'category': "Général"},
+}
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    graph = CraftGraph.analyze(RECIPES).to_dict()
+    views = CraftViews.build(TABLE_DATA).to_dict()
+    snapshot.write(path, RECIPES, TABLE_DATA, VARIANTS, graph, revision=7, fingerprint=2**63 + 5,
+                   meta={'db': "Crafts.db"}, views=views)
+
+    assert snapshot.read_header(path) == (7, 2**63 + 5)
+    with snapshot.Snapshot(path) as cache:
+        assert cache.recipes() == (RECIPES, VARIANTS)
+        assert cache.graph() == graph
+        assert cache.meta == {'db': "Crafts.db"}
+        assert CraftViews.from_dict(cache.views()).to_dict() == views
+        # Crafts écrits dans l'ordre d'affichage
+        assert cache.names == views['order']
+        table_data = cache.table_data()
+    assert set(table_data) == set(TABLE_DATA)
+    for name, data in TABLE_DATA.items():
+        assert table_data[name] == dict(data, quantity=0)
+
+def test_plan_quantities_are_not_stored(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    snapshot.write(path, RECIPES, TABLE_DATA)
+    with snapshot.Snapshot(path) as cache:
+        assert all(data['quantity'] == 0 for data in cache.table_data().values())
+        assert cache.graph() is None and cache.views() is None
+
+def test_favorites_bitmap_spans_several_bytes(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    table_data = {f"Craft {i:02}": {'id': i, 'favorite': i % 3 == 0, 'category': "Général"} for i in range(20)}
+    snapshot.write(path, {name: {} for name in table_data}, table_data)
+    with snapshot.Snapshot(path) as cache:
+        decoded = cache.table_data()
+    assert {name: data['favorite'] for name, data in decoded.items()} == \
+        {name: data['favorite'] for name, data in table_data.items()}
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:snapshot.HEADER.size - 1],
+    lambda data: b"NOTASNAP" + data[8:],
+    lambda data: data[:8] + (snapshot.FORMAT_VERSION + 1).to_bytes(2, 'little') + data[10:],
+    lambda data: data[:snapshot.HEADER.size + snapshot.SECTION.size],
+])
+def test_invalid_files_are_rejected(tmp_path, corrupt):
+    path = tmp_path / "cache.bin"
+    path.write_bytes(corrupt(snapshot.encode(RECIPES, TABLE_DATA)))
+    with pytest.raises(snapshot.SnapshotError):
+        with snapshot.Snapshot(str(path)) as cache:
+            cache.recipes()
+
+def test_missing_file(tmp_path):
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.read_header(str(tmp_path / "absent.bin"))
@@ -0,0 +1,82 @@
+"""CraftEngine.sync : changements du journal ChangeLog appliqués en mémoire."""
+from init_db import App
+from storage import get_storage
+
+def write(db_name, sql, params=()):
+    with get_storage(db_name).transaction() as cursor:
+        cursor.execute(sql, params)
+
+def loaded(make_engine):
+    engine = make_engine()
+    engine.load()
+    return engine
+
+def test_nothing_to_sync(make_engine):
+    engine = loaded(make_engine)
+    assert engine.sync() == 0
+    assert engine.sync() == 0
+
+def test_favorite(db_name, make_engine):
+    engine = loaded(make_engine)
+    graph = engine.graph
+    write(db_name, "UPDATE Craft SET favorite = 1 WHERE name = 'Porte'")
+    assert engine.sync() == 1
+    assert engine.table_data["Porte"]['favorite'] is True
+    assert engine.page_crafts(favorites_only=True)[0] == ["Porte"]
+    # Pas de recette modifiée : graphe conservé
+    assert engine.graph is graph
+
+def test_add_craft(db_name, make_engine):
+    engine = loaded(make_engine)
+    App(db_name).add_craft("Tabouret", [("Pied de tabouret", 3), ("Assise", 1)], "Menuiserie")
+    assert engine.sync() == 1
+    assert engine.craft_recipes["Tabouret"] == {"Pied de tabouret": 3, "Assise": 1}
+    assert "Tabouret" in engine.get_crafts_using("Assise")
+    assert "Tabouret" in engine.page_crafts(category="Menuiserie", limit=1000)[0]
+    assert engine.search_crafts("tabou") == {"Tabouret"}
+    engine.set_quantity("Tabouret", 2)
+    assert engine.calculate_resources_needed() == {"Pied de tabouret": 6, "Assise": 2}
+
+def test_rename_and_recipe_change(db_name, make_engine):
+    engine = loaded(make_engine)
+    engine.set_quantity("Porte", 2)
+    porte = engine.table_data["Porte"]['id']
+    write(db_name, "UPDATE Craft SET name = 'Porte blindée' WHERE id = ?", (porte,))
+    write(db_name, "DELETE FROM CraftIngredient WHERE craft_id = ? AND variant = 0 AND ingredient_id = "
+                   "(SELECT id FROM Ingredient WHERE name = 'Clou')", (porte,))
+    assert engine.sync() == 1
+    assert "Porte" not in engine.table_data
+    assert "Clou" not in engine.craft_recipes["Porte blindée"]
+    # La quantité du plan suit le craft renommé
+    assert engine.current_plan() == {"Porte blindée": 2}
+    assert "Clou" not in engine.calculate_resources_needed()
+
+def test_delete(db_name, make_engine):
+    engine = loaded(make_engine)
+    write(db_name, "DELETE FROM CraftIngredient WHERE craft_id = (SELECT id FROM Craft WHERE name = 'Porte')")
+    write(db_name, "DELETE FROM Craft WHERE name = 'Porte'")
+    assert engine.sync() == 1
+    assert "Porte" not in engine.table_data
+    assert "Porte" not in engine.views.order
+
+def test_purged_change_log_reloads_everything(db_name, make_engine):
+    engine = loaded(make_engine)
+    write(db_name, "UPDATE Craft SET favorite = 1 WHERE name = 'Porte'")
+    write(db_name, "DELETE FROM ChangeLog")
+    assert engine.sync() is None
+    assert engine.table_data["Porte"]['favorite'] is True
+
+def test_sync_matches_full_reload(db_name, make_engine):
+    engine = loaded(make_engine)
+    app = App(db_name)
+    app.add_craft("Tabouret", [("Planche", 3)], "Menuiserie")
+    app.add_craft("Porte", [("Planche", 8)])
+    write(db_name, "UPDATE Craft SET favorite = 1, category = 'Survie' WHERE name = 'Bandage'")
+    engine.sync()
+    fresh = make_engine()
+    fresh.use_cache = False
+    fresh.load()
+    assert engine.craft_recipes == fresh.craft_recipes
+    assert engine.craft_variants == fresh.craft_variants
+    assert engine.table_data == fresh.table_data
+    assert engine.views.order == fresh.views.order
@@ -0,0 +1,48 @@
+"""Choix des variantes de recette (VariantOptimizer)."""
+from craft_engine import VariantOptimizer
+
+ATTELLE = [{"Planche": 1, "Tissu": 1}, {"Branche": 1, "Tissu": 1}, {"Bâton": 1, "Tissu": 1}]
+RECIPES = {
+    "Attelle": ATTELLE[0],
+    "Bâton": {"Planche": 1},
+    "Planche": {"Bûche": 1},
+}
+VARIANTS = {"Attelle": ATTELLE}
+COSTS = {"Bûche": 3, "Branche": 2, "Tissu": 1}
+
+def test_cheapest_variant_without_stock():
+    optimizer = VariantOptimizer(RECIPES, VARIANTS, COSTS)
+    ranked = optimizer.ranked_variants("Attelle")
+    assert [index for _, index, _ in ranked] == [1, 0, 2]
+    assert ranked[0] == ((3,), 1, {"Branche": 1, "Tissu": 1})
+    choices, resources = optimizer.solve({"Attelle": 4})
+    assert choices == {"Attelle": {1: 4}}
+    assert resources == {"Branche": 4, "Tissu": 4}
+
+def test_stock_shifts_the_choice():
+    optimizer = VariantOptimizer(RECIPES, VARIANTS, COSTS)
+    stock = {"Bûche": 2, "Tissu": 5}
+    # Avec ce stock, les variantes à la bûche ne manquent de rien
+    assert optimizer.ranked_variants("Attelle", stock)[0][1] == 0
+    choices, resources = optimizer.solve({"Attelle": 2}, stock)
+    assert choices == {"Attelle": {0: 2}}
+    assert resources == {"Bûche": 2, "Tissu": 2}
+    # Stock mixte : chaque variante disponible couvre une unité
+    choices, _ = optimizer.solve({"Attelle": 2}, {"Bûche": 1, "Branche": 1, "Tissu": 3})
+    assert choices == {"Attelle": {0: 1, 1: 1}}
+    # Classement sans stock toujours mémorisé à part
+    assert optimizer.ranked_variants("Attelle")[0][1] == 1
+
+def test_ranking_does_not_depend_on_call_order():
+    # Chaque graine se défait en paquet ; le paquet s'obtient aussi en magasin
+    recipes = {"Graines": {"Paquet": 1}, "Paquet": {"Graines": 1}}
+    variants = {"Paquet": [{"Graines": 1}, {"Pièce": 5}]}
+    first = VariantOptimizer(recipes, variants)
+    graines = first.ranked_variants("Graines")
+    paquet = first.ranked_variants("Paquet")
+    second = VariantOptimizer(recipes, variants)
+    assert second.ranked_variants("Paquet") == paquet
+    assert second.ranked_variants("Graines") == graines
+    # Le cycle est coupé au craft de départ
+    assert graines[0][2] == {"Graines": 1}
+    assert paquet[0][2] == {"Paquet": 1}